@@ -0,0 +1,76 @@
+"""
+冷启动导入时间基准。
+
+在新的Python进程中多次执行`import src.workflow, src.llm`，报告耗时的中位数和最小值，
+并检查openai、httpx/httpx2、pydantic、jsonschema等重量级依赖没有被提前加载。
+工作进程和命令行工具每次启动都要付出这部分时间。
+
+用法：
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 20 --budget-ms 300   # 超出预算时返回非零退出码
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 这些模块只应在真正使用对应功能时加载：
+# openai（以及它依赖的HTTP库、pydantic）在访问src.llm.OpenAIClient/DeepSeekClient或创建共享连接池时导入，
+# HTTP库是httpx，较新的SDK版本改为httpx2（见src/llm/http_pool.py），两者都检查；
+# jsonschema在编译非简单schema时导入
+HEAVY_MODULES = ["openai", "httpx", "httpx2", "pydantic", "jsonschema"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import src.workflow, src.llm
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_once() -> dict:
+    """在新进程中测量一次导入时间，返回进程内计时和整个进程的启动耗时"""
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=PROJECT_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    process_time = time.perf_counter() - started
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process"] = process_time
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import time of src.workflow and src.llm")
+    parser.add_argument("--runs", type=int, default=10, help="number of fresh interpreter runs")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if the median import time exceeds this many milliseconds")
+    args = parser.parse_args()
+
+    samples = [measure_once() for _ in range(args.runs)]
+    imports = [sample["elapsed"] * 1000 for sample in samples]
+    processes = [sample["process"] * 1000 for sample in samples]
+    loaded = sorted({module for sample in samples for module in sample["loaded"]})
+
+    print(f"import src.workflow, src.llm  ({args.runs} runs)")
+    print(f"  import time:  median {statistics.median(imports):.1f} ms, min {min(imports):.1f} ms")
+    print(f"  process time: median {statistics.median(processes):.1f} ms, min {min(processes):.1f} ms")
+    print(f"  heavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
+
+    if loaded:
+        return 1
+    if args.budget_ms is not None and statistics.median(imports) > args.budget_ms:
+        print(f"  median import time exceeds budget of {args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,6 +16,7 @@ init()
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 # 导入所需组件
+from src.workflow import configure_logging
 from src.workflow.base import WorkflowContext
 from src.workflow.engine import Workflow
 from src.workflow.nodes.start_node import StartNode
@@ -230,4 +231,5 @@ def run_educational_workflow():
     return final_context  # 返回最后一次执行的上下文
 
 if __name__ == "__main__":
+    configure_logging()
     run_educational_workflow()
@@ -32,6 +32,7 @@ from colorama import Fore, Style, init
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # 导入所需组件
+from src.workflow import configure_logging
 from src.workflow.base import WorkflowContext
 from src.workflow.engine import Workflow
 from src.workflow.nodes.start_node import StartNode
@@ -282,4 +283,5 @@ def run_iterative_improvement_workflow(max_iterations=3):
     return final_context  # 现在即使出错也能返回 None
 
 if __name__ == "__main__":
+    configure_logging()
     run_iterative_improvement_workflow()
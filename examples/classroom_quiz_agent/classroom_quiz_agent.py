@@ -18,6 +18,7 @@ from colorama import Fore, Style, init
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 # 导入所需组件
+from src.workflow import configure_logging
 from src.workflow.base import WorkflowContext
 from src.workflow.engine import Workflow
 from src.workflow.nodes.start_node import StartNode
@@ -41,6 +42,40 @@ def create_classroom_quiz_workflow(llm_client):
         next_node_id="quiz_generator"
     )
     
+    # JSON提取器：在测验生成节点的流式输出中边接收边提取，题目JSON闭合后立即结束生成
+    json_extractor = JSONExtractorNode(
+        node_id="json_extractor",
+        node_name="JSON Extractor Node",
+        input_variable_name="quiz_info",
+        output_variable_name="quiz_info_extracted",
+        schema={
+            "type": "object",
+            "properties": {
+                "problem": {"type": "string"},
+                "answer": {
+                    "type": "object",
+                    "properties": {
+                        "score_points": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "value": {"type": "string"},
+                                    "rule": {"type": "string"}
+                                },
+                                "required": ["value", "rule"]
+                            }
+                        }
+                    },
+                    "required": ["score_points"]
+                }
+            },
+            "required": ["problem", "answer"]
+        },
+        default_value={"problem": "无法生成题目", "answer": {"score_points": []}},
+        raise_on_error=False
+    )
+
     # 生成测验节点
     quiz_generator = LLMNode(
         node_id="quiz_generator",
@@ -72,42 +107,10 @@ def create_classroom_quiz_workflow(llm_client):
         llm_client=llm_client,
         stream=True,                  # 启用流式传输
         stream_callback=stream_callback,  # 使用自定义回调
-        next_node_id="json_extractor"
+        json_extractor=json_extractor,    # 流式提取题目JSON
+        next_node_id="user_input"
     )
     
-    # JSON提取器节点
-    json_extractor = JSONExtractorNode(
-        node_id="json_extractor",
-        node_name="JSON Extractor Node",
-        input_variable_name="quiz_info",
-        output_variable_name="quiz_info_extracted",
-        schema={
-            "type": "object",
-            "properties": {
-                "problem": {"type": "string"},
-                "answer": {
-                    "type": "object",
-                    "properties": {
-                        "score_points": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "value": {"type": "string"},
-                                    "rule": {"type": "string"}
-                                },
-                                "required": ["value", "rule"]
-                            }
-                        }
-                    },
-                    "required": ["score_points"]
-                }
-            },
-            "required": ["problem", "answer"]
-        },
-        default_value={"problem": "无法生成题目", "answer": {"score_points": []}},
-        raise_on_error=False
-    )
     
     # 用户输入节点
     user_input = InputNode(
@@ -210,7 +213,6 @@ def create_classroom_quiz_workflow(llm_client):
     workflow = Workflow([
         start_node,
         quiz_generator,
-        json_extractor,
         user_input,
         score_evaluation,
         json_extractor_score,
@@ -297,6 +299,7 @@ def run_classroom_quiz(keypoint=None):
         return None
 
 if __name__ == "__main__":
+    configure_logging()
     # 可以在这里提供默认的知识点，或者留空让用户输入
     sample_keypoint = ""  # 例如: "牛顿第二定律"
     run_classroom_quiz(sample_keypoint)
@@ -20,6 +20,7 @@ from colorama import Fore, Style, init
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 # 导入所需组件
+from src.workflow import configure_logging
 from src.workflow.base import WorkflowContext
 from src.workflow.engine import Workflow
 from src.workflow.nodes.start_node import StartNode
@@ -320,6 +321,7 @@ def run_feynman_workflow(initial_answer):
         return None
 
 if __name__ == "__main__":
+    configure_logging()
     # 从命令行参数获取初始回答，或使用默认示例
     if len(sys.argv) > 1:
         initial_answer = sys.argv[1]
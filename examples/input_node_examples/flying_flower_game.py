@@ -13,6 +13,7 @@ from colorama import Fore, Style, init
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 # 导入所需组件
+from src.workflow import configure_logging
 from src.workflow.base import WorkflowContext
 from src.workflow.engine import Workflow
 from src.workflow.nodes.start_node import StartNode
@@ -215,4 +216,5 @@ def run_flying_flower_game():
     print(f"\n{Fore.CYAN}成语接龙游戏示例执行完毕!{Style.RESET_ALL}")
 
 if __name__ == "__main__":
+    configure_logging()
     run_flying_flower_game()
@@ -19,6 +19,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 # 导入所需组件
+from src.workflow import configure_logging
 from src.workflow.base import WorkflowContext
 from src.workflow.engine import Workflow
 from src.workflow.nodes.start_node import StartNode
@@ -190,4 +191,5 @@ def run_conditional_branch_workflow():
     return final_context  # 返回最后一个查询的最终上下文
 
 if __name__ == "__main__":
+    configure_logging()
     run_conditional_branch_workflow()
@@ -20,6 +20,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 # 导入所需组件
+from src.workflow import configure_logging
 from src.workflow.base import WorkflowContext
 from src.workflow.engine import Workflow
 from src.workflow.nodes.start_node import StartNode
@@ -130,4 +131,5 @@ def run_json_extraction_workflow():
     return final_context
 
 if __name__ == "__main__":
+    configure_logging()
     run_json_extraction_workflow()
@@ -23,6 +23,7 @@ import os
 # 将项目根目录添加到Python路径
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 # 导入所需组件
+from src.workflow import configure_logging
 from src.workflow.base import WorkflowContext
 from src.workflow.engine import Workflow
 from src.workflow.nodes.start_node import StartNode
@@ -114,4 +115,5 @@ def run_example_workflow():
         return None
 
 if __name__ == "__main__":
+    configure_logging()
     run_example_workflow()
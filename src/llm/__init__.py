@@ -1,10 +1,59 @@
 # 导出LLM客户端类
+#
+# 基于OpenAI SDK的客户端（OpenAIClient、DeepSeekClient）在首次访问时才导入（PEP 562），
+# 只使用FakeLLMClient的测试和离线运行不需要加载openai、httpx、pydantic。
+import importlib
+from typing import TYPE_CHECKING
+
 from .base_client import BaseLLMClient
 from .fake_client import FakeLLMClient
-from .openai_client import OpenAIClient
+from .caching_client import CachingLLMClient, LRUCache
+from .coalescing_client import CoalescingLLMClient
+from .rate_limiter import RateLimiter, RateLimitedLLMClient
+from .retry import RetryPolicy, RetryingLLMClient, StreamInterruptedError
+from .http_pool import (HTTPPoolConfig, get_shared_http_client, get_shared_async_http_client,
+                        close_shared_http_clients, aclose_shared_http_clients)
+
+if TYPE_CHECKING:
+    from .openai_client import OpenAIClient
+    from .deepseek_client import DeepSeekClient
+
+# 延迟导入的属性 -> 所在子模块
+_LAZY_ATTRIBUTES = {
+    'OpenAIClient': '.openai_client',
+    'DeepSeekClient': '.deepseek_client',
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # 之后的访问不再经过__getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 __all__ = [
     'BaseLLMClient',
     'FakeLLMClient',
-    'OpenAIClient'
+    'OpenAIClient',
+    'DeepSeekClient',
+    'CachingLLMClient',
+    'LRUCache',
+    'CoalescingLLMClient',
+    'RateLimiter',
+    'RateLimitedLLMClient',
+    'RetryPolicy',
+    'RetryingLLMClient',
+    'StreamInterruptedError',
+    'HTTPPoolConfig',
+    'get_shared_http_client',
+    'get_shared_async_http_client',
+    'close_shared_http_clients',
+    'aclose_shared_http_clients'
 ]
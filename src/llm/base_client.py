@@ -1,9 +1,18 @@
+import asyncio
+import threading
 from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, Iterable
+
+# 同步迭代结束的标记
+_STREAM_END = object()
 
 class BaseLLMClient(ABC):
     """
     LLM客户端的抽象基类。
     定义了所有LLM客户端都需要实现的接口。
+    
+    子类只需实现同步的invoke；ainvoke和astream默认把同步调用放到线程池中执行，
+    支持原生异步接口的客户端应覆盖它们，避免占用线程。
     """
     
     @abstractmethod
@@ -18,3 +27,93 @@ class BaseLLMClient(ABC):
             str: LLM的文本响应
         """
         pass
+
+    async def ainvoke(self, prompt: str) -> str:
+        """
+        异步调用LLM并获取响应。
+        
+        Args:
+            prompt (str): 发送给LLM的提示词
+            
+        Returns:
+            str: LLM的文本响应
+        """
+        return await asyncio.to_thread(self.invoke, prompt)
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        异步流式调用LLM。
+        
+        默认实现在线程池中逐个读取invoke_stream的片段；客户端不支持流式调用时，
+        把完整响应作为单个片段返回。
+        
+        Args:
+            prompt (str): 发送给LLM的提示词
+            
+        Returns:
+            AsyncIterator[str]: 逐步返回响应片段的异步生成器
+        """
+        if not hasattr(self, 'invoke_stream'):
+            yield await self.ainvoke(prompt)
+            return
+
+        stream = iterate_in_thread(lambda: self.invoke_stream(prompt))
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+
+def has_native_async(client: Any, method_name: str) -> bool:
+    """
+    判断客户端是否原生实现了异步方法（ainvoke或astream）。
+
+    BaseLLMClient的默认实现只是在线程池中调用同步方法，不算原生实现；
+    没有继承BaseLLMClient的客户端按是否定义了该方法判断。
+
+    Args:
+        client (Any): LLM客户端
+        method_name (str): "ainvoke"或"astream"
+
+    Returns:
+        bool: 是否应直接调用该异步方法
+    """
+    method = getattr(type(client), method_name, None)
+    return method is not None and method is not getattr(BaseLLMClient, method_name)
+
+
+async def iterate_in_thread(open_stream: Callable[[], Iterable[str]]) -> AsyncIterator[str]:
+    """
+    在线程池中打开并逐个读取同步流，不阻塞事件循环。
+
+    消费者提前停止或被取消时关闭同步生成器（释放HTTP连接等）；读取和关闭由锁串行化，
+    被取消时仍在进行的那次读取结束后才会关闭。
+
+    Args:
+        open_stream (Callable[[], Iterable[str]]): 返回同步片段流的函数，在线程池中调用
+
+    Returns:
+        AsyncIterator[str]: 逐步返回片段的异步生成器
+    """
+    iterator = await asyncio.to_thread(lambda: iter(open_stream()))
+    lock = threading.Lock()
+
+    def read_next() -> Any:
+        with lock:
+            return next(iterator, _STREAM_END)
+
+    def close() -> None:
+        with lock:
+            close_iterator = getattr(iterator, 'close', None)
+            if close_iterator is not None:
+                close_iterator()
+
+    try:
+        while True:
+            chunk = await asyncio.to_thread(read_next)
+            if chunk is _STREAM_END:
+                return
+            yield chunk
+    finally:
+        await asyncio.to_thread(close)
@@ -0,0 +1,396 @@
+"""
+带响应缓存的LLM客户端包装器。
+
+相同的提示词在教学场景中非常常见（多个学生询问同一个知识点、分支节点的分类提示词
+逐字重复），CachingLLMClient把任意BaseLLMClient包装起来，按“模型 + 系统提示词 + 提示词”
+缓存响应：
+- 内存层：有容量上限和过期时间的LRU缓存
+- 磁盘层（可选）：SQLite文件，进程重启后仍然有效
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Hashable, Iterator, Optional, Tuple
+
+from .base_client import BaseLLMClient, has_native_async, iterate_in_thread
+
+logger = logging.getLogger(__name__)
+
+# 各客户端默认使用的系统提示词，参与缓存键的计算
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant."
+
+# 查找时表示缓存未命中
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    线程安全的LRU缓存，同时受容量和过期时间限制。
+
+    过期的条目在被访问时惰性删除；超出容量时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        初始化LRU缓存。
+
+        Args:
+            max_size (int): 最多保存的条目数量
+            ttl (float, optional): 条目的存活时间（秒），None表示永不过期
+
+        Raises:
+            ValueError: 如果max_size小于1或ttl不为正数
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存值并标记为最近使用，不存在或已过期时返回默认值。"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入缓存值，必要时淘汰最久未使用的条目。"""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """删除指定条目（不存在时忽略）。"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存。"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+
+class SQLiteResponseStore:
+    """
+    基于SQLite的持久化响应存储，作为CachingLLMClient的磁盘层。
+
+    多个线程共享同一个连接，由锁保证串行访问。
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        """
+        初始化磁盘存储。
+
+        Args:
+            path (str): SQLite数据库文件路径
+            ttl (float, optional): 条目的存活时间（秒），None表示永不过期
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        """读取响应，不存在或已过期时返回None。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                with self._conn:
+                    self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                return None
+            return response
+
+    def set(self, key: str, response: str) -> None:
+        """写入响应，覆盖同键的旧值。"""
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, expires_at)
+            )
+
+    def delete(self, key: str) -> None:
+        """删除指定键的响应，不存在时忽略。"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """删除所有持久化的响应。"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_responses")
+
+    def close(self) -> None:
+        """关闭数据库连接。"""
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class CacheStats:
+    """缓存命中统计"""
+    hits: int = 0          # 内存层命中次数
+    disk_hits: int = 0     # 磁盘层命中次数
+    misses: int = 0        # 未命中、实际调用LLM的次数
+
+    @property
+    def requests(self) -> int:
+        """总请求次数"""
+        return self.hits + self.disk_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """命中率（内存层和磁盘层合计）"""
+        total = self.requests
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+
+class CachingLLMClient(BaseLLMClient):
+    """
+    为任意LLM客户端增加响应缓存的包装器。
+
+    缓存键由模型名称、系统提示词和提示词共同决定。只有成功完成的调用才会被缓存；
+    流式调用在流完整结束后写入缓存，命中时把缓存的响应按片段重放。
+    """
+
+    def __init__(self, client: BaseLLMClient,
+                 max_size: int = 1024,
+                 ttl: Optional[float] = None,
+                 disk_path: Optional[str] = None,
+                 disk_ttl: Optional[float] = None,
+                 replay_chunk_size: int = 32):
+        """
+        初始化缓存客户端。
+
+        Args:
+            client (BaseLLMClient): 被包装的LLM客户端
+            max_size (int): 内存层最多缓存的响应数量
+            ttl (float, optional): 内存层条目的存活时间（秒），None表示永不过期
+            disk_path (str, optional): 磁盘层SQLite文件路径，None表示不启用磁盘层
+            disk_ttl (float, optional): 磁盘层条目的存活时间（秒），默认与ttl相同
+            replay_chunk_size (int): 流式重放缓存响应时每个片段的字符数
+        """
+        if replay_chunk_size < 1:
+            raise ValueError("replay_chunk_size must be at least 1")
+
+        self.client = client
+        self.model = getattr(client, 'model', type(client).__name__)
+        self.memory_cache = LRUCache(max_size=max_size, ttl=ttl)
+        self.disk_store = (
+            SQLiteResponseStore(disk_path, ttl=disk_ttl if disk_ttl is not None else ttl)
+            if disk_path else None
+        )
+        self.replay_chunk_size = replay_chunk_size
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    def cache_key(self, prompt: str, system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> str:
+        """
+        计算缓存键。
+
+        Args:
+            prompt (str): 提示词
+            system_prompt (str): 系统提示词
+
+        Returns:
+            str: 由模型、系统提示词和提示词计算出的SHA-256摘要
+        """
+        payload = json.dumps([self.model, system_prompt, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def invoke(self, prompt: str) -> str:
+        """
+        调用LLM，命中缓存时直接返回缓存的响应。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            str: LLM的文本响应
+        """
+        key = self.cache_key(prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        response = self.client.invoke(prompt)
+        self._store(key, response)
+        return response
+
+    def invoke_stream(self, prompt: str, system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> Iterator[str]:
+        """
+        流式调用LLM，命中缓存时把缓存的响应切分成片段重放。
+
+        被包装的客户端不支持流式调用时，使用invoke获取完整响应并作为单个片段返回。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+            system_prompt (str): 系统提示词
+
+        Returns:
+            Iterator[str]: 逐步返回响应片段的生成器
+        """
+        key = self.cache_key(prompt, system_prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            for start in range(0, len(cached), self.replay_chunk_size):
+                yield cached[start:start + self.replay_chunk_size]
+            return
+
+        if not hasattr(self.client, 'invoke_stream'):
+            response = self.client.invoke(prompt)
+            self._store(key, response)
+            yield response
+            return
+
+        if system_prompt == DEFAULT_SYSTEM_PROMPT:
+            # 兼容只接受提示词参数的客户端
+            stream = self.client.invoke_stream(prompt)
+        else:
+            stream = self.client.invoke_stream(prompt, system_prompt=system_prompt)
+
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        # 只有完整结束的流才写入缓存，中途中断的响应不可复用
+        self._store(key, "".join(chunks))
+
+    async def ainvoke(self, prompt: str) -> str:
+        """
+        异步调用LLM，命中缓存时直接返回，未命中时等待被包装客户端的原生异步调用。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            str: LLM的文本响应
+        """
+        key = self.cache_key(prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        if has_native_async(self.client, 'ainvoke'):
+            response = await self.client.ainvoke(prompt)
+        else:
+            response = await asyncio.to_thread(self.client.invoke, prompt)
+        self._store(key, response)
+        return response
+
+    async def astream(self, prompt: str, system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> AsyncIterator[str]:
+        """
+        异步流式调用LLM，命中缓存时重放缓存的响应，未命中时读取被包装客户端的原生异步流。
+
+        参数和返回值与invoke_stream相同；只有完整结束的流才写入缓存。
+        """
+        key = self.cache_key(prompt, system_prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            for start in range(0, len(cached), self.replay_chunk_size):
+                yield cached[start:start + self.replay_chunk_size]
+            return
+
+        chunks = []
+        stream = self._open_astream(prompt, system_prompt)
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            # 提前停止时立即关闭上游流，释放连接
+            if hasattr(stream, 'aclose'):
+                await stream.aclose()
+        self._store(key, "".join(chunks))
+
+    def _open_astream(self, prompt: str, system_prompt: str) -> AsyncIterator[str]:
+        """打开上游异步流；客户端没有原生异步流式接口时在线程池中读取同步流"""
+        if not has_native_async(self.client, 'astream'):
+            if not hasattr(self.client, 'invoke_stream'):
+                return iterate_in_thread(lambda: [self.client.invoke(prompt)])
+            if system_prompt == DEFAULT_SYSTEM_PROMPT:
+                return iterate_in_thread(lambda: self.client.invoke_stream(prompt))
+            return iterate_in_thread(lambda: self.client.invoke_stream(prompt, system_prompt=system_prompt))
+        if system_prompt == DEFAULT_SYSTEM_PROMPT:
+            # 兼容只接受提示词参数的客户端
+            return self.client.astream(prompt)
+        return self.client.astream(prompt, system_prompt=system_prompt)
+
+    def invalidate(self, prompt: str, system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> None:
+        """从内存层和磁盘层删除指定提示词的缓存响应。"""
+        key = self.cache_key(prompt, system_prompt)
+        self.memory_cache.invalidate(key)
+        if self.disk_store is not None:
+            self.disk_store.delete(key)
+
+    def clear(self) -> None:
+        """清空内存层和磁盘层的缓存。"""
+        self.memory_cache.clear()
+        if self.disk_store is not None:
+            self.disk_store.clear()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """依次查找内存层和磁盘层，磁盘层命中时回填内存层"""
+        response = self.memory_cache.get(key)
+        if response is not None:
+            self._record("hits")
+            logger.debug("  [LLM Cache] Memory hit: %s", key)
+            return response
+
+        if self.disk_store is not None:
+            response = self.disk_store.get(key)
+            if response is not None:
+                self.memory_cache.set(key, response)
+                self._record("disk_hits")
+                logger.debug("  [LLM Cache] Disk hit: %s", key)
+                return response
+
+        self._record("misses")
+        return None
+
+    def _store(self, key: str, response: str) -> None:
+        """把响应写入所有缓存层"""
+        self.memory_cache.set(key, response)
+        if self.disk_store is not None:
+            self.disk_store.set(key, response)
+
+    def _record(self, field: str) -> None:
+        """线程安全地累加命中统计"""
+        with self._stats_lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
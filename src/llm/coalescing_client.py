@@ -0,0 +1,381 @@
+"""
+合并并发相同请求的LLM客户端包装器（single-flight）。
+
+同一个班级的学生同时开始测验时，多个LLMNode会在缓存被填充之前并发发出完全相同的
+提示词。CoalescingLLMClient保证同一时刻每个相同请求只有一次真实调用：后到的调用者
+（无论是线程还是asyncio任务）挂到正在进行的调用上，共享它的结果或异常。
+流式调用的片段会广播给所有订阅者。
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from .base_client import BaseLLMClient, has_native_async
+from .caching_client import DEFAULT_SYSTEM_PROMPT
+
+logger = logging.getLogger(__name__)
+
+
+class _CallFlight:
+    """
+    一次进行中的普通调用。
+
+    所有等待者共享同一个Future；waiters记录仍在等待结果的调用者数量，
+    异步调用的上游请求在独立任务中执行，只有所有等待者都离开时才会被取消。
+    """
+
+    def __init__(self):
+        self.future: Future = Future()
+        self.waiters = 1
+        self.task: Optional[asyncio.Task] = None
+
+
+class _StreamFlight:
+    """
+    一次进行中的流式调用。
+
+    生产者在后台读取上游流并把片段追加到缓冲区；每个订阅者从缓冲区开头按自己的进度读取，
+    因此中途加入的订阅者也能收到完整响应。同步订阅者通过条件变量等待，
+    异步订阅者通过各自事件循环中的asyncio.Event等待。
+    所有订阅者都停止读取后，生产者停止读取并关闭上游流。
+    """
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 1     # 仍在读取的订阅者数量（包括发起者）
+        self.stopped = False     # 所有订阅者都已离开，生产者应尽快停止
+        self.task: Any = None    # 持有异步生产者任务的引用，避免被垃圾回收
+        self.loop: Optional[asyncio.AbstractEventLoop] = None  # 异步生产者任务所在的事件循环
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def publish(self, chunk: str) -> None:
+        """追加一个片段并唤醒所有订阅者"""
+        with self._cond:
+            self.chunks.append(chunk)
+            self._wake()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """标记流结束（可附带异常）并唤醒所有订阅者"""
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._wake()
+
+    def stop(self) -> None:
+        """通知生产者停止读取上游流"""
+        self.stopped = True
+        if self.task is not None and self.loop is not None:
+            self.loop.call_soon_threadsafe(self.task.cancel)
+
+    def _wake(self) -> None:
+        """在持有锁的情况下唤醒同步和异步订阅者"""
+        self._cond.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def subscribe(self) -> Iterator[str]:
+        """同步读取全部片段，上游出错时抛出同一个异常"""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                pending = self.chunks[index:]
+                done, error = self.done, self.error
+            index += len(pending)
+            yield from pending
+            if done and index >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+    async def asubscribe(self) -> AsyncIterator[str]:
+        """异步读取全部片段，上游出错时抛出同一个异常"""
+        loop = asyncio.get_running_loop()
+        index = 0
+        while True:
+            with self._cond:
+                pending = self.chunks[index:]
+                done, error = self.done, self.error
+                event = None
+                if not pending and not done:
+                    event = asyncio.Event()
+                    self._async_waiters.append((loop, event))
+            if event is not None:
+                await event.wait()
+                continue
+            index += len(pending)
+            for chunk in pending:
+                yield chunk
+            if done and index >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class CoalescingLLMClient(BaseLLMClient):
+    """
+    合并并发相同请求的LLM客户端包装器。
+
+    请求以“系统提示词 + 提示词”为键（被包装的客户端只有一个模型）。调用完成后
+    对应的键立即释放，之后的相同请求会重新调用LLM；需要跨时间复用结果时，
+    可以再用CachingLLMClient包装本客户端。
+    """
+
+    def __init__(self, client: BaseLLMClient):
+        """
+        初始化合并客户端。
+
+        Args:
+            client (BaseLLMClient): 被包装的LLM客户端
+        """
+        self.client = client
+        self.model = getattr(client, 'model', type(client).__name__)
+        self.coalesced_calls = 0  # 挂到已有调用上、没有实际调用LLM的次数
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[str, str], _CallFlight] = {}
+        self._streams: Dict[Tuple[str, str], _StreamFlight] = {}
+
+    def invoke(self, prompt: str) -> str:
+        """
+        调用LLM；已有相同请求在进行中时等待并共享它的结果。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            str: LLM的文本响应
+        """
+        key = (DEFAULT_SYSTEM_PROMPT, prompt)
+        flight, leader = self._join_call(key)
+        if not leader:
+            return flight.future.result()
+
+        try:
+            response = self.client.invoke(prompt)
+        except BaseException as e:
+            self._finish_call(key, flight, error=e)
+            raise
+        self._finish_call(key, flight, response=response)
+        return response
+
+    async def ainvoke(self, prompt: str) -> str:
+        """
+        异步调用LLM，与同步调用者共享同一次进行中的请求。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            str: LLM的文本响应
+        """
+        key = (DEFAULT_SYSTEM_PROMPT, prompt)
+        flight, leader = self._join_call(key)
+        if leader:
+            # 上游调用在独立任务中执行，发起者被取消不会中断其他等待者共享的调用
+            flight.task = asyncio.ensure_future(self._acall(prompt))
+            flight.task.add_done_callback(lambda task: self._finish_task(key, flight, task))
+
+        try:
+            # 共享的Future不能被单个等待者取消，否则设置结果时会失败
+            return await asyncio.shield(asyncio.wrap_future(flight.future))
+        except asyncio.CancelledError:
+            self._leave_call(key, flight)
+            raise
+
+    async def _acall(self, prompt: str) -> str:
+        """实际的异步上游调用"""
+        if has_native_async(self.client, 'ainvoke'):
+            return await self.client.ainvoke(prompt)
+        return await asyncio.to_thread(self.client.invoke, prompt)
+
+    def invoke_stream(self, prompt: str, system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> Iterator[str]:
+        """
+        流式调用LLM；已有相同的流在进行中时订阅它的片段。
+
+        上游流由后台线程读取，因此某个订阅者提前停止读取不会影响其他订阅者；
+        所有订阅者都停止读取后，后台线程停止读取并关闭上游流。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+            system_prompt (str): 系统提示词
+
+        Returns:
+            Iterator[str]: 逐步返回响应片段的生成器
+        """
+        key = (system_prompt, prompt)
+        flight, leader = self._join_stream(key)
+        if leader:
+            threading.Thread(
+                target=self._produce_stream,
+                args=(key, flight),
+                name="llm-stream-producer",
+                daemon=True
+            ).start()
+        return self._subscribe(key, flight)
+
+    def _subscribe(self, key: Tuple[str, str], flight: _StreamFlight) -> Iterator[str]:
+        """同步读取流，停止读取时离开该流"""
+        try:
+            yield from flight.subscribe()
+        finally:
+            self._leave_stream(key, flight)
+
+    async def astream(self, prompt: str, system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> AsyncIterator[str]:
+        """
+        异步流式调用LLM，与同步订阅者共享同一个上游流。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+            system_prompt (str): 系统提示词
+
+        Returns:
+            AsyncIterator[str]: 逐步返回响应片段的异步生成器
+        """
+        key = (system_prompt, prompt)
+        flight, leader = self._join_stream(key)
+        if leader:
+            flight.loop = asyncio.get_running_loop()
+            if has_native_async(self.client, 'astream'):
+                flight.task = asyncio.create_task(self._aproduce_stream(key, flight))
+            else:
+                flight.task = asyncio.create_task(asyncio.to_thread(self._produce_stream, key, flight))
+        try:
+            async for chunk in flight.asubscribe():
+                yield chunk
+        finally:
+            self._leave_stream(key, flight)
+
+    def _join_call(self, key: Tuple[str, str]) -> Tuple[_CallFlight, bool]:
+        """返回该请求对应的_CallFlight，以及调用者是否需要负责实际调用"""
+        with self._lock:
+            flight = self._calls.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.coalesced_calls += 1
+                logger.debug("  [LLM Coalescing] Joined in-flight call: %s...", key[1][:50])
+                return flight, False
+            flight = _CallFlight()
+            self._calls[key] = flight
+            return flight, True
+
+    def _leave_call(self, key: Tuple[str, str], flight: _CallFlight) -> None:
+        """等待者被取消时离开调用；最后一个等待者离开时取消上游任务并释放请求键"""
+        with self._lock:
+            flight.waiters -= 1
+            if flight.waiters > 0 or flight.future.done():
+                return
+            if self._calls.get(key) is flight:
+                del self._calls[key]
+        if flight.task is not None:
+            flight.task.cancel()
+
+    def _finish_task(self, key: Tuple[str, str], flight: _CallFlight, task: asyncio.Task) -> None:
+        """异步上游任务结束时把结果交给所有等待者"""
+        if task.cancelled():
+            # 只有所有等待者都已离开时任务才会被取消，没有人需要这个结果
+            self._finish_call(key, flight, error=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._finish_call(key, flight, error=task.exception())
+        else:
+            self._finish_call(key, flight, response=task.result())
+
+    def _finish_call(self, key: Tuple[str, str], flight: _CallFlight,
+                     response: Optional[str] = None, error: Optional[BaseException] = None) -> None:
+        """释放请求键并把结果交给所有等待者"""
+        with self._lock:
+            if self._calls.get(key) is flight:
+                del self._calls[key]
+        if flight.future.done():
+            return
+        if error is not None:
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_result(response)
+
+    def _join_stream(self, key: Tuple[str, str]) -> Tuple[_StreamFlight, bool]:
+        """返回该流对应的_StreamFlight，以及调用者是否需要启动生产者"""
+        with self._lock:
+            flight = self._streams.get(key)
+            if flight is not None:
+                flight.subscribers += 1
+                self.coalesced_calls += 1
+                logger.debug("  [LLM Coalescing] Joined in-flight stream: %s...", key[1][:50])
+                return flight, False
+            flight = _StreamFlight()
+            self._streams[key] = flight
+            return flight, True
+
+    def _leave_stream(self, key: Tuple[str, str], flight: _StreamFlight) -> None:
+        """订阅者停止读取；最后一个订阅者离开时释放键并停止生产者"""
+        with self._lock:
+            flight.subscribers -= 1
+            if flight.subscribers > 0 or flight.done:
+                return
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+        logger.debug("  [LLM Coalescing] All subscribers left, stopping stream: %s...", key[1][:50])
+        flight.stop()
+
+    def _end_stream(self, key: Tuple[str, str], flight: _StreamFlight,
+                    error: Optional[BaseException] = None) -> None:
+        """释放流的键，之后的相同请求会发起新的调用"""
+        with self._lock:
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+        flight.finish(error)
+
+    def _open_stream(self, system_prompt: str, prompt: str) -> Iterator[str]:
+        """打开上游同步流；客户端不支持流式调用时把完整响应作为单个片段"""
+        if not hasattr(self.client, 'invoke_stream'):
+            return iter([self.client.invoke(prompt)])
+        if system_prompt == DEFAULT_SYSTEM_PROMPT:
+            # 兼容只接受提示词参数的客户端
+            return self.client.invoke_stream(prompt)
+        return self.client.invoke_stream(prompt, system_prompt=system_prompt)
+
+    def _produce_stream(self, key: Tuple[str, str], flight: _StreamFlight) -> None:
+        """读取上游同步流并广播片段，所有订阅者离开后关闭上游流"""
+        stream = None
+        try:
+            stream = self._open_stream(*key)
+            for chunk in stream:
+                flight.publish(chunk)
+                if flight.stopped:
+                    break
+        except BaseException as e:
+            self._end_stream(key, flight, e)
+        else:
+            self._end_stream(key, flight)
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+
+    async def _aproduce_stream(self, key: Tuple[str, str], flight: _StreamFlight) -> None:
+        """读取上游异步流并广播片段，所有订阅者离开后关闭上游流"""
+        system_prompt, prompt = key
+        stream = None
+        try:
+            if system_prompt == DEFAULT_SYSTEM_PROMPT:
+                stream = self.client.astream(prompt)
+            else:
+                stream = self.client.astream(prompt, system_prompt=system_prompt)
+            async for chunk in stream:
+                flight.publish(chunk)
+                if flight.stopped:
+                    break
+        except BaseException as e:
+            self._end_stream(key, flight, e)
+        else:
+            self._end_stream(key, flight)
+        finally:
+            aclose = getattr(stream, 'aclose', None)
+            if aclose is not None:
+                await aclose()
@@ -1,6 +1,13 @@
+import asyncio
+import logging
+import weakref
 from .base_client import BaseLLMClient
-from openai import OpenAI
-from typing import Iterator, Optional, List, Dict, Any
+from .http_pool import (HTTPPoolConfig, DEFAULT_POOL_CONFIG, get_shared_http_client,
+                        get_shared_async_http_client)
+from openai import AsyncOpenAI, OpenAI
+from typing import AsyncIterator, Iterator, Optional, List, Dict, Any
+
+logger = logging.getLogger(__name__)
 
 class DeepSeekClient(BaseLLMClient):
     """
@@ -8,19 +15,34 @@ class DeepSeekClient(BaseLLMClient):
     通过OpenAI SDK调用DeepSeek模型，使用OpenAI兼容的API。
     """
     
-    def __init__(self, api_key: str, model: str = "deepseek-chat"):
+    def __init__(self, api_key: str, model: str = "deepseek-chat",
+                 pool_config: Optional[HTTPPoolConfig] = None,
+                 http_client: Optional[Any] = None,
+                 max_retries: int = 2):
         """
         初始化DeepSeek客户端
         
         Args:
             api_key (str): DeepSeek API密钥
             model (str): 要使用的模型名称，默认为deepseek-chat
+            pool_config (HTTPPoolConfig, optional): 共享连接池配置，相同配置的客户端复用同一组连接
+            http_client (httpx.Client, optional): 自定义HTTP客户端，指定后忽略pool_config
+            max_retries (int): SDK内置的重试次数；使用RetryingLLMClient时建议设为0
         """
+        pool_config = pool_config or DEFAULT_POOL_CONFIG
+        self.pool_config = pool_config
+        self.max_retries = max_retries
         self.client = OpenAI(
             api_key=api_key,
-            base_url="https://api.deepseek.com/v1"
+            base_url="https://api.deepseek.com/v1",
+            http_client=http_client or get_shared_http_client(pool_config),
+            timeout=pool_config.build_timeout(),
+            max_retries=max_retries
         )
         self.model = model
+        # 每个事件循环各自的异步SDK客户端，按需创建
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = \
+            weakref.WeakKeyDictionary()
     
     def invoke(self, prompt: str) -> str:
         """
@@ -42,7 +64,7 @@ class DeepSeekClient(BaseLLMClient):
             )
             return response.choices[0].message.content
         except Exception as e:
-            print(f"DeepSeek API调用失败: {e}")
+            logger.error("DeepSeek API调用失败: %s", e)
             raise
     
     def invoke_stream(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> Iterator[str]:
@@ -74,5 +96,70 @@ class DeepSeekClient(BaseLLMClient):
                 if chunk.choices and chunk.choices[0].delta.content:
                     yield chunk.choices[0].delta.content
         except Exception as e:
-            print(f"DeepSeek API流式调用失败: {e}")
+            logger.error("DeepSeek API流式调用失败: %s", e)
+            raise
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        """获取当前事件循环对应的异步SDK客户端，复用共享的异步连接池"""
+        loop = asyncio.get_running_loop()
+        async_client = self._async_clients.get(loop)
+        if async_client is None:
+            async_client = AsyncOpenAI(
+                api_key=self.client.api_key,
+                base_url=self.client.base_url,
+                http_client=get_shared_async_http_client(self.pool_config),
+                timeout=self.pool_config.build_timeout(),
+                max_retries=self.max_retries
+            )
+            self._async_clients[loop] = async_client
+        return async_client
+
+    async def ainvoke(self, prompt: str) -> str:
+        """
+        通过异步SDK调用DeepSeek API，不占用线程
+        
+        Args:
+            prompt (str): 发送给模型的提示词
+            
+        Returns:
+            str: 模型的文本响应
+        """
+        try:
+            response = await self._get_async_client().chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            logger.error("DeepSeek API异步调用失败: %s", e)
+            raise
+
+    async def astream(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> AsyncIterator[str]:
+        """
+        通过异步SDK调用DeepSeek API并获取流式响应
+        
+        Args:
+            prompt (str): 发送给模型的提示词
+            system_prompt (str): 系统提示词，设定AI助手的角色或行为
+            
+        Returns:
+            AsyncIterator[str]: 异步生成器，逐步返回模型的流式响应片段
+        """
+        try:
+            stream = await self._get_async_client().chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error("DeepSeek API异步流式调用失败: %s", e)
             raise
@@ -1,11 +1,31 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator
 from .base_client import BaseLLMClient
 
+logger = logging.getLogger(__name__)
+
 class FakeLLMClient(BaseLLMClient):
     """
     用于测试的假LLM客户端。
     根据提示词中的关键词返回预定义的响应。
+    
+    可以通过latency模拟网络延迟：同步调用使用time.sleep，异步调用使用asyncio.sleep，
+    因此能够在离线环境下对异步工作流进行并发压测。
     """
     
+    def __init__(self, latency: float = 0.0):
+        """
+        初始化假LLM客户端
+        
+        Args:
+            latency (float): 每次调用模拟的响应延迟（秒），默认为0
+        """
+        if latency < 0:
+            raise ValueError("latency must not be negative")
+        self.latency = latency
+    
     def invoke(self, prompt: str) -> str:
         """
         模拟调用LLM并返回预定义的响应。
@@ -16,7 +36,43 @@ class FakeLLMClient(BaseLLMClient):
         Returns:
             str: 预定义的响应
         """
-        print(f"    [Fake LLM] Received prompt: {prompt[:100]}...") # 打印部分提示词
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(prompt)
+    
+    async def ainvoke(self, prompt: str) -> str:
+        """
+        异步模拟调用LLM，延迟期间不占用线程。
+        
+        Args:
+            prompt (str): 发送给模拟LLM的提示词
+            
+        Returns:
+            str: 预定义的响应
+        """
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(prompt)
+    
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        异步模拟流式调用，按单词返回预定义响应，延迟平均分摊到各个片段。
+        
+        Args:
+            prompt (str): 发送给模拟LLM的提示词
+            
+        Returns:
+            AsyncIterator[str]: 逐步返回响应片段的异步生成器
+        """
+        words = self._respond(prompt).split(" ")
+        for index, word in enumerate(words):
+            if self.latency:
+                await asyncio.sleep(self.latency / len(words))
+            yield word if index == len(words) - 1 else word + " "
+    
+    def _respond(self, prompt: str) -> str:
+        """根据提示词中的关键词选择预定义的响应"""
+        logger.debug("    [Fake LLM] Received prompt: %s...", prompt[:100]) # 打印部分提示词
         
         # 根据提示词中的关键词返回不同的模拟响应
         if "better user's query" in prompt:
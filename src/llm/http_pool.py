@@ -0,0 +1,158 @@
+"""
+LLM客户端共享的HTTP连接池。
+
+OpenAIClient、DeepSeekClient等基于OpenAI SDK的客户端默认各自创建HTTP连接，
+每个新会话都要重新进行TCP握手和TLS协商。本模块按配置缓存httpx客户端，
+使同一进程内的所有LLM客户端（跨工作流、跨线程）复用同一组长连接。
+"""
+import asyncio
+import functools
+import importlib.util
+import re
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class HTTPPoolConfig:
+    """
+    HTTP连接池配置。
+
+    相同配置的客户端共享同一个连接池。httpx的连接数限制作用于整个连接池，
+    由于每个LLM服务商使用各自的域名，这里的限制也就相当于每个服务商的连接上限。
+    """
+    max_connections: int = 100               # 连接池允许的最大连接数
+    max_keepalive_connections: int = 20     # 保持空闲的长连接数量
+    keepalive_expiry: float = 60.0           # 空闲长连接的保留时间（秒）
+    connect_timeout: float = 10.0            # 建立连接的超时时间（秒）
+    read_timeout: float = 600.0              # 读取响应的超时时间（秒），需覆盖较长的生成
+    write_timeout: float = 30.0              # 发送请求的超时时间（秒）
+    pool_timeout: float = 30.0               # 等待空闲连接的超时时间（秒）
+    http2: bool = True                       # 是否启用HTTP/2（需要安装h2包）
+
+    def build_timeout(self) -> Any:
+        """构建httpx超时配置"""
+        httpx = _httpx_module()
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout
+        )
+
+    def build_limits(self) -> Any:
+        """构建httpx连接数限制"""
+        httpx = _httpx_module()
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def http2_enabled(self) -> bool:
+        """只有在安装了h2包时才启用HTTP/2"""
+        return self.http2 and importlib.util.find_spec("h2") is not None
+
+
+DEFAULT_POOL_CONFIG = HTTPPoolConfig()
+
+
+@functools.lru_cache(maxsize=None)
+def _httpx_module() -> Any:
+    """
+    延迟导入OpenAI SDK所依赖的HTTP客户端库，保证构建的配置对象与SDK使用的类型一致。
+
+    较新的SDK依赖httpx2（API与httpx相同），较早的版本依赖httpx，按SDK声明的依赖选择。
+    """
+    from importlib import metadata
+    requirements = metadata.requires("openai") or []
+    if any(re.match(r"httpx2\b", requirement) for requirement in requirements):
+        import httpx2 as httpx
+    else:
+        import httpx
+    return httpx
+
+
+_lock = threading.Lock()
+_sync_clients: Dict[HTTPPoolConfig, Any] = {}
+# 异步连接绑定在创建它的事件循环上，因此按事件循环分别缓存，事件循环被回收时自动释放
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[HTTPPoolConfig, Any]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def get_shared_http_client(config: Optional[HTTPPoolConfig] = None) -> Any:
+    """
+    获取指定配置对应的共享httpx.Client，首次调用时创建。
+
+    Args:
+        config (HTTPPoolConfig, optional): 连接池配置，默认使用DEFAULT_POOL_CONFIG
+
+    Returns:
+        httpx.Client: 线程安全、可跨客户端复用的HTTP客户端
+    """
+    config = config or DEFAULT_POOL_CONFIG
+    with _lock:
+        client = _sync_clients.get(config)
+        if client is None or client.is_closed:
+            # DefaultHttpxClient保留了SDK的默认设置，这里只覆盖连接池相关参数
+            from openai import DefaultHttpxClient
+            client = DefaultHttpxClient(
+                limits=config.build_limits(),
+                timeout=config.build_timeout(),
+                http2=config.http2_enabled(),
+                follow_redirects=True
+            )
+            _sync_clients[config] = client
+        return client
+
+
+def get_shared_async_http_client(config: Optional[HTTPPoolConfig] = None) -> Any:
+    """
+    获取当前事件循环中指定配置对应的共享httpx.AsyncClient，首次调用时创建。
+
+    必须在事件循环中调用。
+
+    Args:
+        config (HTTPPoolConfig, optional): 连接池配置，默认使用DEFAULT_POOL_CONFIG
+
+    Returns:
+        httpx.AsyncClient: 当前事件循环内可跨客户端复用的异步HTTP客户端
+    """
+    config = config or DEFAULT_POOL_CONFIG
+    loop = asyncio.get_running_loop()
+    with _lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(config)
+        if client is None or client.is_closed:
+            from openai import DefaultAsyncHttpxClient
+            client = DefaultAsyncHttpxClient(
+                limits=config.build_limits(),
+                timeout=config.build_timeout(),
+                http2=config.http2_enabled(),
+                follow_redirects=True
+            )
+            loop_clients[config] = client
+        return client
+
+
+def close_shared_http_clients() -> None:
+    """
+    关闭所有共享的同步HTTP客户端，通常在进程退出前调用。
+
+    异步客户端随各自的事件循环释放，需要提前关闭时使用aclose_shared_http_clients。
+    """
+    with _lock:
+        clients = list(_sync_clients.values())
+        _sync_clients.clear()
+    for client in clients:
+        client.close()
+
+
+async def aclose_shared_http_clients() -> None:
+    """关闭当前事件循环中所有共享的异步HTTP客户端。"""
+    with _lock:
+        clients = list(_async_clients.pop(asyncio.get_running_loop(), {}).values())
+    for client in clients:
+        await client.aclose()
@@ -0,0 +1,389 @@
+"""
+LLM服务商的客户端限流与并发控制。
+
+上课高峰期大量请求同时到达时，超过服务商配额会得到429错误，节点直接失败。
+RateLimiter在客户端一侧把请求控制在配额以内：
+- 令牌桶限制每秒请求数和每分钟token数
+- 信号量限制同时进行中的请求数
+- 等待者按到达顺序（FIFO）放行，同步线程和asyncio任务共用同一个队列
+RateLimitedLLMClient把限流器挂到任意BaseLLMClient上。
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Deque, Iterator, Optional, Union
+
+from .base_client import BaseLLMClient, has_native_async, iterate_in_thread
+
+
+def estimate_tokens(prompt: str) -> int:
+    """粗略估计提示词的token数（约4个字符一个token）"""
+    return len(prompt) // 4 + 1
+
+
+class TokenBucket:
+    """
+    令牌桶。
+
+    reserve()立即扣除令牌并返回需要等待的时间，余额可以为负：后来的调用者
+    排在之前预留的令牌之后，因此按预留顺序放行。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        初始化令牌桶。
+
+        Args:
+            rate (float): 每秒补充的令牌数
+            capacity (float): 桶的容量，即允许的突发量
+
+        Raises:
+            ValueError: 如果rate或capacity不为正数
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        预留令牌（调用者负责加锁）。
+
+        Args:
+            amount (float): 需要的令牌数
+            now (float): 当前的time.monotonic()时间
+
+        Returns:
+            float: 需要等待的秒数，0表示可以立即执行
+        """
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= amount
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+@dataclass
+class RateLimiterStats:
+    """限流器指标快照"""
+    queue_depth: int          # 当前等待放行的调用者数量
+    max_queue_depth: int      # 观察到的最大等待数量
+    in_flight: int            # 当前进行中的请求数
+    admitted: int             # 累计放行的请求数
+    total_wait_time: float    # 累计等待时间（秒）
+
+    @property
+    def average_wait_time(self) -> float:
+        """平均每个请求的等待时间（秒）"""
+        return self.total_wait_time / self.admitted if self.admitted else 0.0
+
+
+class _SyncWaiter:
+    """在队列中等待并发名额的线程"""
+
+    def __init__(self, tokens: float):
+        self.tokens = tokens
+        self.delay = 0.0
+        self.granted = False
+        self._event = threading.Event()
+
+    def wake(self) -> None:
+        self._event.set()
+
+    def wait(self) -> None:
+        self._event.wait()
+
+
+class _AsyncWaiter:
+    """在队列中等待并发名额的asyncio任务"""
+
+    def __init__(self, tokens: float):
+        self.tokens = tokens
+        self.delay = 0.0
+        self.granted = False
+        self._loop = asyncio.get_running_loop()
+        self._future = self._loop.create_future()
+
+    def wake(self) -> None:
+        # 可能由其他线程中的release()调用
+        self._loop.call_soon_threadsafe(self._set_result)
+
+    def _set_result(self) -> None:
+        if not self._future.done():
+            self._future.set_result(None)
+
+    async def wait(self) -> None:
+        await self._future
+
+
+class RateLimiter:
+    """
+    令牌桶限流器与并发控制器。
+
+    每个请求先在FIFO队列中等待并发名额，获得名额时按顺序从令牌桶预留请求数和token数，
+    再等待令牌补足后执行。请求结束后必须调用release()归还名额，
+    推荐使用limit()/alimit()上下文管理器。
+    """
+
+    def __init__(self, requests_per_second: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_in_flight: Optional[int] = None,
+                 burst: Optional[float] = None):
+        """
+        初始化限流器。
+
+        Args:
+            requests_per_second (float, optional): 每秒最多发出的请求数，None表示不限制
+            tokens_per_minute (float, optional): 每分钟最多消耗的token数，None表示不限制
+            max_in_flight (int, optional): 同时进行中的最大请求数，None表示不限制
+            burst (float, optional): 请求数令牌桶的容量，默认为max(1, requests_per_second)
+
+        Raises:
+            ValueError: 如果max_in_flight小于1
+        """
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self.max_in_flight = max_in_flight
+
+        self._request_bucket = (
+            TokenBucket(requests_per_second, burst or max(1.0, requests_per_second))
+            if requests_per_second else None
+        )
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+            if tokens_per_minute else None
+        )
+
+        self._lock = threading.Lock()
+        self._queue: Deque[Union[_SyncWaiter, _AsyncWaiter]] = deque()
+        self._in_flight = 0
+        self._waiting = 0
+        self._max_waiting = 0
+        self._admitted = 0
+        self._total_wait = 0.0
+
+    def acquire(self, tokens: float = 0) -> None:
+        """
+        阻塞当前线程直到请求可以执行。
+
+        Args:
+            tokens (float): 本次请求预计消耗的token数
+        """
+        start = time.monotonic()
+        with self._lock:
+            self._enter_locked()
+            delay = self._try_admit_locked(tokens)
+            if delay is None:
+                waiter = _SyncWaiter(tokens)
+                self._queue.append(waiter)
+        if delay is None:
+            waiter.wait()
+            delay = waiter.delay
+        if delay > 0:
+            time.sleep(delay)
+        self._leave(start)
+
+    async def aacquire(self, tokens: float = 0) -> None:
+        """
+        异步等待直到请求可以执行，与同步调用者共享同一个FIFO队列。
+
+        Args:
+            tokens (float): 本次请求预计消耗的token数
+        """
+        start = time.monotonic()
+        with self._lock:
+            self._enter_locked()
+            delay = self._try_admit_locked(tokens)
+            if delay is None:
+                waiter = _AsyncWaiter(tokens)
+                self._queue.append(waiter)
+        try:
+            if delay is None:
+                await waiter.wait()
+                delay = waiter.delay
+            if delay > 0:
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            with self._lock:
+                if delay is None and not waiter.granted:
+                    self._queue.remove(waiter)
+                else:
+                    # 已经获得名额，取消时需要归还
+                    self._release_locked()
+                self._waiting -= 1
+            raise
+        self._leave(start)
+
+    def release(self) -> None:
+        """归还并发名额，唤醒队首的等待者。"""
+        with self._lock:
+            self._release_locked()
+
+    @contextmanager
+    def limit(self, tokens: float = 0) -> Iterator[None]:
+        """在限流保护下执行一段同步代码。"""
+        self.acquire(tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def alimit(self, tokens: float = 0) -> AsyncIterator[None]:
+        """在限流保护下执行一段异步代码。"""
+        await self.aacquire(tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> RateLimiterStats:
+        """返回当前的限流指标快照。"""
+        with self._lock:
+            return RateLimiterStats(
+                queue_depth=self._waiting,
+                max_queue_depth=self._max_waiting,
+                in_flight=self._in_flight,
+                admitted=self._admitted,
+                total_wait_time=self._total_wait
+            )
+
+    def _enter_locked(self) -> None:
+        """记录一个新的等待者"""
+        self._waiting += 1
+        self._max_waiting = max(self._max_waiting, self._waiting)
+
+    def _leave(self, start: float) -> None:
+        """记录等待结束"""
+        with self._lock:
+            self._waiting -= 1
+            self._admitted += 1
+            self._total_wait += time.monotonic() - start
+
+    def _has_slot_locked(self) -> bool:
+        return self.max_in_flight is None or self._in_flight < self.max_in_flight
+
+    def _try_admit_locked(self, tokens: float) -> Optional[float]:
+        """队列为空且有名额时直接放行，返回需要等待令牌的时间；否则返回None"""
+        if self._queue or not self._has_slot_locked():
+            return None
+        return self._admit_locked(tokens)
+
+    def _admit_locked(self, tokens: float) -> float:
+        """占用一个名额并预留令牌，返回需要等待的时间"""
+        self._in_flight += 1
+        now = time.monotonic()
+        delay = 0.0
+        if self._request_bucket is not None:
+            delay = max(delay, self._request_bucket.reserve(1, now))
+        if self._token_bucket is not None and tokens:
+            delay = max(delay, self._token_bucket.reserve(tokens, now))
+        return delay
+
+    def _release_locked(self) -> None:
+        """归还名额，并按FIFO顺序把名额直接交给等待者"""
+        self._in_flight -= 1
+        while self._queue and self._has_slot_locked():
+            waiter = self._queue.popleft()
+            waiter.delay = self._admit_locked(waiter.tokens)
+            waiter.granted = True
+            waiter.wake()
+
+
+class RateLimitedLLMClient(BaseLLMClient):
+    """
+    在限流器保护下调用LLM的客户端包装器。
+
+    多个客户端可以共享同一个RateLimiter，从而对同一服务商的总流量限流。
+    流式调用在整个流结束前一直占用并发名额。
+    """
+
+    def __init__(self, client: BaseLLMClient, limiter: RateLimiter,
+                 token_estimator: Callable[[str], int] = estimate_tokens):
+        """
+        初始化限流客户端。
+
+        Args:
+            client (BaseLLMClient): 被包装的LLM客户端
+            limiter (RateLimiter): 限流器
+            token_estimator (Callable[[str], int]): 根据提示词估计token数的函数
+        """
+        self.client = client
+        self.limiter = limiter
+        self.token_estimator = token_estimator
+        self.model = getattr(client, 'model', type(client).__name__)
+
+    def invoke(self, prompt: str) -> str:
+        """
+        在限流保护下调用LLM。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            str: LLM的文本响应
+        """
+        with self.limiter.limit(self.token_estimator(prompt)):
+            return self.client.invoke(prompt)
+
+    async def ainvoke(self, prompt: str) -> str:
+        """
+        在限流保护下异步调用LLM。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            str: LLM的文本响应
+        """
+        async with self.limiter.alimit(self.token_estimator(prompt)):
+            if has_native_async(self.client, 'ainvoke'):
+                return await self.client.ainvoke(prompt)
+            return await asyncio.to_thread(self.client.invoke, prompt)
+
+    def invoke_stream(self, prompt: str) -> Iterator[str]:
+        """
+        在限流保护下流式调用LLM。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            Iterator[str]: 逐步返回响应片段的生成器
+        """
+        with self.limiter.limit(self.token_estimator(prompt)):
+            if hasattr(self.client, 'invoke_stream'):
+                yield from self.client.invoke_stream(prompt)
+            else:
+                yield self.client.invoke(prompt)
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        在限流保护下异步流式调用LLM。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            AsyncIterator[str]: 逐步返回响应片段的异步生成器
+        """
+        async with self.limiter.alimit(self.token_estimator(prompt)):
+            if has_native_async(self.client, 'astream'):
+                stream = self.client.astream(prompt)
+            elif hasattr(self.client, 'invoke_stream'):
+                stream = iterate_in_thread(lambda: self.client.invoke_stream(prompt))
+            else:
+                stream = iterate_in_thread(lambda: [self.client.invoke(prompt)])
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                if hasattr(stream, 'aclose'):
+                    await stream.aclose()
@@ -0,0 +1,332 @@
+"""
+LLM调用的重试策略。
+
+网络抖动、429限流和服务端5xx错误通常是暂时性的，直接让节点失败会丢弃整个工作流之前
+的所有结果。RetryPolicy描述重试方式（最大次数、指数退避、随机抖动、可重试的异常类型、
+总时间预算），可以通过RetryingLLMClient挂到任意客户端上，也可以直接传给LLMNode。
+
+流式调用只有在尚未产生任何片段时才会重试；已经输出部分内容后失败会抛出
+StreamInterruptedError，避免重复输出。
+"""
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple, Type
+
+from .base_client import BaseLLMClient, has_native_async, iterate_in_thread
+
+logger = logging.getLogger(__name__)
+
+
+class StreamInterruptedError(RuntimeError):
+    """流式响应在输出部分片段后中断，这种错误不会被重试"""
+
+
+def _default_retryable() -> Tuple[Type[BaseException], ...]:
+    """
+    默认可重试的异常：连接错误、超时，以及OpenAI SDK的限流和服务端错误。
+
+    OpenAI SDK的异常只可能在SDK已被导入后出现，因此这里只查看sys.modules，
+    不会为了构造重试策略而导入SDK。
+    """
+    retryable: Tuple[Type[BaseException], ...] = (ConnectionError, TimeoutError)
+    openai = sys.modules.get("openai")
+    if openai is None:
+        return retryable
+    return retryable + (
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    重试策略。
+
+    第n次重试前等待min(max_backoff, initial_backoff * multiplier ** (n - 1))秒，
+    其中jitter比例的部分随机化，避免大量客户端同时重试。设置deadline后，
+    如果下一次等待会超出总时间预算，则不再重试。
+    """
+    max_attempts: int = 3                 # 最多尝试次数（包括第一次调用）
+    initial_backoff: float = 0.5          # 第一次重试前的等待时间（秒）
+    max_backoff: float = 8.0              # 单次等待的上限（秒）
+    multiplier: float = 2.0               # 每次重试等待时间的增长倍数
+    jitter: float = 0.5                   # 等待时间中随机化的比例（0~1）
+    deadline: Optional[float] = None      # 从第一次调用开始的总时间预算（秒）
+    retry_on: Optional[Tuple[Type[BaseException], ...]] = None  # 可重试的异常类型，None表示使用默认值
+
+    def __post_init__(self):
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if not 0 <= self.jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+        if self.deadline is not None and self.deadline <= 0:
+            raise ValueError("deadline must be positive")
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """判断异常是否值得重试"""
+        if isinstance(error, StreamInterruptedError):
+            return False
+        retryable = self.retry_on if self.retry_on is not None else _default_retryable()
+        return isinstance(error, retryable)
+
+    def backoff(self, retry: int) -> float:
+        """
+        计算第retry次重试（从1开始）前的等待时间。
+
+        Args:
+            retry (int): 重试序号
+
+        Returns:
+            float: 等待的秒数
+        """
+        delay = min(self.max_backoff, self.initial_backoff * self.multiplier ** (retry - 1))
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+    def next_delay(self, error: BaseException, attempt: int, started: float) -> Optional[float]:
+        """
+        判断第attempt次尝试失败后是否重试。
+
+        Args:
+            error (BaseException): 本次尝试的异常
+            attempt (int): 已经完成的尝试次数
+            started (float): 第一次尝试开始的time.monotonic()时间
+
+        Returns:
+            Optional[float]: 重试前的等待时间；不重试时返回None
+        """
+        if attempt >= self.max_attempts or not self.is_retryable(error):
+            return None
+        delay = self.backoff(attempt)
+        if self.deadline is not None and time.monotonic() - started + delay > self.deadline:
+            return None
+        return delay
+
+    def call(self, func: Callable[..., Any], *args: Any,
+             on_retry: Optional[Callable[[int, BaseException, float], None]] = None) -> Any:
+        """
+        按策略同步调用函数。
+
+        Args:
+            func (Callable): 被调用的函数
+            *args: 函数参数
+            on_retry (Callable, optional): 每次重试前调用，参数为(重试序号, 异常, 等待时间)
+
+        Returns:
+            Any: 函数的返回值
+
+        Raises:
+            Exception: 不可重试或重试耗尽时抛出最后一次的异常
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func(*args)
+            except Exception as e:
+                delay = self.next_delay(e, attempt, started)
+                if delay is None:
+                    raise
+                if on_retry is not None:
+                    on_retry(attempt, e, delay)
+            time.sleep(delay)
+
+    async def acall(self, func: Callable[..., Awaitable[Any]], *args: Any,
+                    on_retry: Optional[Callable[[int, BaseException, float], None]] = None) -> Any:
+        """
+        按策略异步调用协程函数，参数与call相同。
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await func(*args)
+            except Exception as e:
+                delay = self.next_delay(e, attempt, started)
+                if delay is None:
+                    raise
+                if on_retry is not None:
+                    on_retry(attempt, e, delay)
+            await asyncio.sleep(delay)
+
+
+class RetryStats:
+    """重试统计，线程安全"""
+
+    def __init__(self):
+        self.calls = 0       # 调用次数
+        self.retries = 0     # 重试次数
+        self.failures = 0    # 重试后仍然失败的调用次数
+        self._lock = threading.Lock()
+
+    def record_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def __repr__(self) -> str:
+        return f"RetryStats(calls={self.calls}, retries={self.retries}, failures={self.failures})"
+
+
+def log_retry(label: str, stats: Optional[RetryStats] = None) -> Callable[[int, BaseException, float], None]:
+    """构造on_retry回调：记录WARNING日志并累加重试统计"""
+    def on_retry(attempt: int, error: BaseException, delay: float) -> None:
+        if stats is not None:
+            stats.record_retry()
+        logger.warning("  %s: attempt %s failed (%s), retrying in %.2fs", label, attempt, error, delay)
+    return on_retry
+
+
+class RetryingLLMClient(BaseLLMClient):
+    """
+    按重试策略调用LLM的客户端包装器。
+
+    OpenAI SDK自身默认也会重试，与本包装器同时使用时建议在OpenAIClient/DeepSeekClient
+    中设置max_retries=0，由RetryPolicy统一控制。
+    """
+
+    def __init__(self, client: BaseLLMClient, policy: Optional[RetryPolicy] = None):
+        """
+        初始化重试客户端。
+
+        Args:
+            client (BaseLLMClient): 被包装的LLM客户端
+            policy (RetryPolicy, optional): 重试策略，默认使用RetryPolicy()
+        """
+        self.client = client
+        self.policy = policy or RetryPolicy()
+        self.model = getattr(client, 'model', type(client).__name__)
+        self.stats = RetryStats()
+        self._on_retry = log_retry(f"LLM client {self.model}", self.stats)
+
+    def invoke(self, prompt: str) -> str:
+        """
+        按重试策略调用LLM。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            str: LLM的文本响应
+        """
+        return self._call_with_retry(self.client.invoke, prompt)
+
+    async def ainvoke(self, prompt: str) -> str:
+        """
+        按重试策略异步调用LLM。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            str: LLM的文本响应
+        """
+        if has_native_async(self.client, 'ainvoke'):
+            call = self.client.ainvoke
+        else:
+            async def call(prompt: str) -> str:
+                return await asyncio.to_thread(self.client.invoke, prompt)
+
+        self.stats.record_call()
+        try:
+            return await self.policy.acall(call, prompt, on_retry=self._on_retry)
+        except Exception:
+            self.stats.record_failure()
+            raise
+
+    def invoke_stream(self, prompt: str) -> Iterator[str]:
+        """
+        按重试策略流式调用LLM，只在尚未输出片段时重试。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            Iterator[str]: 逐步返回响应片段的生成器
+        """
+        if not hasattr(self.client, 'invoke_stream'):
+            yield self.invoke(prompt)
+            return
+
+        def open_stream() -> Tuple[Iterator[str], Optional[str]]:
+            # 取出第一个片段，连接阶段的错误在这里被重试
+            stream = iter(self.client.invoke_stream(prompt))
+            return stream, next(stream, None)
+
+        stream, first = self._call_with_retry(open_stream)
+        if first is None:
+            return
+        yield first
+        try:
+            yield from stream
+        except Exception as e:
+            self.stats.record_failure()
+            raise StreamInterruptedError(f"LLM stream interrupted: {e}") from e
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        按重试策略异步流式调用LLM，只在尚未输出片段时重试。
+
+        Args:
+            prompt (str): 发送给LLM的提示词
+
+        Returns:
+            AsyncIterator[str]: 逐步返回响应片段的异步生成器
+        """
+        if not has_native_async(self.client, 'astream'):
+            # 被包装的客户端没有原生异步接口时，在线程池中读取带重试的同步流
+            stream = iterate_in_thread(lambda: self.invoke_stream(prompt))
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.aclose()
+            return
+
+        async def open_stream() -> Tuple[AsyncIterator[str], Optional[str]]:
+            stream = self.client.astream(prompt).__aiter__()
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+
+        self.stats.record_call()
+        try:
+            stream, first = await self.policy.acall(open_stream, on_retry=self._on_retry)
+        except Exception:
+            self.stats.record_failure()
+            raise
+        if first is None:
+            return
+        yield first
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            self.stats.record_failure()
+            raise StreamInterruptedError(f"LLM stream interrupted: {e}") from e
+
+    def _call_with_retry(self, func: Callable[..., Any], *args: Any) -> Any:
+        """执行一次带重试的同步调用并记录统计"""
+        self.stats.record_call()
+        try:
+            return self.policy.call(func, *args, on_retry=self._on_retry)
+        except Exception:
+            self.stats.record_failure()
+            raise
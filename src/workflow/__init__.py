@@ -1,5 +1,12 @@
 # 工作流框架包初始化文件
+from .log import configure_logging, reset_logging, set_log_level, silence
 from .base import BaseNode, WorkflowContext
-from .engine import Workflow
+from .engine import Workflow, AsyncWorkflow, CompiledWorkflow
+from .scheduler import ParallelWorkflow
+from .checkpoint import CheckpointStore, DirectoryCheckpointStore, SQLiteCheckpointStore, WorkflowSuspended
+from .process_pool import configure_process_pool, warm_up_process_pool, shutdown_process_pool
 
-__all__ = ['BaseNode', 'WorkflowContext', 'Workflow']
+__all__ = ['BaseNode', 'WorkflowContext', 'Workflow', 'AsyncWorkflow', 'CompiledWorkflow', 'ParallelWorkflow',
+           'configure_logging', 'reset_logging', 'set_log_level', 'silence',
+           'CheckpointStore', 'DirectoryCheckpointStore', 'SQLiteCheckpointStore', 'WorkflowSuspended',
+           'configure_process_pool', 'warm_up_process_pool', 'shutdown_process_pool']
@@ -1,14 +1,18 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any, TypeAlias
+from typing import List, Optional
 
-# 工作流上下文类型定义 - 使用简单的字典存储变量
-WorkflowContext: TypeAlias = Dict[str, Any]
+# 工作流上下文 - 保持字典接口的写时复制映射，复制开销为O(1)
+from .context import WorkflowContext
 
 class BaseNode(ABC):
     """
     工作流节点的抽象基类。
     所有具体的节点类型都应该继承此类并实现execute方法。
     """
+    # 执行方式："inline"在工作流所在的线程中执行；"process"由引擎交给共享进程池执行，
+    # 适用于不依赖外部连接的CPU密集型节点（见process_pool模块）
+    execution: str = "inline"
     def __init__(self, node_id: str, node_name: str):
         """
         初始化节点。
@@ -33,6 +37,55 @@ class BaseNode(ABC):
         """
         pass
     
+    def get_input_variables(self) -> Optional[List[str]]:
+        """
+        返回节点执行时读取的上下文变量名。
+        
+        调度器据此推断节点之间的数据依赖。返回None表示未声明，
+        此时节点会被视为依赖之前的所有节点、并被之后的所有节点依赖。
+        
+        Returns:
+            Optional[List[str]]: 读取的变量名列表，未声明时为None
+        """
+        return None
+    
+    def get_output_variables(self) -> Optional[List[str]]:
+        """
+        返回节点执行后写入上下文的变量名。
+        
+        Returns:
+            Optional[List[str]]: 写入的变量名列表，未声明时为None
+        """
+        return None
+    
+    def get_next_node_ids(self) -> List[str]:
+        """
+        返回节点可能跳转到的节点ID。
+
+        Workflow.compile()据此在执行前检查所有跳转目标是否存在。默认返回静态配置的next_node_id；
+        根据内容动态选择下一个节点的节点（如条件分支）应返回所有可能的目标。
+
+        Returns:
+            List[str]: 节点ID列表
+        """
+        next_node_id = getattr(self, 'next_node_id', None)
+        return [next_node_id] if next_node_id else []
+
+    async def aexecute(self, context: WorkflowContext) -> WorkflowContext:
+        """
+        异步执行节点的核心逻辑。
+        
+        默认实现是同步execute的适配器：在线程池中运行execute，避免阻塞事件循环。
+        需要等待网络IO的节点应重写此方法，提供原生的异步实现。
+        
+        Args:
+            context (WorkflowContext): 输入的工作流上下文
+            
+        Returns:
+            WorkflowContext: 处理后的工作流上下文
+        """
+        return await asyncio.to_thread(self.execute, context)
+    
     def __str__(self) -> str:
         """返回节点的字符串表示。"""
         return f"{self.__class__.__name__}(id='{self.node_id}', name='{self.node_name}')"
@@ -0,0 +1,348 @@
+"""
+批量运行同一个工作流。
+
+为全班每个学生运行同一个工作流时，逐个调用Workflow.run只能串行执行。BatchRun把多个初始
+上下文交给线程池、进程池或asyncio并发执行，按完成顺序返回结果，单个会话的异常被记录在
+结果中而不会中断其他会话，并统计吞吐量和延迟分位数。
+
+线程和asyncio模式下所有会话共享同一个工作流对象：编译后的执行计划、LLM客户端的连接池
+和缓存都被复用。进程模式下每个工作进程在启动时接收一次工作流，之后复用；工作进程与
+process_pool一样使用forkserver（平台不支持时使用spawn）启动，工作流需要可以被pickle。
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .base import WorkflowContext
+from .process_pool import default_mp_context
+
+logger = logging.getLogger(__name__)
+
+EXECUTORS = ("thread", "process", "async")
+
+
+class RunResult(NamedTuple):
+    """单个会话的运行结果"""
+    index: int                          # 初始上下文在输入中的序号
+    context: Optional[WorkflowContext]  # 最终上下文，失败时为None
+    error: Optional[BaseException]      # 运行中抛出的异常，成功时为None
+    latency: float                      # 运行耗时（秒）
+
+    @property
+    def ok(self) -> bool:
+        """会话是否成功完成"""
+        return self.error is None
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    计算分位数（线性插值）。
+
+    Args:
+        values (List[float]): 数据
+        p (float): 分位，0~100
+
+    Returns:
+        float: 分位数，没有数据时返回0
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class BatchStats:
+    """批量运行的汇总统计"""
+
+    def __init__(self):
+        self.completed = 0                 # 成功的会话数
+        self.failed = 0                    # 失败的会话数
+        self.latencies: List[float] = []   # 每个会话的耗时（秒）
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def record(self, result: RunResult) -> None:
+        if result.ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.latencies.append(result.latency)
+
+    @property
+    def total(self) -> int:
+        """已结束的会话数"""
+        return self.completed + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        """从开始到最后一个会话结束（或当前）的时间（秒）"""
+        if self.started is None:
+            return 0.0
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def throughput(self) -> float:
+        """每秒结束的会话数"""
+        elapsed = self.elapsed
+        return self.total / elapsed if elapsed > 0 else 0.0
+
+    def percentile(self, p: float) -> float:
+        """会话耗时的分位数（秒）"""
+        return percentile(self.latencies, p)
+
+    def summary(self) -> Dict[str, float]:
+        """返回汇总指标"""
+        return {
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": max(self.latencies) if self.latencies else 0.0,
+        }
+
+    def __repr__(self) -> str:
+        summary = self.summary()
+        return (f"BatchStats(total={self.total}, failed={self.failed}, "
+                f"throughput={summary['throughput']:.2f}/s, p50={summary['p50']:.3f}s, "
+                f"p90={summary['p90']:.3f}s, p99={summary['p99']:.3f}s)")
+
+
+def _timed_run(workflow: Any, index: int, context: WorkflowContext) -> RunResult:
+    """运行一个会话并计时，异常记录在结果中"""
+    started = time.perf_counter()
+    try:
+        result = workflow.run(context)
+    except Exception as e:
+        return RunResult(index, None, e, time.perf_counter() - started)
+    return RunResult(index, result, None, time.perf_counter() - started)
+
+
+# 进程池中每个工作进程持有的工作流
+_worker_workflow: Any = None
+
+
+def _init_worker(workflow: Any) -> None:
+    global _worker_workflow
+    _worker_workflow = workflow
+
+
+def _process_run(index: int, context: WorkflowContext) -> RunResult:
+    """在工作进程中运行，结果上下文转换为普通dict以便传回主进程"""
+    result = _timed_run(_worker_workflow, index, context)
+    if result.context is not None:
+        result = result._replace(context=dict(result.context))
+    return result
+
+
+class BatchRun:
+    """
+    一次批量运行。
+
+    迭代时驱动执行，并按完成顺序返回RunResult；stats在迭代过程中持续更新。
+    """
+
+    def __init__(self, workflow: Any, contexts: Iterable[WorkflowContext],
+                 concurrency: int = 8, executor: str = "thread"):
+        """
+        准备批量运行。
+
+        Args:
+            workflow (Workflow): 要运行的工作流
+            contexts (Iterable[WorkflowContext]): 每个会话的初始上下文
+            concurrency (int): 同时运行的会话数
+            executor (str): "thread"（线程池）、"process"（进程池）或"async"（asyncio，
+                使用工作流的arun，没有arun时在线程池中运行run）
+
+        Raises:
+            ValueError: 如果concurrency小于1或executor不合法
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor must be one of {EXECUTORS}, got '{executor}'")
+        self.workflow = workflow
+        self.contexts = contexts
+        self.concurrency = concurrency
+        self.executor = executor
+        self.stats = BatchStats()
+        self._started = False
+
+    def __iter__(self) -> Iterator[RunResult]:
+        if self._started:
+            raise RuntimeError("BatchRun can only be iterated once")
+        self._started = True
+
+        # 在分发之前编译，所有会话（以及fork出的工作进程）共享同一个执行计划
+        if hasattr(self.workflow, 'compile'):
+            self.workflow.plan
+
+        logger.info("=== Starting batch run (executor=%s, concurrency=%s) ===", self.executor, self.concurrency)
+        self.stats.started = time.perf_counter()
+        if self.executor == "async":
+            results = self._iter_async()
+        else:
+            results = self._iter_pool()
+        try:
+            for result in results:
+                self.stats.record(result)
+                if not result.ok:
+                    logger.warning("  Session %s failed: %s", result.index, result.error)
+                yield result
+        finally:
+            # 提前停止时立即关闭内层迭代器，让它取消尚未开始的会话
+            results.close()
+            self.stats.finished = time.perf_counter()
+            logger.info("=== Batch run finished: %s ===", self.stats)
+
+    def results(self) -> List[RunResult]:
+        """运行全部会话，返回按输入顺序排列的结果"""
+        return sorted(self, key=lambda result: result.index)
+
+    def _make_pool(self) -> Executor:
+        if self.executor == "process":
+            # 与process_pool相同，不在已有HTTP连接池和批处理线程的进程中fork
+            return ProcessPoolExecutor(max_workers=self.concurrency, mp_context=default_mp_context(),
+                                       initializer=_init_worker, initargs=(self.workflow,))
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="run_many")
+
+    def _iter_pool(self) -> Iterator[RunResult]:
+        """线程池/进程池：最多同时提交concurrency个会话，完成一个补充一个"""
+        contexts = enumerate(self.contexts)
+        with self._make_pool() as pool:
+            def submit_next() -> bool:
+                item = next(contexts, None)
+                if item is None:
+                    return False
+                index, context = item
+                if self.executor == "process":
+                    pending.add(pool.submit(_process_run, index, context))
+                else:
+                    pending.add(pool.submit(_timed_run, self.workflow, index, context))
+                return True
+
+            pending = set()
+            try:
+                while len(pending) < self.concurrency and submit_next():
+                    pass
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        submit_next()
+                        yield future.result()
+            finally:
+                # 调用方提前停止迭代时，取消已提交但尚未开始的会话，只等待正在运行的会话
+                for future in pending:
+                    future.cancel()
+
+    def _iter_async(self) -> Iterator[RunResult]:
+        """在后台线程的事件循环中运行arun_many，通过有界队列把结果交给调用方"""
+        results: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=self.concurrency)
+        started = threading.Event()
+        producer: Dict[str, Any] = {}
+
+        async def produce() -> None:
+            producer["loop"] = asyncio.get_running_loop()
+            producer["task"] = asyncio.current_task()
+            started.set()
+            try:
+                async for result in arun_many(self.workflow, self.contexts, self.concurrency):
+                    # 在线程中等待队列空位，调用方读取较慢时不阻塞事件循环中正在运行的会话
+                    await asyncio.to_thread(results.put, ("result", result))
+            except asyncio.CancelledError:
+                # 调用方提前停止迭代
+                pass
+            except BaseException as e:
+                results.put(("error", e))
+            finally:
+                results.put(("done", None))
+
+        thread = threading.Thread(target=asyncio.run, args=(produce(),), name="run_many_async", daemon=True)
+        thread.start()
+        finished = False
+        try:
+            while True:
+                kind, value = results.get()
+                if kind == "done":
+                    finished = True
+                    break
+                if kind == "error":
+                    results.get()  # 随后的done
+                    finished = True
+                    raise value
+                yield value
+        finally:
+            if not finished:
+                # 提前停止：直接取消生产者任务（arun_many随之取消其余会话），
+                # 再丢弃已经产生的结果，直到生产者结束
+                started.wait()
+                try:
+                    producer["loop"].call_soon_threadsafe(producer["task"].cancel)
+                except RuntimeError:
+                    # 生产者已经结束，事件循环已关闭
+                    pass
+                while results.get()[0] != "done":
+                    pass
+            thread.join()
+
+
+async def arun_many(workflow: Any, contexts: Iterable[WorkflowContext],
+                    concurrency: int = 8) -> AsyncIterator[RunResult]:
+    """
+    在当前事件循环中并发运行多个会话，按完成顺序返回结果。
+
+    Args:
+        workflow (Workflow): 要运行的工作流，提供arun时使用arun，否则在线程池中运行run
+        contexts (Iterable[WorkflowContext]): 每个会话的初始上下文
+        concurrency (int): 同时运行的会话数
+
+    Returns:
+        AsyncIterator[RunResult]: 按完成顺序返回的结果
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    use_arun = hasattr(workflow, 'arun')
+
+    async def run_one(index: int, context: WorkflowContext) -> RunResult:
+        started = time.perf_counter()
+        try:
+            if use_arun:
+                result = await workflow.arun(context)
+            else:
+                result = await asyncio.to_thread(workflow.run, context)
+        except Exception as e:
+            return RunResult(index, None, e, time.perf_counter() - started)
+        return RunResult(index, result, None, time.perf_counter() - started)
+
+    contexts_iter = enumerate(contexts)
+    pending = set()
+
+    def submit_next() -> bool:
+        item = next(contexts_iter, None)
+        if item is None:
+            return False
+        pending.add(asyncio.ensure_future(run_one(*item)))
+        return True
+
+    try:
+        while len(pending) < concurrency and submit_next():
+            pass
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                submit_next()
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
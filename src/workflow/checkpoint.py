@@ -0,0 +1,547 @@
+"""
+工作流检查点与恢复。
+
+长工作流（费曼学习、迭代改写等）在最后一个LLM节点失败时，重新运行会再次支付之前所有的
+LLM调用。为工作流设置检查点存储后，引擎在每个节点完成后追加一条记录：
+
+- 记录只包含该节点对上下文的增量（新增或改变的变量、被删除的变量）和下一个节点ID，
+  只有运行开始时保存一次完整的初始上下文；
+- 节点内部再次运行的工作流（IterativeWorkflowNode的每一轮迭代、SubWorkflowNode）
+  作为子帧记录，子帧的路径由父帧的步数、节点ID和该节点内的第几次运行组成，
+  因此恢复时迭代节点会直接重放已经完成的迭代，从中断的那一轮的最后一个完成节点继续；
+- Workflow.resume(run_id)读取记录，重建上下文并从最后一个完成的节点之后继续执行。
+- 设置了suspend的InputNode不阻塞等待输入，而是记录暂停位置并抛出WorkflowSuspended；
+  Workflow.submit_input(run_id, value)追加输入记录后恢复运行，等待期间不占用线程，
+  会话的全部状态就是存储中的记录。
+
+提供两种存储：每个运行一个JSON Lines文件的DirectoryCheckpointStore，以及
+SQLiteCheckpointStore。变量值按JSON保存，默认遇到无法JSON序列化的值时报错；
+存储设置allow_pickle=True后改用pickle编码这些值。读取pickle编码的值会执行其中的代码，
+只应对可信的检查点存储开启。
+"""
+import base64
+import contextvars
+import json
+import logging
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .base import WorkflowContext
+
+logger = logging.getLogger(__name__)
+
+# 运行ID只允许安全的文件名字符
+_RUN_ID_PATTERN = re.compile(r"^[\w.-]+$")
+# 运行开始记录所在的帧（顶层工作流）
+_ROOT_FRAME = ""
+# 无法JSON序列化的值的编码标记
+_PICKLE_KEY = "__pickle__"
+# 与编码标记冲突的普通字典的转义标记：{_ESCAPE_KEY: [原来的键, 值]}
+_ESCAPE_KEY = "__escaped__"
+_TAGS = (_PICKLE_KEY, _ESCAPE_KEY)
+
+
+def _to_json(value: Any, allow_pickle: bool) -> Any:
+    """把值转换为可以JSON序列化的结构，转义与编码标记冲突的字典"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item, allow_pickle) for item in value]
+    if isinstance(value, Mapping) and all(isinstance(key, str) for key in value):
+        if len(value) == 1:
+            key = next(iter(value))
+            if key in _TAGS:
+                return {_ESCAPE_KEY: [key, _to_json(value[key], allow_pickle)]}
+        return {key: _to_json(item, allow_pickle) for key, item in value.items()}
+    if not allow_pickle:
+        raise TypeError(f"Checkpoint value of type {type(value).__name__} is not JSON serializable; "
+                        f"create the checkpoint store with allow_pickle=True to pickle it")
+    return {_PICKLE_KEY: base64.b64encode(pickle.dumps(value)).decode("ascii")}
+
+
+def _make_object_hook(allow_pickle: bool):
+    def decode_object(obj: Dict[str, Any]) -> Any:
+        if len(obj) == 1:
+            key, value = next(iter(obj.items()))
+            if key == _ESCAPE_KEY:
+                # 转义的普通字典：内部的值已经解码，恢复原来的键
+                return {value[0]: value[1]}
+            if key == _PICKLE_KEY:
+                if not allow_pickle:
+                    raise ValueError("Checkpoint record contains a pickled value; "
+                                     "create the checkpoint store with allow_pickle=True to load it")
+                return pickle.loads(base64.b64decode(value))
+        return obj
+    return decode_object
+
+
+def encode_record(record: Dict[str, Any], allow_pickle: bool = False) -> str:
+    """
+    把检查点记录编码为一行文本。
+
+    Args:
+        record (Dict[str, Any]): 检查点记录
+        allow_pickle (bool): 是否用pickle编码无法JSON序列化的值
+
+    Raises:
+        TypeError: 如果记录包含无法JSON序列化的值且allow_pickle为False
+    """
+    return json.dumps(_to_json(record, allow_pickle), ensure_ascii=False)
+
+
+def decode_record(line: str, allow_pickle: bool = False) -> Dict[str, Any]:
+    """
+    解码encode_record生成的文本。
+
+    Args:
+        line (str): 编码后的记录
+        allow_pickle (bool): 是否解码pickle编码的值，只应对可信的数据开启
+
+    Raises:
+        ValueError: 如果文本不是合法的JSON，或包含pickle编码的值且allow_pickle为False
+    """
+    return json.loads(line, object_hook=_make_object_hook(allow_pickle))
+
+
+def _check_run_id(run_id: str) -> str:
+    if not isinstance(run_id, str) or not _RUN_ID_PATTERN.match(run_id):
+        raise ValueError(f"Invalid run ID '{run_id}': only letters, digits, '_', '-' and '.' are allowed")
+    return run_id
+
+
+class WorkflowSuspended(Exception):
+    """
+    工作流在等待用户输入的节点处暂停。
+
+    异常本身就是等待句柄：保存run_id后，用Workflow.submit_input(run_id, value)提交输入并继续。
+    """
+
+    def __init__(self, run_id: str, node_id: str, prompt_text: str, output_variable_name: str,
+                 invalid_input: Any = None):
+        """
+        Args:
+            run_id (str): 暂停的运行ID
+            node_id (str): 等待输入的节点ID
+            prompt_text (str): 显示给用户的提示文本
+            output_variable_name (str): 输入将写入的变量名
+            invalid_input (Any, optional): 上一次提交但未通过验证的输入
+        """
+        message = f"Workflow run '{run_id}' is waiting for input at node '{node_id}'"
+        if invalid_input is not None:
+            message += f" (rejected input: {invalid_input!r})"
+        super().__init__(message)
+        self.run_id = run_id
+        self.node_id = node_id
+        self.prompt_text = prompt_text
+        self.output_variable_name = output_variable_name
+        self.invalid_input = invalid_input
+
+
+class CheckpointStore(ABC):
+    """
+    检查点存储的抽象基类。
+
+    每个运行的记录按追加顺序保存，子类只需实现追加、读取、删除和列出运行。
+    """
+
+    @abstractmethod
+    def append(self, run_id: str, record: Dict[str, Any]) -> None:
+        """
+        追加一条记录。
+
+        Args:
+            run_id (str): 运行ID
+            record (Dict[str, Any]): 检查点记录
+        """
+        pass
+
+    @abstractmethod
+    def load(self, run_id: str) -> List[Dict[str, Any]]:
+        """
+        按追加顺序读取一个运行的全部记录。
+
+        Args:
+            run_id (str): 运行ID
+
+        Returns:
+            List[Dict[str, Any]]: 记录列表，运行不存在时为空列表
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, run_id: str) -> None:
+        """删除一个运行的全部记录"""
+        pass
+
+    @abstractmethod
+    def list_runs(self) -> List[str]:
+        """列出所有保存了记录的运行ID"""
+        pass
+
+
+class DirectoryCheckpointStore(CheckpointStore):
+    """
+    本地目录存储：每个运行一个<run_id>.jsonl文件，每条记录追加一行。
+
+    进程在写入过程中崩溃时，最后一行可能不完整，读取时会被忽略。
+    """
+
+    def __init__(self, directory: str, fsync: bool = False, allow_pickle: bool = False):
+        """
+        初始化目录存储。
+
+        Args:
+            directory (str): 保存检查点文件的目录，不存在时自动创建
+            fsync (bool): 每次追加后是否调用fsync，保证记录在系统崩溃后仍然存在
+            allow_pickle (bool): 是否用pickle保存无法JSON序列化的值。读取时会执行pickle数据中的代码，
+                                 只应在目录内容可信时开启
+        """
+        self.directory = directory
+        self.fsync = fsync
+        self.allow_pickle = allow_pickle
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.directory, _check_run_id(run_id) + ".jsonl")
+
+    def append(self, run_id: str, record: Dict[str, Any]) -> None:
+        line = encode_record(record, self.allow_pickle) + "\n"
+        with self._lock:
+            with open(self._path(run_id), "a", encoding="utf-8") as f:
+                f.write(line)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def load(self, run_id: str) -> List[Dict[str, Any]]:
+        path = self._path(run_id)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        records = []
+        for number, line in enumerate(lines):
+            try:
+                records.append(decode_record(line, self.allow_pickle))
+            except json.JSONDecodeError:
+                if number == len(lines) - 1:
+                    logger.warning("Ignoring truncated checkpoint record at end of %s", path)
+                    break
+                raise
+        return records
+
+    def delete(self, run_id: str) -> None:
+        with self._lock:
+            try:
+                os.remove(self._path(run_id))
+            except FileNotFoundError:
+                pass
+
+    def list_runs(self) -> List[str]:
+        return sorted(name[:-len(".jsonl")] for name in os.listdir(self.directory) if name.endswith(".jsonl"))
+
+    def __str__(self) -> str:
+        return f"DirectoryCheckpointStore({self.directory})"
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """SQLite存储：所有运行的记录保存在同一个数据库的checkpoints表中，每次追加单独提交"""
+
+    def __init__(self, path: str = ":memory:", allow_pickle: bool = False):
+        """
+        初始化SQLite存储。
+
+        Args:
+            path (str): 数据库文件路径，默认使用内存数据库（仅在当前进程内有效）
+            allow_pickle (bool): 是否用pickle保存无法JSON序列化的值。读取时会执行pickle数据中的代码，
+                                 只应在数据库内容可信时开启
+        """
+        self.path = path
+        self.allow_pickle = allow_pickle
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            if path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "run_id TEXT NOT NULL, seq INTEGER NOT NULL, record TEXT NOT NULL, "
+                "PRIMARY KEY (run_id, seq))"
+            )
+
+    def append(self, run_id: str, record: Dict[str, Any]) -> None:
+        line = encode_record(record, self.allow_pickle)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO checkpoints (run_id, seq, record) VALUES "
+                "(?, (SELECT COUNT(*) FROM checkpoints WHERE run_id = ?), ?)",
+                (_check_run_id(run_id), run_id, line),
+            )
+
+    def load(self, run_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT record FROM checkpoints WHERE run_id = ? ORDER BY seq", (run_id,)
+            ).fetchall()
+        return [decode_record(row[0], self.allow_pickle) for row in rows]
+
+    def delete(self, run_id: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+
+    def list_runs(self) -> List[str]:
+        with self._lock:
+            rows = self._connection.execute("SELECT DISTINCT run_id FROM checkpoints ORDER BY run_id").fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._connection.close()
+
+    def __str__(self) -> str:
+        return f"SQLiteCheckpointStore({self.path})"
+
+
+def compute_delta(before: WorkflowContext, after: WorkflowContext) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    计算节点对上下文的修改。
+
+    变量对象不同且（类型不同或值不相等）时视为改变；节点原地修改的可变对象不会被检测到。
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: (新增或改变的变量, 被删除的变量名)
+    """
+    changed = {}
+    for name, value in after.items():
+        if name in before:
+            old = before[name]
+            if old is value or (type(old) is type(value) and old == value):
+                continue
+        changed[name] = value
+    removed = [name for name in before if name not in after]
+    return changed, removed
+
+
+def apply_delta(context: WorkflowContext, changed: Dict[str, Any], removed: List[str]) -> None:
+    """把compute_delta的结果应用到上下文（原地修改）"""
+    for name in removed:
+        context.pop(name, None)
+    context.update(changed)
+
+
+class _Run:
+    """一次带检查点的运行：持有存储、运行ID，以及恢复时按帧分组的已有记录"""
+
+    def __init__(self, store: CheckpointStore, run_id: str, records: Optional[List[Dict[str, Any]]] = None):
+        self.store = store
+        self.run_id = run_id
+        self.replay: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records or ():
+            self.replay.setdefault(record["frame"], []).append(record)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self.store.append(self.run_id, record)
+
+
+class FrameRecorder:
+    """
+    记录一次工作流运行（一个帧）的检查点。
+
+    引擎在运行开始时调用restore恢复已经完成的部分，在每个节点完成后调用record，
+    运行结束时调用finish；执行节点期间通过executing把自己设置为当前帧，
+    节点内部启动的工作流由此成为子帧。
+    """
+
+    def __init__(self, run: _Run, path: str):
+        self.run = run
+        self.path = path
+        self.steps = 0                          # 本帧已完成的节点数
+        self._children = 0                      # 当前节点内已启动的子帧数
+        self._node_id: Optional[str] = None
+        self._pending_input: Optional[Tuple[str, Any]] = None  # 恢复时提交给等待节点的(节点ID, 输入)
+
+    @property
+    def run_id(self) -> str:
+        return self.run.run_id
+
+    def restore(self, context: WorkflowContext) -> Tuple[WorkflowContext, Optional[str], bool]:
+        """
+        重放本帧已有的记录。
+
+        Args:
+            context (WorkflowContext): 本帧的初始上下文
+
+        Returns:
+            Tuple[WorkflowContext, Optional[str], bool]: (重建的上下文, 下一个节点ID, 本帧是否已经结束)。
+            没有记录时下一个节点ID为None、未结束，从第一个节点开始执行。
+        """
+        records = self.run.replay.pop(self.path, [])
+        next_node_id = None
+        finished = False
+        for record in records:
+            event = record.get("event")
+            if event == "finish":
+                finished = True
+            elif event == "input":
+                self._pending_input = (record["node"], record["value"])
+            elif event is None:
+                apply_delta(context, record["set"], record["del"])
+                next_node_id = record["next"]
+                self._pending_input = None
+                self.steps += 1
+        if self.steps and next_node_id is None:
+            # 最后一个节点已经完成，但结束记录没有写入
+            finished = True
+        if records:
+            logger.info("  Restored %s completed node(s) from checkpoint %s%s",
+                        self.steps, self.run_id, f" [{self.path}]" if self.path else "")
+        return context, next_node_id, finished
+
+    @contextmanager
+    def executing(self, node_id: str) -> Iterator[None]:
+        """执行节点期间把本帧设置为当前帧"""
+        self._node_id = node_id
+        self._children = 0
+        token = _current_frame.set(self)
+        try:
+            yield
+        finally:
+            _current_frame.reset(token)
+
+    def child(self) -> "FrameRecorder":
+        """为当前节点内启动的工作流创建子帧"""
+        count = self._children
+        self._children += 1
+        return FrameRecorder(self.run, f"{self.path}/{self.steps}:{self._node_id}#{count}")
+
+    def record(self, node_id: str, before: WorkflowContext, after: WorkflowContext,
+               next_node_id: Optional[str]) -> None:
+        """
+        记录一个完成的节点。
+
+        Args:
+            node_id (str): 完成的节点ID
+            before (WorkflowContext): 节点执行前的上下文
+            after (WorkflowContext): 节点执行后（已移除控制变量）的上下文
+            next_node_id (str, optional): 下一个要执行的节点ID，工作流结束时为None
+        """
+        changed, removed = compute_delta(before, after)
+        self.run.append({"frame": self.path, "node": node_id, "set": changed, "del": removed,
+                         "next": next_node_id})
+        self.steps += 1
+
+    def finish(self) -> None:
+        """记录本帧正常结束"""
+        self.run.append({"frame": self.path, "event": "finish"})
+
+    def suspend(self, node_id: str, prompt_text: str, output_variable_name: str) -> None:
+        """记录本帧在节点处暂停等待输入"""
+        self.run.append({"frame": self.path, "event": "suspend", "node": node_id,
+                         "prompt": prompt_text, "variable": output_variable_name})
+
+    def take_input(self, node_id: str) -> Tuple[bool, Any]:
+        """取出恢复时提交给该节点的输入，返回(是否有输入, 输入)"""
+        if self._pending_input is None or self._pending_input[0] != node_id:
+            return False, None
+        _, value = self._pending_input
+        self._pending_input = None
+        return True, value
+
+
+# 正在执行节点的帧；节点内部启动的工作流据此成为子帧
+_current_frame: "contextvars.ContextVar[Optional[FrameRecorder]]" = contextvars.ContextVar(
+    "workflow_checkpoint_frame", default=None
+)
+
+
+def current_run_id() -> Optional[str]:
+    """返回当前正在执行的带检查点运行的ID，不在这样的运行中时返回None"""
+    frame = _current_frame.get()
+    return frame.run_id if frame is not None else None
+
+
+def current_frame() -> Optional[FrameRecorder]:
+    """返回正在执行节点的帧，不在带检查点的运行中时返回None"""
+    return _current_frame.get()
+
+
+def new_run_id() -> str:
+    """生成新的运行ID"""
+    return uuid.uuid4().hex
+
+
+def open_frame(store: Optional[CheckpointStore], initial_context: WorkflowContext,
+               run_id: Optional[str] = None) -> Optional[FrameRecorder]:
+    """
+    为一次工作流运行创建帧记录器。
+
+    在带检查点的运行中执行的节点里启动的工作流成为当前帧的子帧；否则设置了存储时
+    开始一个新的运行，并保存一次完整的初始上下文。
+
+    Args:
+        store (CheckpointStore, optional): 工作流的检查点存储
+        initial_context (WorkflowContext): 初始上下文
+        run_id (str, optional): 新运行的ID，默认自动生成
+
+    Returns:
+        Optional[FrameRecorder]: 帧记录器；不需要记录时为None
+
+    Raises:
+        ValueError: 如果run_id不合法或已经存在
+    """
+    parent = _current_frame.get()
+    if parent is not None:
+        return parent.child()
+    if store is None:
+        return None
+    run_id = _check_run_id(run_id) if run_id is not None else new_run_id()
+    if store.load(run_id):
+        raise ValueError(f"Checkpoint run '{run_id}' already exists, use resume() to continue it")
+    run = _Run(store, run_id)
+    run.append({"frame": _ROOT_FRAME, "event": "start", "context": dict(initial_context)})
+    logger.info("  Checkpointing run %s to %s", run_id, store)
+    return FrameRecorder(run, _ROOT_FRAME)
+
+
+def resume_frame(store: CheckpointStore, run_id: str) -> Tuple[FrameRecorder, WorkflowContext]:
+    """
+    读取一个运行的记录，返回顶层帧记录器和初始上下文。
+
+    Raises:
+        ValueError: 如果运行不存在
+    """
+    records = store.load(_check_run_id(run_id))
+    if not records or records[0].get("event") != "start":
+        raise ValueError(f"No checkpoint found for run '{run_id}' in {store}")
+    run = _Run(store, run_id, records[1:])
+    return FrameRecorder(run, _ROOT_FRAME), WorkflowContext(records[0]["context"])
+
+
+def submit_input(store: CheckpointStore, run_id: str, value: Any) -> None:
+    """
+    为暂停的运行追加输入记录，之后恢复运行时等待的节点会收到该输入。
+
+    Raises:
+        ValueError: 如果运行不存在或没有在等待输入
+    """
+    records = store.load(_check_run_id(run_id))
+    waiting = None
+    for record in records:
+        event = record.get("event")
+        if event == "suspend":
+            waiting = record
+        elif event != "input":
+            waiting = None
+    if waiting is None:
+        raise ValueError(f"Run '{run_id}' is not waiting for input")
+    store.append(run_id, {"frame": waiting["frame"], "event": "input", "node": waiting["node"], "value": value})
@@ -0,0 +1,136 @@
+"""
+工作流上下文实现。
+
+上下文保持字典接口，但内部采用分层写时复制结构：copy()只冻结当前写入层并共享
+所有已冻结的层，因此复制是O(1)的；写入和删除只影响当前层，开销与修改的键数量成正比。
+"""
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# 删除标记：键在下层存在但已在上层被删除
+_DELETED = object()
+# 查找时表示键不存在
+_MISSING = object()
+# 冻结层数超过该值时合并为一层，保证查找开销有上界
+_MAX_LAYERS = 16
+
+
+class WorkflowContext(MutableMapping):
+    """
+    工作流上下文，在节点之间传递变量。
+
+    提供与Dict[str, Any]相同的读写接口。节点中常见的
+    `updated_context = context.copy()`不再复制所有键：新旧上下文共享已冻结的层，
+    各自只在自己的写入层记录修改。遍历、len()等需要完整视图的操作会顺便把
+    所有层合并为一层，后续访问恢复为普通字典的开销。
+    """
+    __slots__ = ("_local", "_layers")
+
+    def __init__(self, data: Optional[Mapping] = None, **kwargs: Any):
+        """
+        初始化上下文。
+
+        Args:
+            data (Mapping, optional): 初始变量。传入WorkflowContext时与其共享已冻结的层。
+            **kwargs: 额外的初始变量。
+        """
+        self._layers: Tuple[Dict[str, Any], ...] = ()
+        self._local: Dict[str, Any] = {}
+
+        if isinstance(data, WorkflowContext):
+            snapshot = data.copy()
+            self._layers = snapshot._layers
+        elif data is not None:
+            self._local = dict(data)
+
+        if kwargs:
+            self._local.update(kwargs)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._local.get(key, _MISSING)
+        if value is _MISSING:
+            for layer in self._layers:
+                value = layer.get(key, _MISSING)
+                if value is not _MISSING:
+                    break
+        if value is _MISSING or value is _DELETED:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._local[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        if self._layers:
+            # 冻结层不可修改，只能在当前层记录删除
+            self._local[key] = _DELETED
+        else:
+            del self._local[key]
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._flatten())
+
+    def __len__(self) -> int:
+        return len(self._flatten())
+
+    def __repr__(self) -> str:
+        # 与普通字典的显示保持一致，便于阅读日志
+        return repr(self._flatten())
+
+    def __reduce__(self):
+        # 序列化时只保存合并后的变量，不保存层结构
+        return (self.__class__, (self.to_dict(),))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取变量值，不存在时返回默认值。"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self) -> "WorkflowContext":
+        """
+        返回上下文的副本，时间复杂度为O(1)（每_MAX_LAYERS次复制摊还一次合并）。
+
+        Returns:
+            WorkflowContext: 与当前上下文共享冻结层的新上下文
+        """
+        if self._local:
+            # 冻结当前写入层，之后双方都在新的空层上写入
+            self._layers = (self._local,) + self._layers
+            self._local = {}
+            if len(self._layers) > _MAX_LAYERS:
+                self._layers = (self._merge_layers(),)
+
+        clone = WorkflowContext.__new__(WorkflowContext)
+        clone._layers = self._layers
+        clone._local = {}
+        return clone
+
+    def to_dict(self) -> Dict[str, Any]:
+        """返回包含所有变量的普通字典（新对象）。"""
+        return dict(self._flatten())
+
+    def _merge_layers(self) -> Dict[str, Any]:
+        """将所有层（包括当前写入层）合并为一个不含删除标记的新字典。"""
+        merged: Dict[str, Any] = {}
+        for layer in reversed(self._layers):
+            merged.update(layer)
+        merged.update(self._local)
+        return {key: value for key, value in merged.items() if value is not _DELETED}
+
+    def _flatten(self) -> Dict[str, Any]:
+        """把所有层合并进当前写入层，返回当前上下文的完整字典视图。"""
+        if self._layers:
+            self._local = self._merge_layers()
+            self._layers = ()
+        return self._local
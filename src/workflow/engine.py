@@ -1,19 +1,135 @@
-from typing import List, Dict, Optional, Callable
+import logging
+import inspect
+from typing import Any, AsyncIterator, Iterable, List, Dict, Optional, Callable, Tuple, Union, Awaitable
 from .base import BaseNode, WorkflowContext
+from .batch_runner import BatchRun, RunResult, arun_many
+from .checkpoint import (CheckpointStore, FrameRecorder, WorkflowSuspended, open_frame, resume_frame,
+                         submit_input)
+from .process_pool import EXECUTION_MODES, aexecute_node, execute_node
 # from .nodes.start_node import StartNode  # 用于类型检查
 
+logger = logging.getLogger(__name__)
+
+
+class CompiledWorkflow:
+    """
+    编译后的工作流执行计划。
+
+    编译时检查所有静态跳转目标（节点的next_node_id、条件分支各分类的next_node_id）是否存在，
+    并把节点排成数组、把跳转关系预先解析成整数下标。执行时只有节点在上下文中写入的
+    next_node_id和选择器的返回值需要按ID查找，静态跳转和顺序执行都直接使用下标。
+    """
+    __slots__ = ("nodes", "index", "selectors", "static_next", "sequential_next")
+
+    def __init__(self, nodes: List[BaseNode]):
+        """
+        编译工作流。
+
+        Args:
+            nodes (List[BaseNode]): 按顺序列出的节点列表
+
+        Raises:
+            ValueError: 如果节点ID重复或引用了不存在的节点
+        """
+        self.nodes: Tuple[BaseNode, ...] = tuple(nodes)
+        self.index: Dict[str, int] = {}
+        for position, node in enumerate(self.nodes):
+            if node.node_id in self.index:
+                raise ValueError(f"Duplicate node ID '{node.node_id}' in workflow.")
+            self.index[node.node_id] = position
+
+        errors = []
+        for node in self.nodes:
+            if node.execution not in EXECUTION_MODES:
+                errors.append(f"Node '{node.node_id}' has invalid execution mode '{node.execution}'")
+            for next_node_id in node.get_next_node_ids():
+                if next_node_id not in self.index:
+                    errors.append(f"Node '{node.node_id}' references invalid next node ID: '{next_node_id}'")
+        if errors:
+            raise ValueError("Workflow compilation failed:\n" + "\n".join(errors))
+
+        # 每个节点的选择器、静态跳转目标和顺序执行的下一个节点（None表示没有）
+        self.selectors: Tuple[Optional[Callable[[WorkflowContext], Any]], ...] = tuple(
+            getattr(node, 'next_node_selector', None) or None for node in self.nodes
+        )
+        self.static_next: Tuple[Optional[int], ...] = tuple(
+            self.index[node.next_node_id] if getattr(node, 'next_node_id', None) else None
+            for node in self.nodes
+        )
+        self.sequential_next: Tuple[Optional[int], ...] = tuple(
+            position + 1 if position + 1 < len(self.nodes) else None for position in range(len(self.nodes))
+        )
+
+    def next_index(self, position: int, current_context: WorkflowContext) -> Optional[int]:
+        """
+        确定下一个要执行的节点下标。
+
+        优先级与之前相同：上下文中的next_node_id > 节点的next_node_selector >
+        节点静态的next_node_id > 节点列表中的下一个节点。
+
+        Args:
+            position (int): 刚执行完的节点下标
+            current_context (WorkflowContext): 节点执行后的上下文，会移除其中的next_node_id
+
+        Returns:
+            Optional[int]: 下一个节点的下标；工作流结束时返回None
+
+        Raises:
+            ValueError: 如果上下文或选择器引用了不存在的节点ID
+        """
+        next_node_id = None
+
+        # 0. 首先检查上下文中是否已经指定了下一个节点ID
+        if "next_node_id" in current_context:
+            next_node_id = current_context["next_node_id"]
+            # 从上下文中移除，避免影响后续节点
+            del current_context["next_node_id"]
+            logger.debug("  Branching: Using context-provided next node '%s'", next_node_id)
+
+        # 1. 如果上下文中没有指定，检查节点是否有next_node_selector
+        selector = self.selectors[position]
+        if not next_node_id and selector is not None:
+            next_node_id = selector(current_context)
+            if next_node_id:
+                logger.debug("  Branching: Selected next node '%s' by selector", next_node_id)
+
+        if next_node_id:
+            next_position = self.index.get(next_node_id)
+            if next_position is None:
+                raise ValueError(
+                    f"Node '{self.nodes[position].node_id}' referenced invalid next node ID: '{next_node_id}'"
+                )
+            return next_position
+
+        # 2. 静态指定的next_node_id
+        next_position = self.static_next[position]
+        if next_position is not None:
+            logger.debug("  Branching: Using statically defined next node '%s'", self.nodes[next_position].node_id)
+            return next_position
+
+        # 3. 默认的线性顺序
+        next_position = self.sequential_next[position]
+        if next_position is not None:
+            logger.debug("  Sequential: Moving to next node '%s'", self.nodes[next_position].node_id)
+        else:
+            logger.debug("  End of workflow: No next node defined after '%s'", self.nodes[position].node_id)
+        return next_position
+
+
 class Workflow:
     """
     工作流执行器。
     负责执行节点，支持线性执行和条件分支。
     """
-    def __init__(self, nodes: List[BaseNode]):
+    def __init__(self, nodes: List[BaseNode], checkpoint_store: Optional[CheckpointStore] = None):
         """
         初始化工作流。
         
         Args:
             nodes (List[BaseNode]): 按顺序列出的节点列表。
                                    当节点没有定义next_node_selector时，按此顺序执行。
+            checkpoint_store (CheckpointStore, optional): 检查点存储。设置后每个节点完成时
+                                   追加一条增量记录，失败的运行可以通过resume()继续。
         
         Raises:
             ValueError: 如果节点列表为空
@@ -24,7 +140,7 @@ class Workflow:
         from .nodes.start_node import StartNode  # 在方法内部导入，避免循环依赖问题
         # 检查确保第一个节点是StartNode
         if not isinstance(nodes[0], StartNode):
-            print("Warning: Workflow does not start with a StartNode.")
+            logger.warning("Workflow does not start with a StartNode.")
         
         self.nodes = nodes
         # 创建节点ID到节点实例的映射，用于条件分支
@@ -35,8 +151,33 @@ class Workflow:
         for i in range(len(nodes) - 1):
             self.next_node_map[nodes[i].node_id] = nodes[i + 1]
 
+        self.checkpoint_store = checkpoint_store
+        self._plan: Optional[CompiledWorkflow] = None
+
+    def compile(self) -> CompiledWorkflow:
+        """
+        编译工作流：检查所有跳转目标，生成按下标执行的计划。
+
+        首次运行时会自动编译，之后所有运行复用同一个计划。修改节点的跳转配置后
+        需要再次调用compile()。
+
+        Returns:
+            CompiledWorkflow: 编译后的执行计划
+
+        Raises:
+            ValueError: 如果节点ID重复或引用了不存在的节点
+        """
+        self._plan = CompiledWorkflow(self.nodes)
+        return self._plan
+
+    @property
+    def plan(self) -> CompiledWorkflow:
+        """当前的执行计划，尚未编译时先编译"""
+        return self._plan or self.compile()
+
     def run(self, initial_context: WorkflowContext, 
-            node_listener: Optional[Callable[[BaseNode, WorkflowContext], None]] = None) -> WorkflowContext:
+            node_listener: Optional[Callable[[BaseNode, WorkflowContext], None]] = None,
+            run_id: Optional[str] = None) -> Dict[str, Any]:
         """
         执行工作流，支持条件分支和线性执行。
         
@@ -45,84 +186,307 @@ class Workflow:
                                               对于StartNode，这里应包含其output_variable_names所需的值。
             node_listener (Callable, optional): 节点执行监听器，在每个节点执行后调用。
                                              可用于监控和控制工作流执行。
+            run_id (str, optional): 设置了检查点存储时使用的运行ID，默认自动生成。
+                                  在带检查点的运行的节点内部启动的工作流会作为子帧记录，忽略该参数。
 
         Returns:
-            WorkflowContext: 工作流执行完毕后的最终上下文。
+            Dict[str, Any]: 工作流执行完毕后的最终上下文（普通字典）。
             
         Raises:
             Exception: 如果节点执行过程中发生错误，会重新抛出异常
         """
-        print("=== Starting Workflow Execution ===")
-        current_context = initial_context.copy()  # 使用初始上下文的副本
+        logger.info("=== Starting Workflow Execution ===")
+        current_context = WorkflowContext(initial_context)  # 使用初始上下文的副本
+        recorder = open_frame(self.checkpoint_store, current_context, run_id)
+        current_context = self._run_frame(current_context, node_listener, recorder)
+        logger.info("=== Workflow Execution Finished Successfully ===")
+        return current_context.to_dict()
+
+    def resume(self, run_id: str,
+               node_listener: Optional[Callable[[BaseNode, WorkflowContext], None]] = None) -> Dict[str, Any]:
+        """
+        从检查点继续一次运行：重建上下文，从最后一个完成的节点之后继续执行。
+
+        迭代节点和子工作流节点内部已经完成的迭代、节点会被直接重放，不会再次执行。
+        运行已经结束时直接返回最终上下文。
+
+        Args:
+            run_id (str): 要继续的运行ID
+            node_listener (Callable, optional): 节点执行监听器，只对继续执行的节点调用
+
+        Returns:
+            Dict[str, Any]: 工作流执行完毕后的最终上下文（普通字典）。
+
+        Raises:
+            ValueError: 如果没有设置检查点存储或找不到该运行
+        """
+        if self.checkpoint_store is None:
+            raise ValueError("Workflow has no checkpoint store configured.")
+        recorder, initial_context = resume_frame(self.checkpoint_store, run_id)
+        logger.info("=== Resuming Workflow Execution (run %s) ===", run_id)
+        current_context = self._run_frame(initial_context, node_listener, recorder)
+        logger.info("=== Workflow Execution Finished Successfully ===")
+        return current_context.to_dict()
+
+    def submit_input(self, run_id: str, value: Any,
+                     node_listener: Optional[Callable[[BaseNode, WorkflowContext], None]] = None) -> Dict[str, Any]:
+        """
+        为在InputNode处暂停的运行提交输入并继续执行。
+
+        Args:
+            run_id (str): 暂停的运行ID（WorkflowSuspended.run_id）
+            value (Any): 用户输入
+            node_listener (Callable, optional): 节点执行监听器
+
+        Returns:
+            Dict[str, Any]: 工作流执行完毕后的最终上下文（普通字典）。
+
+        Raises:
+            WorkflowSuspended: 如果输入未通过验证，或运行在之后的InputNode处再次暂停
+            ValueError: 如果没有设置检查点存储，或该运行没有在等待输入
+        """
+        if self.checkpoint_store is None:
+            raise ValueError("Workflow has no checkpoint store configured.")
+        submit_input(self.checkpoint_store, run_id, value)
+        return self.resume(run_id, node_listener)
+
+    def _start_position(self, recorder: Optional[FrameRecorder],
+                        current_context: WorkflowContext) -> Tuple[WorkflowContext, Optional[int], bool]:
+        """
+        确定一个帧的起始上下文和节点下标：没有检查点记录时从第一个节点开始，
+        否则重放已完成的节点。
+
+        Returns:
+            Tuple[WorkflowContext, Optional[int], bool]: (上下文, 起始下标, 帧是否已经结束)。
+            帧已经结束时下标为None，不需要再执行节点或写入结束记录。
+        """
+        if recorder is None:
+            return current_context, 0, False
+        current_context, next_node_id, finished = recorder.restore(current_context)
+        if finished:
+            return current_context, None, True
+        if next_node_id is None:
+            return current_context, 0, False
+        position = self.plan.index.get(next_node_id)
+        if position is None:
+            raise ValueError(f"Checkpoint references unknown node ID: '{next_node_id}'")
+        return current_context, position, False
+
+    def _finish_step(self, recorder: Optional[FrameRecorder], position: int, before: Optional[WorkflowContext],
+                     current_context: WorkflowContext) -> Optional[int]:
+        """处理节点执行后的控制变量，确定下一个节点并写入检查点"""
+        plan = self.plan
+        # 检查是否需要提前退出子工作流
+        if "_subworkflow_complete" in current_context:
+            del current_context["_subworkflow_complete"]
+            next_position = None
+        else:
+            next_position = plan.next_index(position, current_context)
 
-        # 从第一个节点开始
-        current_node = self.nodes[0]
+        if recorder is not None:
+            next_node_id = plan.nodes[next_position].node_id if next_position is not None else None
+            recorder.record(plan.nodes[position].node_id, before, current_context, next_node_id)
+        return next_position
+
+    def _run_frame(self, current_context: WorkflowContext,
+                   node_listener: Optional[Callable[[BaseNode, WorkflowContext], None]],
+                   recorder: Optional[FrameRecorder]) -> WorkflowContext:
+        """按执行计划运行节点，recorder不为None时在每个节点完成后写入检查点"""
+        plan = self.plan
+        current_context, position, finished = self._start_position(recorder, current_context)
+        if finished:
+            return current_context
         
         # 当仍有节点需要执行时继续
-        while current_node:
+        while position is not None:
+            current_node = plan.nodes[position]
             try:
                 # 执行当前节点
-                current_context = current_node.execute(current_context)
+                if recorder is None:
+                    before = None
+                    current_context = self._ensure_context(execute_node(current_node, current_context))
+                else:
+                    before = current_context.copy()
+                    with recorder.executing(current_node.node_id):
+                        current_context = self._ensure_context(execute_node(current_node, current_context))
                 
                 # 如果提供了节点监听器，则调用它
                 if node_listener:
                     node_listener(current_node, current_context)
                 
-                # 检查是否需要提前退出子工作流
-                if "_subworkflow_complete" in current_context:
-                    del current_context["_subworkflow_complete"]
-                    break
-                
-                # 确定下一个节点
-                next_node = None
-                next_node_id = None
-                
-                # 0. 首先检查上下文中是否已经指定了下一个节点ID
-                if "next_node_id" in current_context:
-                    next_node_id = current_context["next_node_id"]
-                    # 从上下文中移除，避免影响后续节点
-                    del current_context["next_node_id"]
-                    print(f"  Branching: Using context-provided next node '{next_node_id}'")
-                
-                # 1. 如果上下文中没有指定，检查节点是否有next_node_selector
-                if not next_node_id and hasattr(current_node, 'next_node_selector') and current_node.next_node_selector:
-                    selector_result = current_node.next_node_selector(current_context)
-                    if selector_result:
-                        next_node_id = selector_result
-                        print(f"  Branching: Selected next node '{next_node_id}' by selector")
-                
-                # 2. 如果没有通过selector获得节点ID，检查是否有静态指定的next_node_id
-                if not next_node_id and hasattr(current_node, 'next_node_id') and current_node.next_node_id:
-                    next_node_id = current_node.next_node_id
-                    print(f"  Branching: Using statically defined next node '{next_node_id}'")
+                # 确定并更新当前节点
+                position = self._finish_step(recorder, position, before, current_context)
                 
-                # 3. 如果获得了节点ID，尝试从node_map中获取对应的节点
-                if next_node_id:
-                    if next_node_id in self.node_map:
-                        next_node = self.node_map[next_node_id]
-                    else:
-                        raise ValueError(f"Node '{current_node.node_id}' referenced invalid next node ID: '{next_node_id}'")
+            except WorkflowSuspended:
+                # 等待输入不是错误，暂停位置已经写入检查点
+                raise
+            except Exception as e:
+                logger.error("!!! Workflow execution failed at node %s !!!\nError: %s", current_node, e)
+                # 重新抛出异常，中断执行
+                raise
+
+        if recorder is not None:
+            recorder.finish()
+        return current_context
+    
+    def run_many(self, contexts: Iterable[WorkflowContext], concurrency: int = 8,
+                 executor: str = "thread") -> BatchRun:
+        """
+        并发运行多个会话（例如为全班每个学生运行同一个工作流）。
+
+        返回的BatchRun在迭代时按完成顺序产生RunResult，单个会话的异常记录在结果的error中，
+        不会中断其他会话；stats提供吞吐量和延迟分位数。
+
+        Args:
+            contexts (Iterable[WorkflowContext]): 每个会话的初始上下文。
+            concurrency (int): 同时运行的会话数。
+            executor (str): "thread"、"process"或"async"。进程模式要求节点可以在工作进程中运行，
+                            返回的上下文为普通dict。
+
+        Returns:
+            BatchRun: 可迭代的批量运行对象
+
+        Raises:
+            ValueError: 如果concurrency小于1或executor不合法
+        """
+        return BatchRun(self, contexts, concurrency=concurrency, executor=executor)
+
+    @staticmethod
+    def _ensure_context(context: WorkflowContext) -> WorkflowContext:
+        """将节点返回的普通字典转换为WorkflowContext，使后续节点的复制保持O(1)"""
+        if isinstance(context, WorkflowContext):
+            return context
+        return WorkflowContext(context)
+    
+    def __str__(self) -> str:
+        """返回工作流的字符串表示"""
+        return f"Workflow(nodes={len(self.nodes)})"
+
+
+class AsyncWorkflow(Workflow):
+    """
+    基于asyncio的工作流执行器。
+    
+    与Workflow共享节点映射和分支逻辑，但通过节点的aexecute方法执行，
+    使得同一个事件循环可以交错运行大量工作流会话，而不必为每个会话占用一个线程。
+    """
+    async def arun(self, initial_context: WorkflowContext,
+                   node_listener: Optional[Callable[[BaseNode, WorkflowContext],
+                                                    Union[None, Awaitable[None]]]] = None,
+                   run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        异步执行工作流，支持条件分支和线性执行。
+        
+        Args:
+            initial_context (WorkflowContext): 工作流启动时的初始数据。
+            node_listener (Callable, optional): 节点执行监听器，在每个节点执行后调用。
+                                             可以是普通函数，也可以是协程函数。
+            run_id (str, optional): 设置了检查点存储时使用的运行ID，默认自动生成。
+
+        Returns:
+            Dict[str, Any]: 工作流执行完毕后的最终上下文（普通字典）。
+            
+        Raises:
+            Exception: 如果节点执行过程中发生错误，会重新抛出异常
+        """
+        logger.info("=== Starting Async Workflow Execution ===")
+        current_context = WorkflowContext(initial_context)  # 使用初始上下文的副本
+        recorder = open_frame(self.checkpoint_store, current_context, run_id)
+        current_context = await self._arun_frame(current_context, node_listener, recorder)
+        logger.info("=== Async Workflow Execution Finished Successfully ===")
+        return current_context.to_dict()
+
+    async def aresume(self, run_id: str,
+                      node_listener: Optional[Callable[[BaseNode, WorkflowContext],
+                                                       Union[None, Awaitable[None]]]] = None) -> Dict[str, Any]:
+        """
+        异步从检查点继续一次运行，参见Workflow.resume。
+
+        Raises:
+            ValueError: 如果没有设置检查点存储或找不到该运行
+        """
+        if self.checkpoint_store is None:
+            raise ValueError("Workflow has no checkpoint store configured.")
+        recorder, initial_context = resume_frame(self.checkpoint_store, run_id)
+        logger.info("=== Resuming Async Workflow Execution (run %s) ===", run_id)
+        current_context = await self._arun_frame(initial_context, node_listener, recorder)
+        logger.info("=== Async Workflow Execution Finished Successfully ===")
+        return current_context.to_dict()
+
+    async def asubmit_input(self, run_id: str, value: Any,
+                            node_listener: Optional[Callable[[BaseNode, WorkflowContext],
+                                                             Union[None, Awaitable[None]]]] = None) -> Dict[str, Any]:
+        """
+        异步为暂停的运行提交输入并继续执行，参见Workflow.submit_input。
+
+        Raises:
+            WorkflowSuspended: 如果输入未通过验证，或运行在之后的InputNode处再次暂停
+            ValueError: 如果没有设置检查点存储，或该运行没有在等待输入
+        """
+        if self.checkpoint_store is None:
+            raise ValueError("Workflow has no checkpoint store configured.")
+        submit_input(self.checkpoint_store, run_id, value)
+        return await self.aresume(run_id, node_listener)
+
+    async def _arun_frame(self, current_context: WorkflowContext,
+                          node_listener: Optional[Callable[[BaseNode, WorkflowContext],
+                                                           Union[None, Awaitable[None]]]],
+                          recorder: Optional[FrameRecorder]) -> WorkflowContext:
+        """_run_frame的异步版本"""
+        plan = self.plan
+        current_context, position, finished = self._start_position(recorder, current_context)
+        if finished:
+            return current_context
+        
+        # 当仍有节点需要执行时继续
+        while position is not None:
+            current_node = plan.nodes[position]
+            try:
+                # 执行当前节点
+                if recorder is None:
+                    before = None
+                    current_context = self._ensure_context(await aexecute_node(current_node, current_context))
+                else:
+                    before = current_context.copy()
+                    with recorder.executing(current_node.node_id):
+                        current_context = self._ensure_context(await aexecute_node(current_node, current_context))
                 
-                # 4. 如果没有通过分支获得下一个节点，使用默认的线性顺序
-                if not next_node:
-                    if current_node.node_id in self.next_node_map:
-                        next_node = self.next_node_map[current_node.node_id]
-                        print(f"  Sequential: Moving to next node '{next_node.node_id}'")
-                    else:
-                        print(f"  End of workflow: No next node defined after '{current_node.node_id}'")
+                # 如果提供了节点监听器，则调用它
+                if node_listener:
+                    listener_result = node_listener(current_node, current_context)
+                    if inspect.isawaitable(listener_result):
+                        await listener_result
                 
-                # 更新当前节点
-                current_node = next_node
+                # 确定并更新当前节点
+                position = self._finish_step(recorder, position, before, current_context)
                 
+            except WorkflowSuspended:
+                # 等待输入不是错误，暂停位置已经写入检查点
+                raise
             except Exception as e:
-                print(f"!!! Workflow execution failed at node {current_node} !!!")
-                print(f"Error: {e}")
+                logger.error("!!! Async workflow execution failed at node %s !!!\nError: %s", current_node, e)
                 # 重新抛出异常，中断执行
                 raise
 
-        print("=== Workflow Execution Finished Successfully ===")
+        if recorder is not None:
+            recorder.finish()
         return current_context
     
+    def arun_many(self, contexts: Iterable[WorkflowContext],
+                  concurrency: int = 8) -> AsyncIterator[RunResult]:
+        """
+        在当前事件循环中并发运行多个会话，按完成顺序异步产生RunResult。
+
+        Args:
+            contexts (Iterable[WorkflowContext]): 每个会话的初始上下文。
+            concurrency (int): 同时运行的会话数。
+
+        Returns:
+            AsyncIterator[RunResult]: 按完成顺序返回的结果
+        """
+        self.plan  # 在分发之前编译
+        return arun_many(self, contexts, concurrency)
+
     def __str__(self) -> str:
         """返回工作流的字符串表示"""
-        return f"Workflow(nodes={len(self.nodes)})"
+        return f"AsyncWorkflow(nodes={len(self.nodes)})"
@@ -0,0 +1,204 @@
+"""
+从LLM输出中查找JSON的扫描器。
+
+- iter_json_values: 在完整文本中依次查找所有可解析的JSON对象（或数组）。用正则跳到下一个
+  起始括号，再由json.JSONDecoder.raw_decode（C实现）一次解析完整个值，字符串中的括号、
+  转义字符和Markdown代码块标记都不会干扰匹配。
+- IncrementalJSONScanner: 逐块接收流式文本，跟踪字符串和转义状态，在第一个完整的顶层
+  JSON对象闭合时立即解析并返回，调用方可以据此提前结束流式响应。
+"""
+import json
+import re
+from typing import Any, Iterator, List, Optional, Pattern, Tuple
+
+# 字符串外需要关注的字符：对象括号、数组括号和字符串起始引号
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+# 字符串内需要关注的字符：结束引号和转义符
+_IN_STRING = re.compile(r'["\\]')
+
+_CLOSERS = {'{': '}', '[': ']'}
+
+_OBJECT_START = re.compile(r'\{')
+_VALUE_START = re.compile(r'[{\[]')
+
+_decoder = json.JSONDecoder()
+
+
+def _start_pattern(allow_arrays: bool) -> Pattern:
+    return _VALUE_START if allow_arrays else _OBJECT_START
+
+
+def find_json_start(text: str, pos: int = 0, allow_arrays: bool = False) -> int:
+    """
+    查找下一个可能的JSON起始位置。
+
+    Args:
+        text (str): 待查找的文本
+        pos (int): 开始查找的位置
+        allow_arrays (bool): 是否把“[”也当作起始括号
+
+    Returns:
+        int: 起始括号的位置，找不到时返回-1
+    """
+    match = _start_pattern(allow_arrays).search(text, pos)
+    return match.start() if match else -1
+
+
+def decode_json_at(text: str, start: int) -> Tuple[Any, int]:
+    """
+    从指定位置解析一个完整的JSON值。
+
+    Args:
+        text (str): 文本
+        start (int): JSON值的起始位置
+
+    Returns:
+        Tuple[Any, int]: 解析出的值和紧随其后的位置
+
+    Raises:
+        json.JSONDecodeError: 如果该位置不是合法的JSON
+    """
+    return _decoder.raw_decode(text, start)
+
+
+def is_truncated_json_error(error: json.JSONDecodeError) -> bool:
+    """判断解析错误是否由文本在JSON结束前截断引起"""
+    return error.pos >= len(error.doc) or error.msg.startswith("Unterminated string")
+
+
+def iter_json_values(text: str, allow_arrays: bool = False) -> Iterator[Tuple[Any, int, int]]:
+    """
+    依次返回文本中所有可解析的顶层JSON值。
+
+    某个起始括号处无法解析时，从它的下一个字符继续查找；解析成功后从该值的末尾继续查找，
+    因此不会返回嵌套在已返回值内部的对象。
+
+    Args:
+        text (str): 待查找的文本
+        allow_arrays (bool): 是否也返回JSON数组
+
+    Returns:
+        Iterator[Tuple[Any, int, int]]: (值, 起始位置, 结束位置)
+    """
+    start = find_json_start(text, 0, allow_arrays)
+    while start != -1:
+        try:
+            value, end = _decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            start = find_json_start(text, start + 1, allow_arrays)
+            continue
+        yield value, start, end
+        start = find_json_start(text, end, allow_arrays)
+
+
+class IncrementalJSONScanner:
+    """
+    增量JSON扫描器。
+
+    每次feed()只扫描新到达的文本，使用正则表达式跳到下一个有意义的字符。
+    括号配对但无法解析的候选（例如正文中的“{like this}”）会被跳过，继续查找下一个候选。
+    """
+    __slots__ = ("allow_arrays", "value", "found", "_opener_re", "_opener", "_depth",
+                 "_in_string", "_escape", "_parts")
+
+    def __init__(self, allow_arrays: bool = False):
+        """
+        初始化扫描器。
+
+        Args:
+            allow_arrays (bool): 是否也接受顶层JSON数组，默认只查找对象
+        """
+        self.allow_arrays = allow_arrays
+        self.value: Any = None      # 解析出的JSON值
+        self.found = False          # 是否已经找到完整的JSON
+        self._opener_re = re.compile(r'[{\[]' if allow_arrays else r'\{')
+        self._reset()
+
+    def _reset(self) -> None:
+        """回到查找候选起始括号的状态"""
+        self._opener: Optional[str] = None  # 当前候选的起始括号，None表示尚未进入候选
+        self._depth = 0
+        self._in_string = False
+        self._escape = False                # 上一个片段以转义符结尾
+        self._parts: List[str] = []         # 当前候选已经扫描过的文本
+
+    def feed(self, chunk: str) -> bool:
+        """
+        输入一段文本。
+
+        Args:
+            chunk (str): 新到达的文本片段
+
+        Returns:
+            bool: 是否已经找到完整的JSON（之后的输入会被忽略）
+        """
+        if not self.found and chunk:
+            self._scan(chunk)
+        return self.found
+
+    def _scan(self, text: str) -> None:
+        pos = 0
+        length = len(text)
+        while pos < length:
+            if self._opener is None:
+                match = self._opener_re.search(text, pos)
+                if match is None:
+                    return
+                self._opener = match.group()
+                self._depth = 1
+                text = text[match.start():]
+                length = len(text)
+                pos = 1
+                continue
+
+            if self._escape:
+                # 转义符出现在上一个片段末尾，跳过本片段的第一个字符
+                self._escape = False
+                pos += 1
+                continue
+
+            if self._in_string:
+                match = _IN_STRING.search(text, pos)
+                if match is None:
+                    break
+                if match.group() == '\\':
+                    pos = match.end() + 1
+                    if pos > length:
+                        self._escape = True
+                    continue
+                self._in_string = False
+                pos = match.end()
+                continue
+
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                break
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                self._in_string = True
+            elif char == self._opener:
+                self._depth += 1
+            elif char == _CLOSERS[self._opener]:
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = "".join(self._parts) + text[:pos]
+                    if self._try_parse(candidate):
+                        return
+                    # 不是合法的JSON：从候选起始括号之后重新查找
+                    text = candidate[1:] + text[pos:]
+                    length = len(text)
+                    pos = 0
+                    self._reset()
+
+        if self._opener is not None:
+            self._parts.append(text)
+
+    def _try_parse(self, candidate: str) -> bool:
+        try:
+            self.value = _decoder.decode(candidate)
+        except json.JSONDecodeError:
+            return False
+        self.found = True
+        self._parts = []
+        return True
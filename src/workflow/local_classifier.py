@@ -0,0 +1,198 @@
+"""
+基于字符n-gram TF-IDF的本地分类器。
+
+用ClassDefinition的描述和示例建立稀疏TF-IDF向量，按余弦相似度找出最接近的分类。
+字符n-gram不依赖分词，中文和英文输入都适用。向量用字典表示，查询时通过倒排索引
+只计算与输入共享n-gram的文档，不需要NumPy等额外依赖。
+
+ConditionalBranchNode在相似度足够高、且明显领先第二名时直接采用本地结果，
+否则仍然调用LLM分类。
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+# 稀疏向量：n-gram -> 权重
+SparseVector = Dict[str, float]
+
+
+class LocalPrediction(NamedTuple):
+    """本地分类结果"""
+    class_name: str     # 最接近的分类名称
+    confidence: float   # 与该分类最相似文档的余弦相似度（0~1）
+    margin: float       # 与第二名分类的相似度之差
+
+
+def normalize_text(text: str) -> str:
+    """转为小写，把标点和连续空白替换为单个空格"""
+    return _NON_WORD.sub(" ", str(text).lower()).strip()
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = (1, 3)) -> Counter:
+    """
+    统计文本的字符n-gram。
+
+    Args:
+        text (str): 文本
+        ngram_range (Tuple[int, int]): n的最小值和最大值
+
+    Returns:
+        Counter: n-gram -> 出现次数（不包含纯空白的n-gram）
+    """
+    normalized = normalize_text(text)
+    if not normalized:
+        return Counter()
+    padded = f" {normalized} "
+    low, high = ngram_range
+    grams: Counter = Counter()
+    for n in range(low, high + 1):
+        for i in range(len(padded) - n + 1):
+            gram = padded[i:i + n]
+            if not gram.isspace():
+                grams[gram] += 1
+    return grams
+
+
+class LocalClassifier:
+    """
+    字符n-gram TF-IDF最近邻分类器。
+
+    每条描述和示例是一篇文档，分类得分为该分类下最相似文档的余弦相似度。
+    """
+
+    def __init__(self, documents: Iterable[Tuple[str, str]],
+                 threshold: float = 0.5,
+                 min_margin: float = 0.1,
+                 ngram_range: Tuple[int, int] = (1, 3)):
+        """
+        训练分类器。
+
+        Args:
+            documents (Iterable[Tuple[str, str]]): (分类名称, 文本)列表
+            threshold (float): 采用本地结果所需的最低相似度
+            min_margin (float): 采用本地结果所需的、领先第二名分类的最小相似度差
+            ngram_range (Tuple[int, int]): 字符n-gram的长度范围
+
+        Raises:
+            ValueError: 如果参数不合法或没有可用的训练文本
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        if min_margin < 0:
+            raise ValueError("min_margin must be non-negative")
+        if ngram_range[0] < 1 or ngram_range[0] > ngram_range[1]:
+            raise ValueError("ngram_range must satisfy 1 <= min <= max")
+
+        self.threshold = threshold
+        self.min_margin = min_margin
+        self.ngram_range = ngram_range
+
+        labeled = [(label, char_ngrams(text, ngram_range)) for label, text in documents]
+        labeled = [(label, grams) for label, grams in labeled if grams]
+        if not labeled:
+            raise ValueError("LocalClassifier needs at least one non-empty document")
+
+        self.labels: List[str] = [label for label, _ in labeled]
+        self.class_names: List[str] = list(dict.fromkeys(self.labels))
+
+        # 平滑IDF：log((1 + N) / (1 + df)) + 1
+        document_frequency: Counter = Counter()
+        for _, grams in labeled:
+            document_frequency.update(grams.keys())
+        total = len(labeled)
+        self._idf: Dict[str, float] = {
+            gram: math.log((1 + total) / (1 + df)) + 1 for gram, df in document_frequency.items()
+        }
+
+        # 倒排索引：n-gram -> [(文档序号, 权重)]
+        self._index: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for doc_id, (_, grams) in enumerate(labeled):
+            for gram, weight in self._vectorize(grams).items():
+                self._index[gram].append((doc_id, weight))
+        self._index = dict(self._index)
+
+    @classmethod
+    def from_classes(cls, classes: Sequence, **kwargs) -> "LocalClassifier":
+        """
+        用分类定义的名称、描述和示例训练分类器。
+
+        Args:
+            classes (Sequence[ClassDefinition]): 分类定义
+            **kwargs: 传给构造函数的其他参数
+
+        Returns:
+            LocalClassifier: 训练好的分类器
+        """
+        documents = []
+        for definition in classes:
+            documents.append((definition.name, f"{definition.name} {definition.description}"))
+            for example in definition.examples or []:
+                documents.append((definition.name, example))
+        return cls(documents, **kwargs)
+
+    def _vectorize(self, grams: Counter) -> SparseVector:
+        """计算L2归一化的TF-IDF向量，训练集中没有出现的n-gram被忽略"""
+        vector = {
+            gram: (1 + math.log(count)) * self._idf[gram]
+            for gram, count in grams.items() if gram in self._idf
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if not norm:
+            return {}
+        return {gram: weight / norm for gram, weight in vector.items()}
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """
+        计算输入与每个分类的相似度。
+
+        Args:
+            text (str): 待分类的文本
+
+        Returns:
+            Dict[str, float]: 分类名称 -> 余弦相似度
+        """
+        query = self._vectorize(char_ngrams(text, self.ngram_range))
+        dots: Dict[int, float] = defaultdict(float)
+        for gram, weight in query.items():
+            for doc_id, doc_weight in self._index[gram]:
+                dots[doc_id] += weight * doc_weight
+
+        result = dict.fromkeys(self.class_names, 0.0)
+        for doc_id, similarity in dots.items():
+            label = self.labels[doc_id]
+            if similarity > result[label]:
+                result[label] = min(similarity, 1.0)
+        return result
+
+    def predict(self, text: str) -> LocalPrediction:
+        """
+        返回最接近的分类，不论置信度高低。
+
+        Args:
+            text (str): 待分类的文本
+
+        Returns:
+            LocalPrediction: 分类名称、相似度和领先第二名的差值
+        """
+        ranked = sorted(self.scores(text).items(), key=lambda item: item[1], reverse=True)
+        best_name, best = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        return LocalPrediction(best_name, best, best - second)
+
+    def classify(self, text: str) -> Optional[LocalPrediction]:
+        """
+        只在结果足够可靠时返回分类。
+
+        Args:
+            text (str): 待分类的文本
+
+        Returns:
+            Optional[LocalPrediction]: 相似度达到threshold且领先min_margin时返回结果，否则返回None
+        """
+        prediction = self.predict(text)
+        if prediction.confidence >= self.threshold and prediction.margin >= self.min_margin:
+            return prediction
+        return None
@@ -0,0 +1,93 @@
+"""
+工作流日志模块。
+
+引擎和所有节点通过标准库logging输出执行轨迹，日志消息使用%s占位符惰性格式化：
+只有当对应级别被启用时，上下文等参数才会被转换成字符串。
+
+作为库，导入时只安装NullHandler，日志的级别和输出由宿主应用的logging配置决定；
+示例和命令行入口调用configure_logging()把执行轨迹输出到标准输出。
+
+级别约定：
+- INFO: 节点开始/结束、迭代进度等执行轨迹
+- DEBUG: 完整的输入/输出上下文、提示词、LLM响应、分支决策（默认关闭）
+- WARNING/ERROR: 缺失变量、节点失败等问题
+- SILENT: 关闭所有工作流日志，热路径上只剩一次级别判断
+"""
+import logging
+import sys
+from typing import Optional, TextIO, Union
+
+# 工作流包的根日志器名称，所有模块的日志器（logging.getLogger(__name__)）都是它的子日志器
+LOGGER_NAME = __name__.rpartition('.')[0]
+
+# 比CRITICAL更高的级别，用于完全静默
+SILENT = logging.CRITICAL + 10
+logging.addLevelName(SILENT, "SILENT")
+
+_DEFAULT_FORMAT = "%(message)s"
+
+_package_logger = logging.getLogger(LOGGER_NAME)
+_default_handler: Optional[logging.Handler] = None
+
+
+def configure_logging(level: Union[int, str] = logging.INFO,
+                      stream: Optional[TextIO] = None,
+                      fmt: str = _DEFAULT_FORMAT) -> None:
+    """
+    配置工作流日志的输出级别和目标，供示例和命令行入口显式调用。
+
+    会替换之前由本函数安装的处理器，不影响用户自行添加的处理器。宿主应用的根日志器
+    也配置了处理器时，日志会同时传播给它们。
+
+    Args:
+        level (Union[int, str]): 日志级别，可以是logging级别常量或名称（如"DEBUG"、"SILENT"）
+        stream (TextIO, optional): 输出流，默认为标准输出
+        fmt (str): 日志格式字符串
+    """
+    global _default_handler
+
+    if _default_handler is not None:
+        _package_logger.removeHandler(_default_handler)
+
+    _default_handler = logging.StreamHandler(stream or sys.stdout)
+    _default_handler.setFormatter(logging.Formatter(fmt))
+    _package_logger.addHandler(_default_handler)
+    set_log_level(level)
+
+
+def reset_logging() -> None:
+    """移除configure_logging安装的处理器并清除级别设置，恢复导入时的默认状态。"""
+    global _default_handler
+
+    if _default_handler is not None:
+        _package_logger.removeHandler(_default_handler)
+        _default_handler = None
+    _package_logger.setLevel(logging.NOTSET)
+
+
+def set_log_level(level: Union[int, str]) -> None:
+    """
+    设置工作流日志级别。
+
+    Args:
+        level (Union[int, str]): 日志级别，可以是logging级别常量或名称（如"DEBUG"、"SILENT"）
+    """
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level: {level}")
+    _package_logger.setLevel(level)
+
+
+def silence() -> None:
+    """关闭所有工作流日志输出。"""
+    set_log_level(SILENT)
+
+
+def is_verbose(logger: logging.Logger) -> bool:
+    """判断是否需要输出面向控制台的执行细节（如流式响应的逐字回显）。"""
+    return logger.isEnabledFor(logging.INFO)
+
+
+# 库代码不替宿主应用决定日志输出
+_package_logger.addHandler(logging.NullHandler())
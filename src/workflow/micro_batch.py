@@ -0,0 +1,186 @@
+"""
+微批处理。
+
+多个并发会话在很短的时间内执行同一个节点时（例如批改全班作业），把它们的请求合并成
+一次批量调用，再把结果分发回各自的调用方。
+
+- MicroBatcher: 供同步调用（多线程）使用。每批第一个到达的线程负责等待时间窗口、
+  执行批量函数，其他线程等待结果，不需要后台线程。
+- AsyncMicroBatcher: 供协程使用。每批第一个请求创建一个刷新任务，所有调用方等待该任务。
+
+批量函数接收请求列表，返回等长的结果列表；某个结果是异常实例时，只有对应的调用方收到该异常。
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+def _check_arguments(window: float, max_size: int) -> None:
+    if window < 0:
+        raise ValueError("window must be non-negative")
+    if max_size < 1:
+        raise ValueError("max_size must be at least 1")
+
+
+def _unwrap(results: List[Any], index: int) -> Any:
+    """取出第index个结果，异常实例直接抛出"""
+    result = results[index]
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+def _check_results(items: List[Any], results: List[Any]) -> List[Any]:
+    results = list(results)
+    if len(results) != len(items):
+        raise RuntimeError(f"Batch function returned {len(results)} results for {len(items)} items")
+    return results
+
+
+class _Batch:
+    """一批正在收集或执行的请求"""
+    __slots__ = ("items", "closed", "done", "results", "error", "task")
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.closed = False
+        self.done = threading.Event()
+        self.results: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.task: Optional["asyncio.Task"] = None
+
+
+class MicroBatcher:
+    """线程安全的同步微批处理器"""
+
+    def __init__(self, func: Callable[[List[Any]], List[Any]], window: float = 0.01, max_size: int = 20):
+        """
+        初始化微批处理器。
+
+        Args:
+            func (Callable): 批量函数，接收请求列表，返回等长的结果列表
+            window (float): 第一个请求到达后等待更多请求的时间（秒）
+            max_size (int): 每批的最大请求数，达到后立即执行
+
+        Raises:
+            ValueError: 如果参数不合法
+        """
+        _check_arguments(window, max_size)
+        self.func = func
+        self.window = window
+        self.max_size = max_size
+        self._cond = threading.Condition()
+        self._current: Optional[_Batch] = None
+
+    def submit(self, item: Any) -> Any:
+        """
+        提交一个请求，阻塞直到所在批次执行完毕。
+
+        Args:
+            item (Any): 请求
+
+        Returns:
+            Any: 该请求对应的结果
+
+        Raises:
+            Exception: 批量函数失败，或该请求的结果是异常
+        """
+        with self._cond:
+            batch = self._current
+            leader = batch is None
+            if leader:
+                batch = self._current = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_size:
+                self._close(batch)
+
+        if not leader:
+            batch.done.wait()
+        else:
+            with self._cond:
+                self._cond.wait_for(lambda: batch.closed, timeout=self.window)
+                self._close(batch)
+            try:
+                batch.results = _check_results(batch.items, self.func(batch.items))
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+
+        if batch.error is not None:
+            raise batch.error
+        return _unwrap(batch.results, index)
+
+    def _close(self, batch: _Batch) -> None:
+        """停止接收新请求，调用方需持有锁"""
+        batch.closed = True
+        if self._current is batch:
+            self._current = None
+        self._cond.notify_all()
+
+
+class AsyncMicroBatcher:
+    """
+    异步微批处理器。
+
+    只在同一个事件循环内合并请求；其他事件循环中的请求会开始新的批次。
+    """
+
+    def __init__(self, func: Callable[[List[Any]], Awaitable[List[Any]]], window: float = 0.01, max_size: int = 20):
+        """
+        初始化微批处理器。
+
+        Args:
+            func (Callable): 异步批量函数，接收请求列表，返回等长的结果列表
+            window (float): 第一个请求到达后等待更多请求的时间（秒）
+            max_size (int): 每批的最大请求数，达到后立即执行
+
+        Raises:
+            ValueError: 如果参数不合法
+        """
+        _check_arguments(window, max_size)
+        self.func = func
+        self.window = window
+        self.max_size = max_size
+        self._current: Optional[_Batch] = None
+        self._current_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._full: Optional[asyncio.Event] = None
+
+    async def submit(self, item: Any) -> Any:
+        """
+        提交一个请求，等待所在批次执行完毕。
+
+        调用方被取消不会影响同批次的其他请求。
+
+        Args:
+            item (Any): 请求
+
+        Returns:
+            Any: 该请求对应的结果
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._current
+        if batch is None or self._current_loop is not loop:
+            batch = self._current = _Batch()
+            self._current_loop = loop
+            self._full = asyncio.Event()
+            batch.task = loop.create_task(self._flush(batch, self._full))
+        index = len(batch.items)
+        batch.items.append(item)
+        if len(batch.items) >= self.max_size:
+            self._full.set()
+            self._current = None
+
+        results = await asyncio.shield(batch.task)
+        return _unwrap(results, index)
+
+    async def _flush(self, batch: _Batch, full: asyncio.Event) -> List[Any]:
+        """等待时间窗口或批次已满，然后执行批量函数"""
+        try:
+            await asyncio.wait_for(full.wait(), self.window)
+        except asyncio.TimeoutError:
+            pass
+        if self._current is batch:
+            self._current = None
+        return _check_results(batch.items, await self.func(batch.items))
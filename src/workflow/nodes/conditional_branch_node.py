@@ -1,8 +1,21 @@
-from typing import List, Dict, Any, Optional, NamedTuple, Union
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, NamedTuple, Tuple, Union
+import asyncio
 import json
 from ..base import BaseNode, WorkflowContext
+from ..json_scanner import iter_json_values
+from ..local_classifier import LocalClassifier
+from ..micro_batch import AsyncMicroBatcher, MicroBatcher
+from ..schema_validation import validate_json
 from .json_extractor_node import JSONExtractorNode
 
+logger = logging.getLogger(__name__)
+
 # 分类定义数据类
 class ClassDefinition(NamedTuple):
     """分类定义数据类"""
@@ -36,6 +49,55 @@ CLASSIFICATION_PROMPT_TEMPLATE = """
 输入问题: {input_text}
 """
 
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_input(text: Any) -> str:
+    """
+    规范化待分类的输入，用作缓存键：Unicode NFKC规范化（全角转半角）、忽略大小写、
+    去掉首尾空白并合并连续空白。标点保持不变，避免“1+1”和“1-1”被视为相同输入。
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", str(text)).casefold()).strip()
+
+
+# 批量分类提示词模板
+BATCH_CLASSIFICATION_PROMPT_TEMPLATE = """
+你是一个专业的问题分类器。请将下面每个编号的输入问题分别分类到以下类别之一:
+
+{class_definitions}
+
+请以JSON数组返回分类结果，每个输入问题对应一个元素，包含以下字段:
+- index: 输入问题的编号
+- class_name: 选择的分类名称
+- confidence: 分类的置信度(0-1之间的小数)
+- reason: 简要说明选择该分类的理由
+
+输入问题:
+{input_items}
+"""
+
+
+@dataclass
+class BranchStats:
+    """分类来源统计"""
+    local_hits: int = 0   # 由本地分类器直接决定的次数
+    llm_items: int = 0    # 需要LLM分类的输入数量（单独或批量分类）
+    llm_calls: int = 0    # 实际调用LLM的次数，一个批量提示词只计一次
+    batch_calls: int = 0  # 发送的批量分类提示词数量
+    cache_hits: int = 0   # 命中分类结果缓存的次数
+
+    @property
+    def requests(self) -> int:
+        """总分类次数"""
+        return self.local_hits + self.llm_items + self.cache_hits
+
+    @property
+    def fast_path_rate(self) -> float:
+        """本地分类器直接决定的比例"""
+        total = self.requests
+        return self.local_hits / total if total else 0.0
+
+
 class ConditionalBranchNode(BaseNode):
     """
     条件分支节点，基于内容进行分支选择。
@@ -50,7 +112,13 @@ class ConditionalBranchNode(BaseNode):
         llm_client: Any,
         default_class: Optional[ClassDefinition] = None,
         output_reason: bool = False,
-        output_variable_name: str = "classification_result"
+        output_variable_name: str = "classification_result",
+        local_threshold: Optional[float] = None,
+        local_min_margin: float = 0.1,
+        batch_size: int = 20,
+        batch_window: Optional[float] = None,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None
     ):
         """
         初始化条件分支节点。
@@ -64,26 +132,140 @@ class ConditionalBranchNode(BaseNode):
             default_class (Optional[ClassDefinition]): 默认分类，当无法确定分类时使用。
             output_reason (bool): 是否将分类原因写入上下文。
             output_variable_name (str): 分类结果将存储在上下文中的变量名称。
+            local_threshold (Optional[float]): 启用本地分类器时采用本地结果所需的最低相似度（0~1），
+                None表示总是调用LLM。本地分类器用分类的描述和示例训练。
+            local_min_margin (float): 采用本地结果所需的、领先第二名分类的最小相似度差。
+            batch_size (int): 批量分类时每个提示词包含的最大输入数。
+            batch_window (Optional[float]): 设置后，并发执行本节点的会话会在该时间窗口（秒）内
+                合并为一次批量分类；None表示每次执行单独分类。
+            cache_size (int): LLM分类结果缓存的最大条目数，0表示不缓存。缓存键由规范化后的输入
+                和分类定义的哈希组成，分类定义变化后旧结果自动失效。
+            cache_ttl (Optional[float]): 缓存结果的有效期（秒），None表示不过期。
         """
         super().__init__(node_id, node_name)
-        
-        if not classes:
-            raise ValueError("Classes list cannot be empty")
-        
-        self.classes = classes
+
         self.input_variable_name = input_variable_name
         self.llm_client = llm_client
         self.default_class = default_class
         self.output_reason = output_reason
         self.output_variable_name = output_variable_name
-        
+        self.local_threshold = local_threshold
+        self.local_min_margin = local_min_margin
+        self.local_classifier: Optional[LocalClassifier] = None
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.stats = BranchStats()
+        self._stats_lock = threading.Lock()
+        self._cache = None
+        if cache_size:
+            from ...llm.caching_client import LRUCache
+            self._cache = LRUCache(max_size=cache_size, ttl=cache_ttl)
+        self._batcher: Optional[MicroBatcher] = None
+        self._abatcher: Optional[AsyncMicroBatcher] = None
+        if batch_window is not None:
+            self._batcher = MicroBatcher(self._classify_batch_outcomes, batch_window, batch_size)
+            self._abatcher = AsyncMicroBatcher(self._aclassify_batch_outcomes, batch_window, batch_size)
+
+        self.set_classes(classes)
+
+    def set_classes(self, classes: List[ClassDefinition]) -> None:
+        """
+        设置分类定义，并重新生成分类映射、提示词前缀和JSON提取器。
+
+        提示词中分类定义部分只依赖分类列表，在这里生成一次；每次分类只替换输入问题，
+        提示词前缀保持不变，服务端的前缀缓存可以生效。
+
+        Args:
+            classes (List[ClassDefinition]): 分类定义列表。
+
+        Raises:
+            ValueError: 如果分类列表为空或分类名称重复。
+        """
+        if not classes:
+            raise ValueError("Classes list cannot be empty")
+
         # 创建分类名称到分类定义的映射，方便快速查找
-        self.class_map = {cls.name: cls for cls in classes}
-        
+        class_map = {cls.name: cls for cls in classes}
+
         # 检查分类名称唯一性
-        if len(self.class_map) != len(classes):
+        if len(class_map) != len(classes):
             raise ValueError("Class names must be unique")
 
+        self.classes = classes
+        self.class_map = class_map
+
+        # 分类定义（包括默认分类）的哈希，作为缓存键的一部分
+        self._classes_hash = hashlib.sha256(json.dumps(
+            [list(cls) for cls in classes] + [list(self.default_class) if self.default_class else None],
+            ensure_ascii=False
+        ).encode("utf-8")).hexdigest()[:16]
+        self.clear_classification_cache()
+
+        # 以{input_text}为界冻结提示词：前缀包含全部分类定义
+        class_definitions = self._generate_class_definitions_text()
+        prefix_template, self._prompt_suffix = CLASSIFICATION_PROMPT_TEMPLATE.split("{input_text}", 1)
+        self._prompt_prefix = prefix_template.format(class_definitions=class_definitions)
+        prefix_template, self._batch_prompt_suffix = BATCH_CLASSIFICATION_PROMPT_TEMPLATE.split("{input_items}", 1)
+        self._batch_prompt_prefix = prefix_template.format(class_definitions=class_definitions)
+
+        self._json_extractor = JSONExtractorNode(
+            node_id=f"{self.node_id}_json_extractor",
+            node_name="Classification JSON Extractor",
+            input_variable_name="llm_response",
+            output_variable_name="classification",
+            schema=CLASSIFICATION_SCHEMA,
+            default_value=self._default_classification(),
+            raise_on_error=False  # 出错时使用默认值而不是抛出异常
+        )
+
+        if self.local_threshold is not None:
+            training_classes = list(classes)
+            if self.default_class and self.default_class.name not in class_map:
+                training_classes.append(self.default_class)
+            self.local_classifier = LocalClassifier.from_classes(
+                training_classes, threshold=self.local_threshold, min_margin=self.local_min_margin
+            )
+
+    def clear_classification_cache(self) -> None:
+        """清空分类结果缓存。"""
+        if self._cache is not None:
+            self._cache.clear()
+
+    def _cache_key(self, input_text: Any) -> str:
+        return f"{self._classes_hash}:{normalize_input(input_text)}"
+
+    def _lookup_cache(self, input_text: Any) -> Optional[Dict[str, Any]]:
+        """查找缓存的分类结果，命中时返回副本"""
+        if self._cache is None:
+            return None
+        cached = self._cache.get(self._cache_key(input_text))
+        if cached is None:
+            return None
+        with self._stats_lock:
+            self.stats.cache_hits += 1
+        logger.debug("  Classification cache hit: %s", cached["class_name"])
+        return dict(cached)
+
+    def _store_cache(self, input_text: Any, classification: Dict[str, Any]) -> None:
+        """缓存分类结果；不属于已配置分类（包括默认分类）的结果不缓存，避免错误响应被反复复用"""
+        if self._cache is None or not self._is_known_class(classification.get("class_name")):
+            return
+        self._cache.set(self._cache_key(input_text), dict(classification))
+
+    def _is_known_class(self, class_name: Any) -> bool:
+        return class_name in self.class_map or (
+            self.default_class is not None and class_name == self.default_class.name)
+
+    def _default_classification(self) -> Dict[str, Any]:
+        """无法提取分类结果时使用的默认值"""
+        return {
+            "class_name": self.default_class.name if self.default_class else "Unknown",
+            "confidence": 0,
+            "reason": "Failed to extract valid classification"
+        }
+
     def _generate_class_definitions_text(self) -> str:
         """生成分类定义文本，用于LLM提示词"""
         definitions = []
@@ -101,34 +283,18 @@ class ConditionalBranchNode(BaseNode):
         return "\n\n".join(definitions)
 
     def _format_classification_prompt(self, input_text: str) -> str:
-        """格式化分类提示词"""
-        class_definitions = self._generate_class_definitions_text()
-        return CLASSIFICATION_PROMPT_TEMPLATE.format(
-            class_definitions=class_definitions,
-            input_text=input_text
-        )
+        """格式化分类提示词，只替换输入问题部分"""
+        return f"{self._prompt_prefix}{input_text}{self._prompt_suffix}"
 
-    def _extract_classification(self, llm_response: str) -> Dict[str, Any]:
-        """从LLM响应中提取分类结果"""
-        # 创建一个临时的JSON提取器
-        json_extractor = JSONExtractorNode(
-            node_id=f"{self.node_id}_json_extractor",
-            node_name="Classification JSON Extractor",
-            input_variable_name="llm_response",
-            output_variable_name="classification",
-            schema=CLASSIFICATION_SCHEMA,
-            default_value={
-                "class_name": self.default_class.name if self.default_class else "Unknown",
-                "confidence": 0,
-                "reason": "Failed to extract valid classification"
-            },
-            raise_on_error=False  # 出错时使用默认值而不是抛出异常
-        )
-        
-        # 提取JSON
-        temp_context = {"llm_response": llm_response}
-        result_context = json_extractor.execute(temp_context)
-        return result_context["classification"]
+    def _extract_classification(self, llm_response: str, input_text: Any = None) -> Dict[str, Any]:
+        """从LLM响应中提取分类结果，提供input_text时缓存成功提取的结果"""
+        classification = self._json_extractor.extract(llm_response)
+        if classification is self._json_extractor.default_value:
+            # 默认值在多次调用间共享，返回副本避免被修改
+            return dict(classification)
+        if input_text is not None:
+            self._store_cache(input_text, classification)
+        return classification
 
     def _get_next_node_id(self, class_name: str) -> str:
         """根据分类名称获取下一个节点ID"""
@@ -139,6 +305,21 @@ class ConditionalBranchNode(BaseNode):
         else:
             raise ValueError(f"Unknown class '{class_name}' and no default class provided")
 
+    def get_next_node_ids(self) -> List[str]:
+        """返回所有分类（包括默认分类）对应的下一个节点ID"""
+        next_ids = [cls.next_node_id for cls in self.classes]
+        if self.default_class:
+            next_ids.append(self.default_class.next_node_id)
+        return list(dict.fromkeys(next_ids))
+
+    def get_input_variables(self) -> List[str]:
+        """返回节点读取的上下文变量名"""
+        return [self.input_variable_name]
+
+    def get_output_variables(self) -> List[str]:
+        """返回节点写入的上下文变量名"""
+        return [self.output_variable_name, f"{self.output_variable_name}_reason"]
+
     def execute(self, context: WorkflowContext) -> WorkflowContext:
         """
         执行条件分支节点逻辑。
@@ -152,73 +333,337 @@ class ConditionalBranchNode(BaseNode):
         Raises:
             ValueError: 如果输入变量不存在或分类失败且没有默认分类。
         """
-        print(f"--- Executing {self} ---")
-        print(f"  Input Context: {context}")
+        logger.info("--- Executing %s ---", self)
+        logger.debug("  Input Context: %s", context)
 
+        input_text = self._get_input_text(context)
+        if self._batcher is not None:
+            # 与并发会话合并为一次批量分类
+            return self._apply_result(context, self._batcher.submit(input_text))
+
+        cached = self._lookup_cache(input_text)
+        if cached is not None:
+            return self._apply_result(context, cached)
+        local_result = self._classify_locally(input_text)
+        if local_result is not None:
+            return self._apply_result(context, local_result)
+
+        classification_prompt = self._prepare_classification_prompt(input_text)
+        
+        try:
+            # 调用LLM进行分类
+            llm_response = self._invoke(classification_prompt)
+            return self._apply_classification(context, llm_response, input_text)
+        except Exception as e:
+            return self._handle_classification_error(context, e)
+
+    async def aexecute(self, context: WorkflowContext) -> WorkflowContext:
+        """
+        异步执行条件分支节点逻辑。
+        客户端原生实现ainvoke时直接等待，否则在线程池中运行同步invoke。
+
+        Args:
+            context (WorkflowContext): 当前工作流上下文。
+
+        Returns:
+            WorkflowContext: 更新后的上下文，包含分类结果和下一个节点信息。
+
+        Raises:
+            ValueError: 如果输入变量不存在或分类失败且没有默认分类。
+        """
+        logger.info("--- Executing %s (async) ---", self)
+        logger.debug("  Input Context: %s", context)
+
+        input_text = self._get_input_text(context)
+        if self._abatcher is not None:
+            return self._apply_result(context, await self._abatcher.submit(input_text))
+
+        cached = self._lookup_cache(input_text)
+        if cached is not None:
+            return self._apply_result(context, cached)
+        local_result = self._classify_locally(input_text)
+        if local_result is not None:
+            return self._apply_result(context, local_result)
+
+        classification_prompt = self._prepare_classification_prompt(input_text)
+        
+        try:
+            llm_response = await self._ainvoke(classification_prompt)
+            return self._apply_classification(context, llm_response, input_text)
+        except Exception as e:
+            return self._handle_classification_error(context, e)
+
+    def _get_input_text(self, context: WorkflowContext) -> Any:
+        """读取待分类的输入文本"""
         # 检查输入变量是否存在
         if self.input_variable_name not in context:
             raise ValueError(
                 f"ConditionalBranchNode '{self.node_id}': Required input variable "
                 f"'{self.input_variable_name}' not found in context."
             )
+        return context[self.input_variable_name]
 
-        input_text = context[self.input_variable_name]
-        
-        # 生成分类提示词
+    def _classify_locally(self, input_text: Any) -> Optional[Dict[str, Any]]:
+        """
+        尝试用本地分类器分类，并记录分类来源。
+
+        Returns:
+            Optional[Dict[str, Any]]: 本地结果足够可靠时返回分类结果，否则返回None（需要调用LLM）
+        """
+        prediction = self.local_classifier.classify(input_text) if self.local_classifier else None
+        with self._stats_lock:
+            if prediction is None:
+                self.stats.llm_items += 1
+            else:
+                self.stats.local_hits += 1
+        if prediction is None:
+            return None
+
+        logger.info("  Local classifier chose %s (similarity %.2f)", prediction.class_name, prediction.confidence)
+        return {
+            "class_name": prediction.class_name,
+            "confidence": round(prediction.confidence, 4),
+            "reason": f"Matched class examples locally (similarity {prediction.confidence:.2f})",
+            "source": "local"
+        }
+
+    def _prepare_classification_prompt(self, input_text: Any) -> str:
+        """生成分类提示词"""
         classification_prompt = self._format_classification_prompt(input_text)
-        print(f"  Classification Prompt: {classification_prompt[:100]}...")
+        logger.debug("  Classification Prompt: %s...", classification_prompt[:100])
+        return classification_prompt
+
+    def _apply_classification(self, context: WorkflowContext, llm_response: str,
+                              input_text: Any = None) -> WorkflowContext:
+        """解析LLM响应，并将分类结果和下一个节点ID写入上下文"""
+        logger.debug("  LLM Response: %s", llm_response)
+        
+        # 提取分类结果
+        classification = self._extract_classification(llm_response, input_text)
+        logger.debug("  Extracted Classification: %s", classification)
+        return self._apply_result(context, classification)
+
+    def _apply_result(self, context: WorkflowContext, classification: Dict[str, Any]) -> WorkflowContext:
+        """将分类结果和下一个节点ID写入上下文"""
+        # 获取下一个节点ID
+        next_node_id = self._get_next_node_id(classification["class_name"])
+        logger.debug("  Next Node ID: %s", next_node_id)
+        
+        # 更新上下文
+        updated_context = context.copy()
+        
+        # 添加分类结果
+        updated_context[self.output_variable_name] = classification
+        
+        # 添加下一个节点ID
+        updated_context["next_node_id"] = next_node_id
         
+        # 如果需要，添加分类原因
+        if self.output_reason and "reason" in classification:
+            updated_context[f"{self.output_variable_name}_reason"] = classification["reason"]
+        
+        logger.debug("  Output Context: %s", updated_context)
+        logger.info("--- Finished %s ---", self)
+        
+        return updated_context
+
+    def _handle_classification_error(self, context: WorkflowContext, error: Exception) -> WorkflowContext:
+        """分类失败时回退到默认分类，没有默认分类则抛出异常"""
+        outcome = self._error_outcome(error)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return self._apply_result(context, outcome)
+
+    def _error_outcome(self, error: Exception) -> Union[Dict[str, Any], Exception]:
+        """分类失败时的结果：有默认分类时返回默认分类结果，否则返回要抛出的异常"""
+        logger.warning("  Error in classification: %s", error)
+
+        # 如果有默认分类，使用它
+        if self.default_class:
+            logger.info("  Using default class: %s", self.default_class.name)
+            return {
+                "class_name": self.default_class.name,
+                "confidence": 0,
+                "reason": f"Error occurred: {str(error)}"
+            }
+        # 没有默认分类，抛出异常
+        return ValueError(f"Classification failed and no default class provided: {str(error)}")
+
+    def _checked_outcome(self, classification: Dict[str, Any]) -> Union[Dict[str, Any], Exception]:
+        """检查分类结果能否确定下一个节点"""
         try:
-            # 调用LLM进行分类
-            llm_response = self.llm_client.invoke(classification_prompt)
-            print(f"  LLM Response: {llm_response}")
-            
-            # 提取分类结果
-            classification = self._extract_classification(llm_response)
-            print(f"  Extracted Classification: {classification}")
-            
-            # 获取下一个节点ID
-            next_node_id = self._get_next_node_id(classification["class_name"])
-            print(f"  Next Node ID: {next_node_id}")
-            
-            # 更新上下文
-            updated_context = context.copy()
-            
-            # 添加分类结果
-            updated_context[self.output_variable_name] = classification
-            
-            # 添加下一个节点ID
-            updated_context["next_node_id"] = next_node_id
-            
-            # 如果需要，添加分类原因
-            if self.output_reason and "reason" in classification:
-                updated_context[f"{self.output_variable_name}_reason"] = classification["reason"]
-            
-            print(f"  Output Context: {updated_context}")
-            print(f"--- Finished {self} ---")
-            
-            return updated_context
-            
-        except Exception as e:
-            print(f"  Error in classification: {e}")
-            
-            # 如果有默认分类，使用它
-            if self.default_class:
-                print(f"  Using default class: {self.default_class.name}")
-                
-                # 更新上下文
-                updated_context = context.copy()
-                updated_context[self.output_variable_name] = {
-                    "class_name": self.default_class.name,
-                    "confidence": 0,
-                    "reason": f"Error occurred: {str(e)}"
-                }
-                updated_context["next_node_id"] = self.default_class.next_node_id
-                
-                print(f"  Output Context: {updated_context}")
-                print(f"--- Finished {self} ---")
-                
-                return updated_context
+            self._get_next_node_id(classification["class_name"])
+        except ValueError as e:
+            return self._error_outcome(e)
+        return classification
+
+    def classify_batch(self, texts: List[Any]) -> List[Dict[str, Any]]:
+        """
+        批量分类。
+
+        本地分类器能确定的输入不调用LLM；其余输入每batch_size个打包成一个提示词，
+        要求LLM返回带编号的JSON数组，再按编号分发回各个输入。批量结果中缺失或无效的输入
+        会单独调用LLM分类。
+
+        Args:
+            texts (List[Any]): 待分类的输入列表。
+
+        Returns:
+            List[Dict[str, Any]]: 与输入一一对应的分类结果。
+
+        Raises:
+            ValueError: 如果某个输入分类失败且没有默认分类。
+        """
+        return [self._raise_if_error(outcome) for outcome in self._classify_batch_outcomes(texts)]
+
+    async def aclassify_batch(self, texts: List[Any]) -> List[Dict[str, Any]]:
+        """
+        异步批量分类，多个批量提示词并发发送。参数和返回值与classify_batch相同。
+        """
+        return [self._raise_if_error(outcome) for outcome in await self._aclassify_batch_outcomes(texts)]
+
+    @staticmethod
+    def _raise_if_error(outcome: Union[Dict[str, Any], Exception]) -> Dict[str, Any]:
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def _split_batch(self, texts: List[Any]) -> Tuple[List[Any], List[List[int]]]:
+        """先用本地分类器分类，返回结果列表和需要LLM分类的输入下标（按batch_size分组）"""
+        outcomes: List[Any] = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            result = self._lookup_cache(text)
+            if result is None:
+                result = self._classify_locally(text)
+            if result is not None:
+                outcomes[i] = result
             else:
-                # 没有默认分类，抛出异常
-                raise ValueError(f"Classification failed and no default class provided: {str(e)}")
+                pending.append(i)
+        chunks = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        return outcomes, chunks
+
+    def _classify_batch_outcomes(self, texts: List[Any]) -> List[Union[Dict[str, Any], Exception]]:
+        """批量分类，失败的输入对应的结果是异常实例"""
+        outcomes, chunks = self._split_batch(texts)
+        for chunk in chunks:
+            chunk_texts = [texts[i] for i in chunk]
+            try:
+                response = self._invoke_batch_prompt(chunk_texts)
+                parsed = self._parse_batch_response(response, len(chunk))
+            except Exception as e:
+                logger.warning("  Batch classification failed, classifying items one by one: %s", e)
+                parsed = [None] * len(chunk)
+            for i, classification in zip(chunk, parsed):
+                if classification is None:
+                    classification = self._classify_single(texts[i])
+                else:
+                    self._store_cache(texts[i], classification)
+                if not isinstance(classification, Exception):
+                    classification = self._checked_outcome(classification)
+                outcomes[i] = classification
+        return outcomes
+
+    async def _aclassify_batch_outcomes(self, texts: List[Any]) -> List[Union[Dict[str, Any], Exception]]:
+        """异步批量分类，失败的输入对应的结果是异常实例"""
+        outcomes, chunks = self._split_batch(texts)
+
+        async def run_chunk(chunk: List[int]) -> None:
+            chunk_texts = [texts[i] for i in chunk]
+            try:
+                response = await self._ainvoke_batch_prompt(chunk_texts)
+                parsed = self._parse_batch_response(response, len(chunk))
+            except Exception as e:
+                logger.warning("  Batch classification failed, classifying items one by one: %s", e)
+                parsed = [None] * len(chunk)
+            for i, classification in zip(chunk, parsed):
+                if classification is None:
+                    classification = await self._aclassify_single(texts[i])
+                else:
+                    self._store_cache(texts[i], classification)
+                if not isinstance(classification, Exception):
+                    classification = self._checked_outcome(classification)
+                outcomes[i] = classification
+
+        await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        return outcomes
+
+    def _format_batch_prompt(self, texts: List[Any]) -> str:
+        """格式化批量分类提示词，输入以JSON字符串形式编号列出"""
+        items = "\n".join(f"[{i}] {json.dumps(str(text), ensure_ascii=False)}" for i, text in enumerate(texts))
+        return f"{self._batch_prompt_prefix}{items}{self._batch_prompt_suffix}"
+
+    def _invoke_batch_prompt(self, texts: List[Any]) -> str:
+        response = self._invoke(self._format_batch_prompt(texts))
+        with self._stats_lock:
+            self.stats.batch_calls += 1
+        return response
+
+    async def _ainvoke_batch_prompt(self, texts: List[Any]) -> str:
+        response = await self._ainvoke(self._format_batch_prompt(texts))
+        with self._stats_lock:
+            self.stats.batch_calls += 1
+        return response
+
+    def _invoke(self, prompt: str) -> str:
+        """调用LLM并记录调用次数"""
+        self._record_llm_call()
+        return self.llm_client.invoke(prompt)
+
+    def _record_llm_call(self) -> None:
+        with self._stats_lock:
+            self.stats.llm_calls += 1
+
+    async def _ainvoke(self, prompt: str) -> str:
+        """客户端原生实现ainvoke时直接等待，否则在线程池中运行同步invoke"""
+        from ...llm.base_client import has_native_async
+        self._record_llm_call()
+        if has_native_async(self.llm_client, 'ainvoke'):
+            return await self.llm_client.ainvoke(prompt)
+        return await asyncio.to_thread(self.llm_client.invoke, prompt)
+
+    def _parse_batch_response(self, llm_response: str, count: int) -> List[Optional[Dict[str, Any]]]:
+        """
+        解析批量分类响应。
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: 按编号排列的分类结果，缺失或不符合schema的位置为None
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * count
+        for value, _, _ in iter_json_values(llm_response, allow_arrays=True):
+            if isinstance(value, dict) and isinstance(value.get("results"), list):
+                value = value["results"]
+            if isinstance(value, list):
+                break
+        else:
+            raise ValueError("No JSON array found in batch classification response")
+
+        for item in value:
+            if not isinstance(item, dict):
+                continue
+            index = item.pop("index", None)
+            if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < count:
+                continue
+            try:
+                validate_json(item, CLASSIFICATION_SCHEMA)
+            except Exception as e:
+                logger.debug("  Invalid batch item %s: %s", index, e)
+                continue
+            results[index] = item
+        return results
+
+    def _classify_single(self, input_text: Any) -> Union[Dict[str, Any], Exception]:
+        """单独调用LLM分类一个输入"""
+        try:
+            llm_response = self._invoke(self._prepare_classification_prompt(input_text))
+            return self._extract_classification(llm_response, input_text)
+        except Exception as e:
+            return self._error_outcome(e)
+
+    async def _aclassify_single(self, input_text: Any) -> Union[Dict[str, Any], Exception]:
+        """单独异步调用LLM分类一个输入"""
+        try:
+            llm_response = await self._ainvoke(self._prepare_classification_prompt(input_text))
+            return self._extract_classification(llm_response, input_text)
+        except Exception as e:
+            return self._error_outcome(e)
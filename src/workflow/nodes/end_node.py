@@ -1,6 +1,9 @@
+import logging
 from typing import List
 from ..base import BaseNode, WorkflowContext
 
+logger = logging.getLogger(__name__)
+
 class EndNode(BaseNode):
     """
     工作流的结束节点。
@@ -17,6 +20,14 @@ class EndNode(BaseNode):
         super().__init__(node_id, node_name)
         self.input_variable_names = input_variable_names
 
+    def get_input_variables(self) -> List[str]:
+        """返回节点读取的上下文变量名"""
+        return list(self.input_variable_names)
+
+    def get_output_variables(self) -> List[str]:
+        """返回节点写入的上下文变量名"""
+        return []
+
     def execute(self, context: WorkflowContext) -> WorkflowContext:
         """
         执行结束节点逻辑。
@@ -28,8 +39,8 @@ class EndNode(BaseNode):
         Returns:
             WorkflowContext: 最终的上下文。
         """
-        print(f"--- Executing {self} ---")
-        print(f"  Input Context: {context}")
+        logger.info("--- Executing %s ---", self)
+        logger.debug("  Input Context: %s", context)
         final_output = {}
         
         for var_name in self.input_variable_names:
@@ -37,8 +48,12 @@ class EndNode(BaseNode):
                 raise ValueError(f"EndNode '{self.node_id}': Expected final variable '{var_name}' not found in context.")
             final_output[var_name] = context[var_name]
 
-        print(f"  Final Workflow Variables Extracted: {final_output}")
-        print(f"  Output Context: {context}")
-        print(f"--- Finished {self} ---")
+        logger.debug("  Final Workflow Variables Extracted: %s", final_output)
+        logger.debug("  Output Context: %s", context)
+        logger.info("--- Finished %s ---", self)
         # EndNode通常是最后一个节点，返回最终上下文
         return context
+
+    async def aexecute(self, context: WorkflowContext) -> WorkflowContext:
+        """异步执行节点逻辑。结束节点只做变量提取，不涉及IO，直接在事件循环中同步执行。"""
+        return self.execute(context)
@@ -1,10 +1,18 @@
-from typing import Optional, Callable, Any
+import logging
+from typing import List, Optional, Callable, Any, Tuple
 from ..base import BaseNode, WorkflowContext
+from ..checkpoint import WorkflowSuspended, current_frame
+
+logger = logging.getLogger(__name__)
 
 class InputNode(BaseNode):
     """
     用于获取用户输入的交互节点。
     允许工作流在执行中暂停并获取用户输入。
+    
+    默认在当前线程中通过input()读取输入。设置suspend=True后节点不阻塞：
+    在带检查点存储的工作流中记录暂停位置并抛出WorkflowSuspended，
+    之后通过Workflow.submit_input(run_id, value)提交输入继续运行。
     """
     def __init__(
         self,
@@ -15,6 +23,7 @@ class InputNode(BaseNode):
         default_value: Optional[Any] = None,     # 可选的默认值
         validation_func: Optional[Callable[[str], bool]] = None,  # 可选的验证函数
         next_node_id: Optional[str] = None,      # 下一个节点ID
+        suspend: bool = False,                   # 是否暂停工作流等待提交输入，而不是调用input()
     ):
         super().__init__(node_id, node_name)
         self.prompt_text = prompt_text
@@ -22,7 +31,16 @@ class InputNode(BaseNode):
         self.default_value = default_value
         self.validation_func = validation_func
         self.next_node_id = next_node_id
+        self.suspend = suspend
         
+    def get_input_variables(self) -> List[str]:
+        """返回节点读取的上下文变量名"""
+        return []
+
+    def get_output_variables(self) -> List[str]:
+        """返回节点写入的上下文变量名"""
+        return [self.output_variable_name]
+
     def execute(self, context: WorkflowContext) -> WorkflowContext:
         """
         执行输入节点逻辑：显示提示、获取输入、验证输入并更新上下文。
@@ -32,30 +50,17 @@ class InputNode(BaseNode):
             
         Returns:
             WorkflowContext: 更新后的工作流上下文，包含用户输入
+            
+        Raises:
+            WorkflowSuspended: 设置了suspend且还没有提交有效输入时
+            RuntimeError: 设置了suspend但工作流没有检查点存储时
         """
-        print(f"--- 执行 {self} ---")
+        logger.info("--- 执行 %s ---", self)
         
-        # 显示提示并获取用户输入
-        print(f"\n{self.prompt_text}")
-        
-        # 获取有效输入
-        valid_input = False
-        user_input = None
-        
-        while not valid_input:
-            user_input = input("> ")
-            
-            # 如果用户未输入且有默认值，使用默认值
-            if not user_input and self.default_value is not None:
-                user_input = self.default_value
-                print(f"使用默认值: {user_input}")
-            
-            # 验证输入
-            if self.validation_func and not self.validation_func(user_input):
-                print("输入无效，请重新输入")
-                continue
-                
-            valid_input = True
+        if self.suspend:
+            user_input = self._take_submitted_input()
+        else:
+            user_input = self._read_input()
         
         # 更新上下文
         updated_context = context.copy()
@@ -65,7 +70,60 @@ class InputNode(BaseNode):
         if self.next_node_id:
             updated_context["next_node_id"] = self.next_node_id
             
-        print(f"  已保存输入到变量: {self.output_variable_name}")
-        print(f"--- 完成 {self} ---")
+        logger.debug("  已保存输入到变量: %s", self.output_variable_name)
+        logger.info("--- 完成 %s ---", self)
         
         return updated_context
+    
+    def _read_input(self) -> Any:
+        """显示提示，通过input()读取输入直到通过验证"""
+        # 显示提示并获取用户输入
+        print(f"\n{self.prompt_text}")
+        
+        while True:
+            user_input = input("> ")
+            
+            # 如果用户未输入且有默认值，使用默认值
+            if not user_input and self.default_value is not None:
+                print(f"使用默认值: {self.default_value}")
+            
+            valid_input, user_input = self._accept_input(user_input)
+            if valid_input:
+                return user_input
+            print("输入无效，请重新输入")
+    
+    def _take_submitted_input(self) -> Any:
+        """
+        取出恢复运行时提交的输入；没有提交或输入未通过验证时记录暂停位置并暂停工作流。
+        """
+        frame = current_frame()
+        if frame is None:
+            raise RuntimeError(f"InputNode '{self.node_id}' can only suspend in a workflow with a checkpoint store")
+        
+        submitted, user_input = frame.take_input(self.node_id)
+        if submitted:
+            valid_input, value = self._accept_input(user_input)
+            if valid_input:
+                return value
+            logger.info("  提交的输入无效: %r", user_input)
+        
+        frame.suspend(self.node_id, self.prompt_text, self.output_variable_name)
+        logger.info("  等待输入，暂停运行 %s", frame.run_id)
+        raise WorkflowSuspended(frame.run_id, self.node_id, self.prompt_text, self.output_variable_name,
+                                invalid_input=user_input if submitted else None)
+    
+    def _accept_input(self, user_input: Any) -> Tuple[bool, Any]:
+        """
+        应用默认值并验证输入。
+        
+        Returns:
+            Tuple[bool, Any]: (是否有效, 使用的输入)
+        """
+        # 如果用户未输入且有默认值，使用默认值
+        if not user_input and self.default_value is not None:
+            user_input = self.default_value
+        
+        # 验证输入
+        if self.validation_func and not self.validation_func(user_input):
+            return False, user_input
+        return True, user_input
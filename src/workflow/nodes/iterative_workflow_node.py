@@ -1,11 +1,15 @@
 """
 迭代工作流节点实现，支持重复执行子工作流直到满足条件。
 """
+import logging
 from typing import List, Optional, Dict, Any, Callable, Union, Literal
 import json
 
 from ..base import BaseNode, WorkflowContext
-from ..engine import Workflow
+from ..checkpoint import WorkflowSuspended
+from ..engine import AsyncWorkflow
+
+logger = logging.getLogger(__name__)
 
 class IterativeWorkflowNode(BaseNode):
     """
@@ -57,14 +61,26 @@ class IterativeWorkflowNode(BaseNode):
         
         # 验证节点列表并创建子工作流
         self._validate_nodes(nodes)
-        self.workflow = Workflow(nodes)
+        self.workflow = AsyncWorkflow(nodes)
         
         # 验证结果收集配置
         self._validate_result_collection()
     
+    def get_input_variables(self) -> List[str]:
+        """返回节点读取的上下文变量名"""
+        return list(self.input_mapping.keys())
+
+    def get_output_variables(self) -> List[str]:
+        """返回节点写入的上下文变量名"""
+        outputs = list(self.output_mapping.values())
+        if self.result_variable:
+            outputs.append(self.result_variable)
+        outputs.append("_iterations_completed")
+        return outputs
+
     def execute(self, context: WorkflowContext) -> WorkflowContext:
         """执行迭代工作流节点"""
-        print(f"--- Executing {self} ---")
+        logger.info("--- Executing %s ---", self)
         
         # 初始化变量
         iteration_count = 0
@@ -74,49 +90,114 @@ class IterativeWorkflowNode(BaseNode):
         
         # 执行迭代循环
         while self._should_continue(iteration_context, iteration_count):
-            print(f"  Starting iteration {iteration_count + 1}")
+            logger.info("  Starting iteration %s", iteration_count + 1)
             
             try:
                 # 执行子工作流
                 iteration_context = self.workflow.run(iteration_context)
                 final_context = iteration_context  # 保存最后一次执行的结果
                 
-                # 收集结果
-                if self.result_variable:
-                    # 从输出映射的变量中收集结果
-                    for var_name in self.output_mapping.keys():
-                        if var_name in iteration_context:
-                            result = iteration_context[var_name]
-                            self._collect_result(results, result)
-                            print(f"  Collected result from variable '{var_name}'")
-                            break
-                
-                # 准备下一次迭代
+                # 收集结果并准备下一次迭代
                 iteration_count += 1
-                iteration_context["_iteration_count"] = iteration_count
+                iteration_context = self._finish_iteration(iteration_context, iteration_count, results)
+                
+            except WorkflowSuspended:
+                # 暂停等待输入不是失败，交给上层工作流处理
+                raise
+            except Exception as e:
+                logger.error("  Iteration %s failed: %s", iteration_count + 1, e)
+                raise RuntimeError(f"IterativeWorkflowNode failed: {e}") from e
+        
+        return self._build_output_context(context, final_context, results, iteration_count)
+    
+    async def aexecute(self, context: WorkflowContext) -> WorkflowContext:
+        """异步执行迭代工作流节点，每轮迭代通过子工作流的arun执行"""
+        logger.info("--- Executing %s (async) ---", self)
+        
+        iteration_count = 0
+        iteration_context = self._prepare_initial_context(context)
+        results = []
+        final_context = None
+        
+        while self._should_continue(iteration_context, iteration_count):
+            logger.info("  Starting iteration %s", iteration_count + 1)
+            
+            try:
+                iteration_context = await self.workflow.arun(iteration_context)
+                final_context = iteration_context
                 
-                # 应用迭代间变量映射
-                if self.iteration_mapping:
-                    mapped_context = {}
-                    for src_var, dest_var in self.iteration_mapping.items():
-                        if src_var in iteration_context:
-                            mapped_context[dest_var] = iteration_context[src_var]
-                    
-                    # 合并其他必要变量
-                    for var in iteration_context:
-                        if var not in mapped_context and not var.startswith("_"):
-                            mapped_context[var] = iteration_context[var]
-                    
-                    # 保留特殊变量
-                    mapped_context["_iteration_count"] = iteration_count
-                    
-                    iteration_context = mapped_context
+                iteration_count += 1
+                iteration_context = self._finish_iteration(iteration_context, iteration_count, results)
                 
+            except WorkflowSuspended:
+                # 暂停等待输入不是失败，交给上层工作流处理
+                raise
             except Exception as e:
-                print(f"  Iteration {iteration_count + 1} failed: {e}")
+                logger.error("  Iteration %s failed: %s", iteration_count + 1, e)
                 raise RuntimeError(f"IterativeWorkflowNode failed: {e}") from e
         
-        print(f"  Completed after {iteration_count} iterations")
+        return self._build_output_context(context, final_context, results, iteration_count)
+    
+    def _finish_iteration(self, iteration_context: WorkflowContext, iteration_count: int,
+                          results: list) -> WorkflowContext:
+        """
+        收集本轮迭代的结果，并准备下一轮迭代的上下文。
+        
+        Args:
+            iteration_context: 本轮迭代执行后的上下文
+            iteration_count: 已完成的迭代次数
+            results: 结果收集列表
+            
+        Returns:
+            下一轮迭代的上下文
+        """
+        # 收集结果
+        if self.result_variable:
+            # 从输出映射的变量中收集结果
+            for var_name in self.output_mapping.keys():
+                if var_name in iteration_context:
+                    result = iteration_context[var_name]
+                    self._collect_result(results, result)
+                    logger.debug("  Collected result from variable '%s'", var_name)
+                    break
+        
+        iteration_context["_iteration_count"] = iteration_count
+        
+        # 应用迭代间变量映射
+        if self.iteration_mapping:
+            # 基于写时复制的副本修改，只有映射和删除的变量产生开销
+            mapped_context = iteration_context.copy()
+            
+            # 去掉特殊控制变量
+            for var in [var for var in mapped_context if var.startswith("_")]:
+                del mapped_context[var]
+            
+            for src_var, dest_var in self.iteration_mapping.items():
+                if src_var in iteration_context:
+                    mapped_context[dest_var] = iteration_context[src_var]
+            
+            # 保留特殊变量
+            mapped_context["_iteration_count"] = iteration_count
+            
+            iteration_context = mapped_context
+        
+        return iteration_context
+    
+    def _build_output_context(self, context: WorkflowContext, final_context: Optional[WorkflowContext],
+                              results: list, iteration_count: int) -> WorkflowContext:
+        """
+        迭代结束后构建返回给主工作流的上下文。
+        
+        Args:
+            context: 主工作流上下文
+            final_context: 最后一次迭代执行后的上下文（没有执行任何迭代时为None）
+            results: 收集的结果列表
+            iteration_count: 完成的迭代次数
+            
+        Returns:
+            更新后的主工作流上下文
+        """
+        logger.info("  Completed after %s iterations", iteration_count)
         
         # 准备返回上下文
         updated_context = context.copy()
@@ -126,7 +207,7 @@ class IterativeWorkflowNode(BaseNode):
             for iter_var, main_var in self.output_mapping.items():
                 if iter_var in final_context:
                     updated_context[main_var] = final_context[iter_var]
-                    print(f"  Mapped output '{iter_var}' to '{main_var}'")
+                    logger.debug("  Mapped output '%s' to '%s'", iter_var, main_var)
         
         # 添加结果集合
         if self.result_variable and results:
@@ -159,17 +240,17 @@ class IterativeWorkflowNode(BaseNode):
         """
         # 检查最大迭代次数
         if iteration_count >= self.max_iterations:
-            print(f"  Reached maximum iterations limit ({self.max_iterations})")
+            logger.info("  Reached maximum iterations limit (%s)", self.max_iterations)
             return False
         
         # 应用用户定义的条件函数
         try:
             should_continue = self.condition_function(context)
             if not should_continue:
-                print("  Iteration condition evaluated to False, stopping iterations")
+                logger.info("  Iteration condition evaluated to False, stopping iterations")
             return should_continue
         except Exception as e:
-            print(f"  Error in condition function: {e}")
+            logger.error("  Error in condition function: %s", e)
             # 条件函数出错时默认停止迭代
             return False
 
@@ -190,7 +271,7 @@ class IterativeWorkflowNode(BaseNode):
             if main_var in main_context:
                 iteration_context[iter_var] = main_context[main_var]
             else:
-                print(f"  Warning: Input variable '{main_var}' not found in main context")
+                logger.warning("  Input variable '%s' not found in main context", main_var)
         
         # 初始化迭代计数
         iteration_context["_iteration_count"] = 0
@@ -213,9 +294,9 @@ class IterativeWorkflowNode(BaseNode):
         for src_var, dest_var in self.iteration_mapping.items():
             if src_var in current_context:
                 next_context[dest_var] = current_context[src_var]
-                print(f"  Iteration mapping: '{src_var}' -> '{dest_var}'")
+                logger.debug("  Iteration mapping: '%s' -> '%s'", src_var, dest_var)
             else:
-                print(f"  Warning: Iteration variable '{src_var}' not found for mapping")
+                logger.warning("  Iteration variable '%s' not found for mapping", src_var)
         
         # 保留特殊控制变量和其他必要变量
         if "_iteration_count" in current_context:
@@ -297,9 +378,9 @@ class IterativeWorkflowNode(BaseNode):
         for iter_var, main_var in self.output_mapping.items():
             if iter_var in final_iter_context:
                 updated_context[main_var] = final_iter_context[iter_var]
-                print(f"  Mapped '{iter_var}' to '{main_var}': {final_iter_context[iter_var]}")
+                logger.debug("  Mapped '%s' to '%s': %s", iter_var, main_var, final_iter_context[iter_var])
             else:
-                print(f"  Warning: Output variable '{iter_var}' not found in final iteration context")
+                logger.warning("  Output variable '%s' not found in final iteration context", iter_var)
         
         # 添加收集的结果（如果有）
         if self.result_variable and collected_results:
@@ -348,4 +429,4 @@ class IterativeWorkflowNode(BaseNode):
         # 检查节点类型和结构
         from ..nodes.start_node import StartNode
         if not isinstance(nodes[0], StartNode):
-            print("  Warning: First node in iterative workflow is not a StartNode")
+            logger.warning("  First node in iterative workflow is not a StartNode")
@@ -1,7 +1,13 @@
-from typing import Any, Optional, Dict, Union
+import logging
+from typing import Any, List, Optional, Dict, Union
 import json
 import re
 from ..base import BaseNode, WorkflowContext
+from ..json_scanner import (IncrementalJSONScanner, decode_json_at, find_json_start,
+                            is_truncated_json_error)
+from ..schema_validation import validate_json
+
+logger = logging.getLogger(__name__)
 
 class JSONExtractorNode(BaseNode):
     """
@@ -16,7 +22,8 @@ class JSONExtractorNode(BaseNode):
         output_variable_name: str,
         schema: Optional[Dict] = None,
         default_value: Optional[Any] = None,
-        raise_on_error: bool = True
+        raise_on_error: bool = True,
+        allow_arrays: bool = False
     ):
         """
         初始化JSON提取器节点。
@@ -29,6 +36,7 @@ class JSONExtractorNode(BaseNode):
             schema (Optional[Dict]): JSON Schema用于验证提取的数据（可选）。
             default_value (Optional[Any]): 提取失败时的默认值（可选）。
             raise_on_error (bool): 是否在提取失败时抛出异常。
+            allow_arrays (bool): 是否也提取顶层JSON数组，默认只提取对象。
         """
         super().__init__(node_id, node_name)
         self.input_variable_name = input_variable_name
@@ -36,10 +44,14 @@ class JSONExtractorNode(BaseNode):
         self.schema = schema
         self.default_value = default_value
         self.raise_on_error = raise_on_error
+        self.allow_arrays = allow_arrays
 
-    def _extract_json(self, text: str) -> Union[Dict, Any]:
+    def extract(self, text: str) -> Union[Dict, Any]:
         """
-        从文本中提取JSON数据。
+        从文本中提取JSON数据，供LLMNode、ConditionalBranchNode等复用提取器配置的节点调用。
+
+        依次尝试文本中的每个候选对象（allow_arrays为True时也包括数组），
+        返回第一个能够解析并通过schema验证的值。
 
         Args:
             text (str): 可能包含JSON的文本。
@@ -50,48 +62,92 @@ class JSONExtractorNode(BaseNode):
         Raises:
             ValueError: 如果无法提取有效的JSON且raise_on_error为True。
         """
-        # 尝试查找 { 和 } 之间的内容
-        start_pos = text.find('{')
-        if start_pos == -1:
-            if self.raise_on_error:
-                raise ValueError("No JSON object found in the input text")
-            return self.default_value
-        
-        # 从找到的 { 开始逐个字符扫描，计数括号的嵌套层级
-        level = 0
-        pos = start_pos
-        
-        while pos < len(text):
-            char = text[pos]
-            if char == '{':
-                level += 1
-            elif char == '}':
-                level -= 1
-                if level == 0:
-                    # 找到匹配的结束括号
-                    json_str = text[start_pos:pos + 1]
-                    try:
-                        data = json.loads(json_str)
-                        # 如果提供了schema，验证数据
-                        if self.schema:
-                            from jsonschema import validate  # 可选依赖
-                            validate(instance=data, schema=self.schema)
-                        return data
-                    except json.JSONDecodeError:
-                        if self.raise_on_error:
-                            raise ValueError("Invalid JSON format")
-                        return self.default_value
-                    except Exception as e:
-                        if self.raise_on_error:
-                            raise ValueError(f"JSON validation failed: {str(e)}")
-                        return self.default_value
-            pos += 1
-        
-        # 如果没有找到匹配的结束括号
+        start = find_json_start(text, 0, self.allow_arrays)
+        if start == -1:
+            return self._fail("No JSON object found in the input text")
+
+        parse_error: Optional[str] = None
+        validation_error: Optional[ValueError] = None
+        while start != -1:
+            try:
+                data, end = decode_json_at(text, start)
+            except json.JSONDecodeError as e:
+                if parse_error is None:
+                    parse_error = ("No complete JSON object found in the input text"
+                                   if is_truncated_json_error(e) else "Invalid JSON format")
+                start = find_json_start(text, start + 1, self.allow_arrays)
+                continue
+
+            try:
+                return self._validate_schema(data)
+            except ValueError as e:
+                # 不符合schema，继续尝试后面的候选
+                if validation_error is None:
+                    validation_error = e
+            start = find_json_start(text, end, self.allow_arrays)
+
+        if validation_error is not None:
+            return self._fail(str(validation_error))
+        return self._fail(parse_error)
+
+    def _fail(self, message: str) -> Any:
+        """提取失败：根据raise_on_error抛出异常或返回默认值"""
         if self.raise_on_error:
-            raise ValueError("No complete JSON object found in the input text")
+            raise ValueError(message)
         return self.default_value
 
+    def _validate_schema(self, data: Any) -> Any:
+        """
+        如果提供了schema，验证提取出的数据。
+
+        Args:
+            data (Any): 解析出的JSON数据。
+
+        Returns:
+            Any: 验证通过的数据。
+
+        Raises:
+            ValueError: 如果验证失败。
+        """
+        if not self.schema:
+            return data
+        try:
+            # 验证器按schema缓存，简单schema不经过jsonschema
+            validate_json(data, self.schema)
+        except Exception as e:
+            raise ValueError(f"JSON validation failed: {str(e)}")
+        return data
+
+    def extract_from_scanner(self, scanner: IncrementalJSONScanner, text: str) -> Any:
+        """
+        使用流式扫描结果提取JSON，扫描器没有找到完整JSON时对完整文本执行常规提取。
+
+        Args:
+            scanner (IncrementalJSONScanner): 已经读取过流式响应的扫描器。
+            text (str): 已接收的完整文本。
+
+        Returns:
+            Any: 提取的JSON数据，失败且raise_on_error为False时返回默认值。
+
+        Raises:
+            ValueError: 如果无法提取有效的JSON且raise_on_error为True。
+        """
+        if scanner.found:
+            try:
+                return self._validate_schema(scanner.value)
+            except ValueError:
+                # 第一个对象不符合schema时，在完整文本中继续尝试其他候选
+                pass
+        return self.extract(text)
+
+    def get_input_variables(self) -> List[str]:
+        """返回节点读取的上下文变量名"""
+        return [self.input_variable_name]
+
+    def get_output_variables(self) -> List[str]:
+        """返回节点写入的上下文变量名"""
+        return [self.output_variable_name]
+
     def execute(self, context: WorkflowContext) -> WorkflowContext:
         """
         执行JSON提取节点逻辑。
@@ -105,8 +161,8 @@ class JSONExtractorNode(BaseNode):
         Raises:
             ValueError: 如果输入变量不存在或JSON提取失败且raise_on_error为True。
         """
-        print(f"--- Executing {self} ---")
-        print(f"  Input Context: {context}")
+        logger.info("--- Executing %s ---", self)
+        logger.debug("  Input Context: %s", context)
 
         # 检查输入变量是否存在
         if self.input_variable_name not in context:
@@ -119,20 +175,24 @@ class JSONExtractorNode(BaseNode):
         
         try:
             # 提取JSON
-            json_data = self._extract_json(input_text)
-            print(f"  Extracted JSON: {json_data}")
+            json_data = self.extract(input_text)
+            logger.debug("  Extracted JSON: %s", json_data)
         except Exception as e:
             if self.raise_on_error:
-                print(f"  Error extracting JSON: {e}")
+                logger.error("  Error extracting JSON: %s", e)
                 raise
             json_data = self.default_value
-            print(f"  Using default value: {json_data}")
+            logger.debug("  Using default value: %s", json_data)
 
         # 更新上下文
         updated_context = context.copy()
         updated_context[self.output_variable_name] = json_data
         
-        print(f"  Output Context: {updated_context}")
-        print(f"--- Finished {self} ---")
+        logger.debug("  Output Context: %s", updated_context)
+        logger.info("--- Finished %s ---", self)
         
         return updated_context
+
+    async def aexecute(self, context: WorkflowContext) -> WorkflowContext:
+        """异步执行节点逻辑。JSON提取是纯CPU操作，不涉及IO，直接在事件循环中同步执行。"""
+        return self.execute(context)
@@ -1,6 +1,14 @@
+import logging
 from typing import List, Any, Optional, Iterator, Callable
 from ..base import BaseNode, WorkflowContext
+import asyncio
 import re
+from ..log import is_verbose
+from ..prompt_template import PromptTemplate
+from ..stream_buffer import StreamBuffer
+from ..json_scanner import IncrementalJSONScanner
+
+logger = logging.getLogger(__name__)
 
 class LLMNode(BaseNode):
     """
@@ -14,7 +22,11 @@ class LLMNode(BaseNode):
                  stream: bool = False,
                  stream_callback: Optional[Callable[[str], None]] = None,
                  next_node_id: Optional[str] = None,
-                 next_node_selector: Optional[Callable[[WorkflowContext], str]] = None): 
+                 next_node_selector: Optional[Callable[[WorkflowContext], str]] = None,
+                 retry_policy: Optional[Any] = None,
+                 max_response_chars: Optional[int] = None,
+                 json_extractor: Optional[Any] = None,
+                 stop_stream_on_json: bool = True): 
         """
         初始化LLM节点。
         
@@ -29,6 +41,15 @@ class LLMNode(BaseNode):
             next_node_id (Optional[str]): 直接指定下一个节点的ID，优先级低于next_node_selector。
             next_node_selector (Optional[Callable[[WorkflowContext], str]]): 
                 基于上下文选择下一个节点ID的函数，优先级高于next_node_id。
+            retry_policy (Optional[RetryPolicy]): LLM调用的重试策略，默认不重试。
+                流式调用只在尚未输出片段时重试。
+            max_response_chars (Optional[int]): 响应的最大字符数，超出部分被截断，
+                流式调用达到上限后立即停止读取。默认不限制。
+            json_extractor (Optional[JSONExtractorNode]): 从响应中提取JSON的提取器（可选）。
+                设置后提取结果写入提取器的输出变量；流式调用时边接收边扫描，
+                不再需要在工作流中单独放置JSONExtractorNode。
+            stop_stream_on_json (bool): 流式调用中第一个完整JSON对象闭合后是否立即结束读取，
+                默认为True，可以省去生成剩余内容的等待时间。
         """
         super().__init__(node_id, node_name)
         self.system_prompt_template = system_prompt_template
@@ -38,9 +59,26 @@ class LLMNode(BaseNode):
         self.stream_callback = stream_callback
         self.next_node_id = next_node_id
         self.next_node_selector = next_node_selector
+        self.retry_policy = retry_policy
+        if max_response_chars is not None and max_response_chars < 1:
+            raise ValueError("max_response_chars must be at least 1")
+        self.max_response_chars = max_response_chars
+        self.json_extractor = json_extractor
+        self.stop_stream_on_json = stop_stream_on_json
+        # 实际发起调用的客户端，配置了重试策略时包装一层RetryingLLMClient
+        self._llm = llm_client
+        if retry_policy is not None:
+            from ...llm.retry import RetryingLLMClient
+            self._llm = RetryingLLMClient(llm_client, retry_policy)
         
         # 从模板中提取变量名
         self.input_variable_names = self._extract_variables_from_template(system_prompt_template)
+        # 构造时编译模板，执行时只需按片段取值拼接
+        self._template = PromptTemplate(system_prompt_template)
+        self._input_variable_set = frozenset(self.input_variable_names)
+        # 正则识别出、但模板渲染时不会读取的变量，仍然需要单独检查是否存在
+        self._unrendered_variables = [name for name in self.input_variable_names
+                                      if name not in self._template.variables]
 
     def _extract_variables_from_template(self, template: str) -> List[str]:
         """从模板字符串中提取变量名"""
@@ -62,19 +100,34 @@ class LLMNode(BaseNode):
         return list(set(cleaned_vars))
 
     def _format_prompt(self, context: WorkflowContext) -> str:
-        """使用上下文中的变量值格式化提示词模板"""
-        # 先检查所有必需变量是否存在
-        for var_name in self.input_variable_names:
+        """使用上下文中的变量值渲染预编译的提示词模板"""
+        for var_name in self._unrendered_variables:
             if var_name not in context:
                 raise ValueError(f"LLMNode '{self.node_id}': Required variable '{var_name}' not found in context for prompt formatting.")
-        
-        # 使用Python字符串格式化功能替换变量
+
         try:
-            return self.system_prompt_template.format(**{k: v for k, v in context.items() 
-                                                      if k in self.input_variable_names})
+            return self._template.render(context, self._input_variable_set)
         except KeyError as e:
+            var_name = e.args[0] if e.args else None
+            if var_name in self._input_variable_set and var_name not in context:
+                raise ValueError(f"LLMNode '{self.node_id}': Required variable '{var_name}' not found in context for prompt formatting.")
             raise ValueError(f"LLMNode '{self.node_id}': Error formatting prompt. Missing key: {e}")
 
+    @property
+    def retry_stats(self) -> Optional[Any]:
+        """LLM调用的重试统计（RetryStats），未配置重试策略时为None"""
+        return self._llm.stats if self.retry_policy is not None else None
+
+    def get_input_variables(self) -> List[str]:
+        """返回节点读取的上下文变量名"""
+        return list(self.input_variable_names)
+
+    def get_output_variables(self) -> List[str]:
+        """返回节点写入的上下文变量名"""
+        if self.json_extractor is not None:
+            return [self.output_variable_name, self.json_extractor.output_variable_name]
+        return [self.output_variable_name]
+
     def execute(self, context: WorkflowContext) -> WorkflowContext:
         """
         执行LLM节点逻辑。
@@ -93,43 +146,179 @@ class LLMNode(BaseNode):
             ValueError: 如果上下文中缺少所需变量
             RuntimeError: 如果LLM调用失败
         """
-        print(f"--- Executing {self} ---")
-        print(f"  Input Context: {context}")
+        logger.info("--- Executing %s ---", self)
+        logger.debug("  Input Context: %s", context)
 
         # 1 & 2. 格式化提示词 (包含检查变量是否存在)
         formatted_prompt = self._format_prompt(context)
-        print(f"  Formatted Prompt: {formatted_prompt}")
+        logger.debug("  Formatted Prompt: %s", formatted_prompt)
 
         # 3. 调用LLM（流式或非流式）
+        scanner = self._new_json_scanner()
         try:
-            if self.stream and hasattr(self.llm_client, 'invoke_stream'):
-                # 流式调用
-                full_response = ""
-                print(f"  LLM Response (Streaming):", end="", flush=True)
-                
-                for text_chunk in self.llm_client.invoke_stream(formatted_prompt):
-                    full_response += text_chunk
-                    if self.stream_callback:
-                        self.stream_callback(text_chunk)
-                    else:
-                        # 简单地打印出来，不换行
-                        print(text_chunk, end="", flush=True)
-                
-                print()  # 完成后打印换行
-                llm_response = full_response
-            else:
-                # 常规调用
-                llm_response = self.llm_client.invoke(formatted_prompt)
-                print(f"  LLM Response: {llm_response}")
-                
+            llm_response = self._call_llm(formatted_prompt, scanner)
         except Exception as e:
-            print(f"  Error calling LLM: {e}")
+            logger.error("  Error calling LLM: %s", e)
             raise RuntimeError(f"LLMNode '{self.node_id}' failed during LLM invocation.") from e
 
         # 4. 更新上下文
+        return self._update_context(context, llm_response, scanner)
+
+    async def aexecute(self, context: WorkflowContext) -> WorkflowContext:
+        """
+        异步执行LLM节点逻辑。
+        客户端提供ainvoke/astream时直接在事件循环中等待响应，
+        否则在线程池中运行同步调用，步骤与execute相同。
+
+        Args:
+            context (WorkflowContext): 当前工作流上下文。
+
+        Returns:
+            WorkflowContext: 包含LLM响应的更新后上下文。
+            
+        Raises:
+            ValueError: 如果上下文中缺少所需变量
+            RuntimeError: 如果LLM调用失败
+        """
+        logger.info("--- Executing %s (async) ---", self)
+        logger.debug("  Input Context: %s", context)
+
+        formatted_prompt = self._format_prompt(context)
+        logger.debug("  Formatted Prompt: %s", formatted_prompt)
+
+        scanner = self._new_json_scanner()
+        try:
+            llm_response = await self._acall_llm(formatted_prompt, scanner)
+        except Exception as e:
+            logger.error("  Error calling LLM: %s", e)
+            raise RuntimeError(f"LLMNode '{self.node_id}' failed during LLM invocation.") from e
+
+        return self._update_context(context, llm_response, scanner)
+
+    def _new_json_scanner(self) -> Optional[IncrementalJSONScanner]:
+        """为一次调用创建JSON扫描器，未配置提取器时返回None"""
+        if self.json_extractor is None:
+            return None
+        return IncrementalJSONScanner(allow_arrays=getattr(self.json_extractor, 'allow_arrays', False))
+
+    def _call_llm(self, formatted_prompt: str, scanner: Optional[IncrementalJSONScanner] = None) -> str:
+        """同步调用LLM，根据配置选择流式或常规调用"""
+        if self.stream and hasattr(self._llm, 'invoke_stream'):
+            # 流式调用
+            buffer = StreamBuffer(self.max_response_chars)
+            echo = is_verbose(logger)
+            if echo:
+                print("  LLM Response (Streaming):", end="", flush=True)
+            
+            stream = self._llm.invoke_stream(formatted_prompt)
+            try:
+                for text_chunk in stream:
+                    if not self._consume_chunk(buffer, text_chunk, echo, scanner):
+                        break
+            finally:
+                # 提前结束时关闭上游流，释放连接
+                if hasattr(stream, 'close'):
+                    stream.close()
+            
+            if echo:
+                print()  # 完成后打印换行
+            return self._finish_stream(buffer)
+
+        # 常规调用
+        llm_response = self._llm.invoke(formatted_prompt)
+        logger.debug("  LLM Response: %s", llm_response)
+        return self._limit_response(llm_response)
+
+    async def _acall_llm(self, formatted_prompt: str, scanner: Optional[IncrementalJSONScanner] = None) -> str:
+        """异步调用LLM，客户端没有原生异步接口时回退到线程池中的同步调用"""
+        from ...llm.base_client import has_native_async
+        if self.stream and has_native_async(self._llm, 'astream'):
+            # 原生异步流式调用
+            buffer = StreamBuffer(self.max_response_chars)
+            echo = is_verbose(logger)
+            if echo:
+                print("  LLM Response (Streaming):", end="", flush=True)
+            
+            stream = self._llm.astream(formatted_prompt)
+            try:
+                async for text_chunk in stream:
+                    if not self._consume_chunk(buffer, text_chunk, echo, scanner):
+                        break
+            finally:
+                if hasattr(stream, 'aclose'):
+                    await stream.aclose()
+            
+            if echo:
+                print()  # 完成后打印换行
+            return self._finish_stream(buffer)
+
+        if not self.stream and has_native_async(self._llm, 'ainvoke'):
+            # 原生异步调用
+            llm_response = await self._llm.ainvoke(formatted_prompt)
+            logger.debug("  LLM Response: %s", llm_response)
+            return self._limit_response(llm_response)
+
+        # 旧式同步客户端：在线程池中执行，避免阻塞事件循环
+        return await asyncio.to_thread(self._call_llm, formatted_prompt, scanner)
+
+    def _consume_chunk(self, buffer: StreamBuffer, text_chunk: str, echo: bool,
+                       scanner: Optional[IncrementalJSONScanner] = None) -> bool:
+        """把流式片段写入缓冲区，把新增文本交给回调和JSON扫描器，返回是否继续读取"""
+        buffer.append(text_chunk)
+        # 只读取新增部分（达到上限时已被截断），不为每个片段合并完整文本
+        new_text = buffer.read_new()
+        if new_text:
+            self._emit_chunk(new_text, echo)
+            if scanner is not None and scanner.feed(new_text) and self.stop_stream_on_json:
+                logger.debug("  JSON object complete, stopping stream early")
+                return False
+        return not buffer.full
+
+    def _finish_stream(self, buffer: StreamBuffer) -> str:
+        """返回流式响应的完整文本，达到字符数上限时记录警告"""
+        if buffer.full:
+            logger.warning("  LLMNode '%s': response reached the %s character limit", self.node_id, self.max_response_chars)
+        return buffer.getvalue()
+
+    def _limit_response(self, llm_response: str) -> str:
+        """对非流式响应应用字符数上限"""
+        if self.max_response_chars is not None and len(llm_response) > self.max_response_chars:
+            logger.warning("  LLMNode '%s': response truncated at %s characters", self.node_id, self.max_response_chars)
+            return llm_response[:self.max_response_chars]
+        return llm_response
+
+    def _extract_json(self, llm_response: str, scanner: Optional[IncrementalJSONScanner]) -> Any:
+        """使用配置的提取器提取JSON，错误处理与JSONExtractorNode.execute一致"""
+        extractor = self.json_extractor
+        try:
+            if scanner is not None:
+                json_data = extractor.extract_from_scanner(scanner, llm_response)
+            else:
+                json_data = extractor.extract(llm_response)
+        except Exception as e:
+            if extractor.raise_on_error:
+                logger.error("  Error extracting JSON: %s", e)
+                raise
+            json_data = extractor.default_value
+        logger.debug("  Extracted JSON: %s", json_data)
+        return json_data
+
+    def _emit_chunk(self, text_chunk: str, echo: bool) -> None:
+        """将流式片段交给回调函数；没有回调且日志未静默时直接回显到控制台"""
+        if self.stream_callback:
+            self.stream_callback(text_chunk)
+        elif echo:
+            # 简单地打印出来，不换行
+            print(text_chunk, end="", flush=True)
+
+    def _update_context(self, context: WorkflowContext, llm_response: str,
+                        scanner: Optional[IncrementalJSONScanner] = None) -> WorkflowContext:
+        """将LLM响应（以及提取出的JSON）写入上下文副本"""
         updated_context = context.copy()
         updated_context[self.output_variable_name] = llm_response
-        print(f"  Output Context: {updated_context}")
-        print(f"--- Finished {self} ---")
+        if self.json_extractor is not None:
+            updated_context[self.json_extractor.output_variable_name] = self._extract_json(llm_response, scanner)
+        logger.debug("  Output Context: %s", updated_context)
+        logger.info("--- Finished %s ---", self)
 
         return updated_context
@@ -1,6 +1,9 @@
+import logging
 from typing import List, Optional
 from ..base import BaseNode, WorkflowContext
 
+logger = logging.getLogger(__name__)
+
 class StartNode(BaseNode):
     """
     工作流的开始节点。
@@ -22,6 +25,14 @@ class StartNode(BaseNode):
         self.output_variable_names = output_variable_names
         self.next_node_id = next_node_id
 
+    def get_input_variables(self) -> List[str]:
+        """返回节点读取的上下文变量名。开始节点不读取上游变量，它向工作流提供初始变量"""
+        return []
+
+    def get_output_variables(self) -> List[str]:
+        """返回节点写入的上下文变量名"""
+        return list(self.output_variable_names)
+
     def execute(self, context: WorkflowContext) -> WorkflowContext:
         """
         执行开始节点逻辑。
@@ -36,8 +47,8 @@ class StartNode(BaseNode):
         Raises:
             ValueError: 如果上下文中缺少预期的初始变量。
         """
-        print(f"--- Executing {self} ---")
-        print(f"  Input Context: {context}")
+        logger.info("--- Executing %s ---", self)
+        logger.debug("  Input Context: %s", context)
         
         # 验证初始变量是否已提供
         for var_name in self.output_variable_names:
@@ -48,9 +59,13 @@ class StartNode(BaseNode):
         updated_context = context.copy()
         if self.next_node_id:
             updated_context["next_node_id"] = self.next_node_id
-            print(f"  Setting next_node_id to: {self.next_node_id}")
+            logger.debug("  Setting next_node_id to: %s", self.next_node_id)
         
-        print(f"  Output Context: {updated_context}")
-        print(f"--- Finished {self} ---")
+        logger.debug("  Output Context: %s", updated_context)
+        logger.info("--- Finished %s ---", self)
         
         return updated_context
+
+    async def aexecute(self, context: WorkflowContext) -> WorkflowContext:
+        """异步执行节点逻辑。开始节点只做变量校验，不涉及IO，直接在事件循环中同步执行。"""
+        return self.execute(context)
@@ -1,9 +1,13 @@
 """
 子工作流节点实现，用于在主工作流中嵌套独立的工作流。
 """
+import logging
 from typing import List, Optional, Dict, Any, Callable
 from ..base import BaseNode, WorkflowContext
-from ..engine import Workflow
+from ..checkpoint import WorkflowSuspended
+from ..engine import AsyncWorkflow
+
+logger = logging.getLogger(__name__)
 
 class SubWorkflowNode(BaseNode):
     """
@@ -50,7 +54,7 @@ class SubWorkflowNode(BaseNode):
         
         # 验证节点列表并创建子工作流
         self._validate_nodes(nodes)
-        self.workflow = Workflow(nodes)
+        self.workflow = AsyncWorkflow(nodes)
         
         # 配置子工作流中的退出节点
         self._configure_exit_nodes(nodes)
@@ -114,9 +118,17 @@ class SubWorkflowNode(BaseNode):
             # 标记所有被分支指向但自身没有下一节点的节点为退出节点
             for node in nodes:
                 if node.node_id in next_ids and not (hasattr(node, 'next_node_id') and node.next_node_id):
-                    print(f"  Auto-configuring exit node: {node.node_id}")
+                    logger.debug("  Auto-configuring exit node: %s", node.node_id)
                     setattr(node, '_is_subworkflow_exit', True)
     
+    def get_input_variables(self) -> List[str]:
+        """返回节点读取的上下文变量名"""
+        return list(self.input_mapping.keys())
+
+    def get_output_variables(self) -> List[str]:
+        """返回节点写入的上下文变量名"""
+        return list(self.output_mapping.values())
+
     def execute(self, context: WorkflowContext) -> WorkflowContext:
         """
         执行子工作流节点。
@@ -133,8 +145,8 @@ class SubWorkflowNode(BaseNode):
         Raises:
             RuntimeError: 如果子工作流执行失败。
         """
-        print(f"--- Executing {self} ---")
-        print(f"  Input Context: {context}")
+        logger.info("--- Executing %s ---", self)
+        logger.debug("  Input Context: %s", context)
         
         # 1. 准备子工作流的初始上下文(从主工作流映射变量)
         subworkflow_context = self._prepare_subworkflow_context(context)
@@ -147,10 +159,44 @@ class SubWorkflowNode(BaseNode):
             # 3. 将子工作流结果映射回主工作流上下文
             updated_context = self._map_results_to_main_context(context, result_context)
             
-            print(f"  Output Context: {updated_context}")
+            logger.debug("  Output Context: %s", updated_context)
+            return updated_context
+        except WorkflowSuspended:
+            # 暂停等待输入不是失败，交给上层工作流处理
+            raise
+        except Exception as e:
+            logger.error("  Subworkflow execution failed: %s", e)
+            raise RuntimeError(f"SubWorkflowNode '{self.node_id}' failed: {str(e)}") from e
+    
+    async def aexecute(self, context: WorkflowContext) -> WorkflowContext:
+        """
+        异步执行子工作流节点，子工作流中的节点同样通过aexecute执行。
+        
+        Args:
+            context (WorkflowContext): 主工作流的上下文。
+            
+        Returns:
+            WorkflowContext: 更新后的主工作流上下文。
+            
+        Raises:
+            RuntimeError: 如果子工作流执行失败。
+        """
+        logger.info("--- Executing %s (async) ---", self)
+        logger.debug("  Input Context: %s", context)
+        
+        subworkflow_context = self._prepare_subworkflow_context(context)
+        
+        try:
+            result_context = await self.workflow.arun(subworkflow_context, self._node_execution_listener)
+            updated_context = self._map_results_to_main_context(context, result_context)
+            
+            logger.debug("  Output Context: %s", updated_context)
             return updated_context
+        except WorkflowSuspended:
+            # 暂停等待输入不是失败，交给上层工作流处理
+            raise
         except Exception as e:
-            print(f"  Subworkflow execution failed: {e}")
+            logger.error("  Subworkflow execution failed: %s", e)
             raise RuntimeError(f"SubWorkflowNode '{self.node_id}' failed: {str(e)}") from e
     
     def _prepare_subworkflow_context(self, main_context: WorkflowContext) -> WorkflowContext:
@@ -172,7 +218,7 @@ class SubWorkflowNode(BaseNode):
             if main_var in main_context:
                 subworkflow_context[sub_var] = main_context[main_var]
             else:
-                print(f"  Warning: Input variable '{main_var}' not found in main context")
+                logger.warning("  Input variable '%s' not found in main context", main_var)
         
         # 如果有入口节点，添加到上下文中
         if self.entry_node_id:
@@ -199,7 +245,7 @@ class SubWorkflowNode(BaseNode):
             if sub_var in sub_context:
                 updated_context[main_var] = sub_context[sub_var]
             else:
-                print(f"  Warning: Output variable '{sub_var}' not found in subworkflow result")
+                logger.warning("  Output variable '%s' not found in subworkflow result", sub_var)
         
         # 设置下一个节点ID（如果有）
         if self.next_node_id:
@@ -219,6 +265,6 @@ class SubWorkflowNode(BaseNode):
         """
         # 检查是否到达退出节点
         if hasattr(node, '_is_subworkflow_exit') and getattr(node, '_is_subworkflow_exit'):
-            print(f"  Reached subworkflow exit node: {node.node_id}")
+            logger.debug("  Reached subworkflow exit node: %s", node.node_id)
             # 标记子工作流完成
             current_context["_subworkflow_complete"] = True
@@ -0,0 +1,186 @@
+"""
+在进程池中执行CPU密集型节点。
+
+评分、文本相似度、答案规范化等纯计算节点在线程中执行时会被GIL串行化。节点声明
+execution = "process"后，引擎把它交给共享的ProcessPoolExecutor执行：
+
+- 只把节点声明的输入变量（get_input_variables）发送到工作进程，未声明时发送整个上下文；
+- 只把节点声明的输出变量（get_output_variables）以及分支控制变量合并回上下文，
+  未声明时合并所有新增或改变的变量；
+- 进程池在首次使用时创建并预热，之后所有调用复用同一组工作进程。
+
+工作流通常在多线程环境中运行（run_many的线程池、限流器、HTTP连接池），fork会把其他线程
+持有的锁复制到子进程中，因此默认使用forkserver（平台不支持时使用spawn）启动工作进程。
+节点对象和输入、输出变量都需要可以被pickle，节点类需要定义在可导入的模块顶层。
+"""
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .base import BaseNode, WorkflowContext
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("inline", "process")
+
+# 节点用来控制工作流走向的上下文变量，总是随结果一起返回
+_CONTROL_VARIABLES = ("next_node_id", "_subworkflow_complete")
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_warm_up_futures: List[Future] = []
+_max_workers: Optional[int] = None
+_mp_context: Any = None
+
+
+def configure_process_pool(max_workers: Optional[int] = None, mp_context: Any = None) -> None:
+    """
+    设置进程池参数。已经创建的进程池会被关闭，下次使用时按新参数重新创建。
+
+    Args:
+        max_workers (int, optional): 工作进程数，默认使用CPU核数
+        mp_context (multiprocessing.context.BaseContext, optional): 创建工作进程使用的上下文，
+            默认使用forkserver（平台不支持时使用spawn）
+    """
+    global _max_workers, _mp_context
+    shutdown_process_pool()
+    with _lock:
+        _max_workers = max_workers
+        _mp_context = mp_context
+
+
+def default_mp_context() -> multiprocessing.context.BaseContext:
+    """默认的工作进程启动方式：forkserver，平台不支持时使用spawn"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """获取共享的进程池，首次调用时创建并开始预热（不等待工作进程启动完成）"""
+    global _pool, _warm_up_futures
+    with _lock:
+        if _pool is None:
+            workers = _max_workers or os.cpu_count() or 1
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context or default_mp_context())
+            logger.debug("Started process pool with %s workers", workers)
+            # 非fork启动方式下工作进程按需创建，没有空闲进程时每次提交都会启动一个新进程，
+            # 因此为每个工作进程提交一个空任务即可让它们全部启动并导入工作流模块
+            _warm_up_futures = [_pool.submit(_warm_up_worker) for _ in range(workers)]
+        return _pool
+
+
+def warm_up_process_pool() -> None:
+    """提前创建进程池并等待所有工作进程启动，避免第一个请求承担进程启动开销"""
+    get_process_pool()
+    with _lock:
+        futures = list(_warm_up_futures)
+    for future in futures:
+        future.result()
+
+
+def shutdown_process_pool() -> None:
+    """关闭共享的进程池"""
+    global _pool, _warm_up_futures
+    with _lock:
+        pool, _pool = _pool, None
+        _warm_up_futures = []
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+atexit.register(shutdown_process_pool)
+
+
+def _warm_up_worker() -> int:
+    # 反序列化本函数时工作进程已导入工作流模块
+    return os.getpid()
+
+
+def _validate_execution(node: BaseNode) -> str:
+    execution = getattr(node, 'execution', "inline")
+    if execution not in EXECUTION_MODES:
+        raise ValueError(f"Node '{node.node_id}' has invalid execution mode '{execution}', "
+                         f"expected one of {EXECUTION_MODES}")
+    return execution
+
+
+def _select_inputs(node: BaseNode, context: WorkflowContext) -> Dict[str, Any]:
+    """选出发送到工作进程的变量"""
+    input_variables = node.get_input_variables()
+    if input_variables is None:
+        return dict(context)
+    names = list(input_variables) + [name for name in _CONTROL_VARIABLES if name in context]
+    return {name: context[name] for name in names if name in context}
+
+
+def _run_in_worker(node: BaseNode, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    在工作进程中执行节点。
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: (需要写回的变量, 被删除的变量)
+    """
+    result = node.execute(WorkflowContext(inputs))
+    output_variables = node.get_output_variables()
+    if output_variables is not None:
+        names = list(output_variables) + list(_CONTROL_VARIABLES)
+        updates = {name: result[name] for name in names if name in result}
+    else:
+        updates = {name: value for name, value in result.items()
+                   if name not in inputs or inputs[name] is not value}
+    removed = [name for name in inputs if name not in result]
+    return updates, removed
+
+
+def _merge(context: WorkflowContext, updates: Dict[str, Any], removed: List[str]) -> WorkflowContext:
+    updated_context = context.copy()
+    for name in removed:
+        updated_context.pop(name, None)
+    updated_context.update(updates)
+    return updated_context
+
+
+def _submit(node: BaseNode, context: WorkflowContext) -> Future:
+    logger.debug("  Dispatching %s to process pool", node)
+    return get_process_pool().submit(_run_in_worker, node, _select_inputs(node, context))
+
+
+def execute_node(node: BaseNode, context: WorkflowContext) -> WorkflowContext:
+    """
+    执行节点：execution为"process"时在进程池中执行，否则直接调用execute。
+
+    Args:
+        node (BaseNode): 要执行的节点
+        context (WorkflowContext): 当前上下文
+
+    Returns:
+        WorkflowContext: 节点执行后的上下文
+
+    Raises:
+        ValueError: 如果节点的execution不合法
+    """
+    if _validate_execution(node) == "inline":
+        return node.execute(context)
+    updates, removed = _submit(node, context).result()
+    return _merge(context, updates, removed)
+
+
+async def aexecute_node(node: BaseNode, context: WorkflowContext) -> WorkflowContext:
+    """
+    异步执行节点：execution为"process"时在进程池中执行并等待结果，否则调用aexecute。
+
+    参数和返回值与execute_node相同。
+    """
+    if _validate_execution(node) == "inline":
+        return await node.aexecute(context)
+    if _pool is None:
+        # 创建进程池会启动forkserver等进程，放到线程中执行，避免阻塞事件循环
+        await asyncio.to_thread(get_process_pool)
+    updates, removed = await asyncio.wrap_future(_submit(node, context))
+    return _merge(context, updates, removed)
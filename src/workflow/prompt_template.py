@@ -0,0 +1,157 @@
+"""
+预编译的提示词模板。
+
+模板在构造时用string.Formatter().parse解析一次，拆成字面量片段和变量片段；
+渲染时按片段依次从上下文中取值并拼接，不再对整个上下文做过滤，也不再重复解析模板。
+渲染结果与str.format完全一致，包括{var[key]}下标访问、{var.attr}属性访问、
+!r/!s/!a转换和格式说明符。
+"""
+from string import Formatter
+from typing import Any, Collection, List, Mapping, Optional, Tuple, Union
+
+# 变量片段：(变量名, 访问路径[(是否属性访问, 键)], 转换符, 格式说明符)
+_Field = Tuple[str, Tuple[Tuple[bool, Union[int, str]], ...], Optional[str], str]
+
+_CONVERTERS = {'r': repr, 's': str, 'a': ascii}
+
+
+def _split_field_name(field_name: str) -> Tuple[Union[int, str], List[Tuple[bool, Union[int, str]]]]:
+    """
+    按str.format的规则拆分字段名，例如"quiz[problem].text"拆成
+    ("quiz", [(False, "problem"), (True, "text")])。
+
+    与str.format一致：纯数字的变量名和下标转换为整数。
+
+    Raises:
+        ValueError: 如果字段名不合法（属性名为空、缺少"]"等）
+    """
+    end = len(field_name)
+    for index, char in enumerate(field_name):
+        if char in '.[':
+            end = index
+            break
+    first: Union[int, str] = field_name[:end]
+    if first.isdecimal():
+        first = int(first)
+
+    rest: List[Tuple[bool, Union[int, str]]] = []
+    position = end
+    while position < len(field_name):
+        if field_name[position] == '.':
+            start = position + 1
+            position = start
+            while position < len(field_name) and field_name[position] not in '.[':
+                position += 1
+            if position == start:
+                raise ValueError("Empty attribute in format string")
+            rest.append((True, field_name[start:position]))
+        else:
+            close = field_name.find(']', position + 1)
+            if close == -1:
+                raise ValueError("Missing ']' in format string")
+            key: Union[int, str] = field_name[position + 1:close]
+            if not key:
+                raise ValueError("Empty attribute in format string")
+            if key.isdecimal():
+                key = int(key)
+            rest.append((False, key))
+            position = close + 1
+            if position < len(field_name) and field_name[position] not in '.[':
+                raise ValueError("Only '.' or '[' may follow ']' in format field specifier")
+    return first, rest
+
+
+class PromptTemplate:
+    """
+    编译后的提示词模板。
+
+    str.format支持但无法预编译的写法（位置参数{}/{0}、格式说明符中嵌套的变量）
+    会退回到str.format渲染，保证行为不变。
+    """
+    __slots__ = ("template", "variables", "_segments")
+
+    def __init__(self, template: str):
+        """
+        编译模板。
+
+        Args:
+            template (str): 使用{variable_name}占位符的模板字符串
+        """
+        self.template = template
+        self.variables: List[str] = []
+        self._segments: Optional[List[Union[str, _Field]]] = None
+        try:
+            self._segments = self._compile(template)
+        except ValueError:
+            # 模板本身不合法（如括号不配对），渲染时由str.format抛出同样的错误
+            self._segments = None
+        if self._segments is None:
+            self.variables = []
+
+    @property
+    def compiled(self) -> bool:
+        """模板是否已预编译（否则渲染时使用str.format）"""
+        return self._segments is not None
+
+    def _compile(self, template: str) -> Optional[List[Union[str, _Field]]]:
+        """把模板拆成字面量和变量片段，遇到无法预编译的写法时返回None"""
+        segments: List[Union[str, _Field]] = []
+        for literal, field_name, format_spec, conversion in Formatter().parse(template):
+            if literal:
+                # 相邻的字面量合并为一段
+                if segments and isinstance(segments[-1], str):
+                    segments[-1] += literal
+                else:
+                    segments.append(literal)
+            if field_name is None:
+                continue
+
+            first, rest = _split_field_name(field_name)
+            if not isinstance(first, str) or not first or '{' in (format_spec or ''):
+                return None
+            if conversion is not None and conversion not in _CONVERTERS:
+                return None
+
+            segments.append((first, tuple(rest), conversion, format_spec or ''))
+            if first not in self.variables:
+                self.variables.append(first)
+        return segments
+
+    def render(self, values: Mapping[str, Any], allowed: Optional[Collection[str]] = None) -> str:
+        """
+        用映射中的值渲染模板。
+
+        Args:
+            values (Mapping[str, Any]): 变量值，通常是工作流上下文
+            allowed (Collection[str], optional): 允许读取的变量名，其他变量视为不存在
+
+        Returns:
+            str: 渲染后的字符串
+
+        Raises:
+            KeyError: 如果缺少变量或下标不存在
+        """
+        if self._segments is None:
+            if allowed is None:
+                return self.template.format(**values)
+            return self.template.format(**{name: values[name] for name in allowed if name in values})
+
+        parts = []
+        append = parts.append
+        for segment in self._segments:
+            if segment.__class__ is str:
+                append(segment)
+                continue
+
+            name, path, conversion, format_spec = segment
+            if allowed is not None and name not in allowed:
+                raise KeyError(name)
+            value = values[name]
+            for is_attr, key in path:
+                value = getattr(value, key) if is_attr else value[key]
+            if conversion is not None:
+                value = _CONVERTERS[conversion](value)
+            if format_spec or value.__class__ is not str:
+                value = format(value, format_spec)
+            append(value)
+        return "".join(parts)
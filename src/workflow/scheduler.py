@@ -0,0 +1,243 @@
+"""
+并行工作流调度器，根据节点声明的输入输出变量推断数据依赖，并发执行互不依赖的节点。
+"""
+import logging
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, List, Dict, Optional, Callable, Set
+
+from .base import BaseNode, WorkflowContext
+from .checkpoint import CheckpointStore
+from .engine import AsyncWorkflow
+from .process_pool import aexecute_node, execute_node
+
+logger = logging.getLogger(__name__)
+
+
+class ParallelWorkflow(AsyncWorkflow):
+    """
+    基于数据依赖图的并行工作流执行器（可选启用）。
+
+    节点仍按列表顺序定义，但调度器会根据每个节点的get_input_variables和
+    get_output_variables推断依赖关系：只有当一个节点读取或覆盖了前面节点写入的变量，
+    或者覆盖了前面节点读取的变量时，才需要等待前面的节点。依赖全部满足的节点
+    会在线程池（run）或事件循环（arun）中并发执行，总耗时约等于关键路径上的LLM调用耗时之和。
+
+    仅支持不含分支的工作流：条件分支节点、next_node_selector，以及跳过顺序后继的
+    next_node_id都会在构造时被拒绝。并发执行的节点没有确定的完成顺序，因此不支持检查点。
+    """
+    def __init__(self, nodes: List[BaseNode], max_workers: Optional[int] = None,
+                 checkpoint_store: Optional[CheckpointStore] = None):
+        """
+        初始化并行工作流。
+
+        Args:
+            nodes (List[BaseNode]): 按顺序列出的节点列表，顺序决定变量冲突时的写入先后。
+            max_workers (int, optional): 线程池的最大线程数，默认使用ThreadPoolExecutor的默认值。
+            checkpoint_store (CheckpointStore, optional): 仅为与Workflow保持签名一致，必须为None。
+
+        Raises:
+            ValueError: 如果节点列表为空、工作流包含分支或设置了检查点存储
+        """
+        if checkpoint_store is not None:
+            raise ValueError("ParallelWorkflow does not support checkpointing; use Workflow or AsyncWorkflow.")
+        super().__init__(nodes)
+        self.max_workers = max_workers
+        self._validate_linear(nodes)
+
+        # dependencies[i]为节点i必须等待的节点下标集合
+        self.dependencies: List[Set[int]] = self._build_dependencies(nodes)
+        self.execution_levels: List[List[str]] = self._build_levels()
+
+    def _validate_linear(self, nodes: List[BaseNode]) -> None:
+        """检查工作流不包含分支，只有线性工作流才能安全地按数据依赖重排"""
+        from .nodes.conditional_branch_node import ConditionalBranchNode
+
+        for i, node in enumerate(nodes):
+            if isinstance(node, ConditionalBranchNode):
+                raise ValueError(f"ParallelWorkflow does not support branch node '{node.node_id}'.")
+            if getattr(node, 'next_node_selector', None):
+                raise ValueError(f"ParallelWorkflow does not support next_node_selector on node '{node.node_id}'.")
+            next_node_id = getattr(node, 'next_node_id', None)
+            sequential_id = nodes[i + 1].node_id if i + 1 < len(nodes) else None
+            if next_node_id and next_node_id != sequential_id:
+                raise ValueError(
+                    f"ParallelWorkflow requires sequential edges, but node '{node.node_id}' "
+                    f"jumps to '{next_node_id}'."
+                )
+
+    @staticmethod
+    def _build_dependencies(nodes: List[BaseNode]) -> List[Set[int]]:
+        """根据读写变量集合计算每个节点的前置依赖"""
+        declared = []
+        for node in nodes:
+            inputs = node.get_input_variables()
+            outputs = node.get_output_variables()
+            if inputs is None or outputs is None:
+                declared.append(None)
+            else:
+                declared.append((set(inputs), set(outputs)))
+
+        dependencies: List[Set[int]] = []
+        for i, current in enumerate(declared):
+            deps = set()
+            for j in range(i):
+                previous = declared[j]
+                if current is None or previous is None:
+                    # 未声明输入输出的节点作为屏障，与前后所有节点串行
+                    deps.add(j)
+                    continue
+                reads, writes = current
+                prev_reads, prev_writes = previous
+                if prev_writes & reads or prev_writes & writes or prev_reads & writes:
+                    deps.add(j)
+            dependencies.append(deps)
+        return dependencies
+
+    def _build_levels(self) -> List[List[str]]:
+        """将节点按依赖深度分层，同一层的节点可以并发执行（用于调试和展示）"""
+        depth: List[int] = []
+        for deps in self.dependencies:
+            depth.append(max((depth[j] + 1 for j in deps), default=0))
+
+        levels: List[List[str]] = [[] for _ in range(max(depth, default=-1) + 1)]
+        for i, level in enumerate(depth):
+            levels[level].append(self.nodes[i].node_id)
+        return levels
+
+    def _merge_result(self, context: WorkflowContext, index: int, result: WorkflowContext) -> WorkflowContext:
+        """
+        将节点的执行结果合并回共享上下文。
+
+        声明了输出变量的节点只合并这些变量，避免覆盖并发节点写入的结果；
+        未声明的节点作为屏障独占执行，直接采用其返回的上下文。
+        """
+        outputs = self.nodes[index].get_output_variables()
+        if outputs is None:
+            merged = self._ensure_context(result)
+        else:
+            merged = context
+            for var_name in outputs:
+                if var_name in result:
+                    merged[var_name] = result[var_name]
+        # 分支信息在并行调度中没有意义
+        merged.pop("next_node_id", None)
+        return merged
+
+    def _check_no_checkpoint_store(self) -> None:
+        """构造之后设置了checkpoint_store属性时同样拒绝，而不是静默地不写检查点"""
+        if self.checkpoint_store is not None:
+            raise ValueError("ParallelWorkflow does not support checkpointing; use Workflow or AsyncWorkflow.")
+
+    def run(self, initial_context: WorkflowContext,
+            node_listener: Optional[Callable[[BaseNode, WorkflowContext], None]] = None,
+            run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        在线程池中并行执行工作流。
+
+        Args:
+            initial_context (WorkflowContext): 工作流启动时的初始数据。
+            node_listener (Callable, optional): 节点执行监听器，在每个节点完成并合并结果后调用。
+            run_id (str, optional): 与Workflow.run保持一致；并行工作流不写检查点，该参数不起作用。
+
+        Returns:
+            Dict[str, Any]: 工作流执行完毕后的最终上下文（普通字典）。
+
+        Raises:
+            Exception: 任一节点失败时取消尚未开始的节点并重新抛出异常
+        """
+        self._check_no_checkpoint_store()
+        logger.info("=== Starting Parallel Workflow Execution (%s levels) ===", len(self.execution_levels))
+        context = WorkflowContext(initial_context)
+        pending: Dict[int, Set[int]] = {i: set(deps) for i, deps in enumerate(self.dependencies)}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while pending or running:
+                    # 提交所有依赖已满足的节点
+                    for index in [i for i, deps in pending.items() if not deps]:
+                        del pending[index]
+                        future = executor.submit(execute_node, self.nodes[index], context.copy())
+                        running[future] = index
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = running.pop(future)
+                        node = self.nodes[index]
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            logger.error("!!! Parallel workflow execution failed at node %s !!!\nError: %s", node, e)
+                            raise
+
+                        context = self._merge_result(context, index, result)
+                        if node_listener:
+                            node_listener(node, context)
+                        for deps in pending.values():
+                            deps.discard(index)
+            finally:
+                for future in running:
+                    future.cancel()
+
+        logger.info("=== Parallel Workflow Execution Finished Successfully ===")
+        return context.to_dict()
+
+    async def arun(self, initial_context: WorkflowContext,
+                   node_listener: Optional[Callable[[BaseNode, WorkflowContext], None]] = None,
+                   run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        在事件循环中并行执行工作流，节点通过aexecute执行。
+
+        Args:
+            initial_context (WorkflowContext): 工作流启动时的初始数据。
+            node_listener (Callable, optional): 节点执行监听器，在每个节点完成并合并结果后调用。
+            run_id (str, optional): 与AsyncWorkflow.arun保持一致；并行工作流不写检查点，该参数不起作用。
+
+        Returns:
+            Dict[str, Any]: 工作流执行完毕后的最终上下文（普通字典）。
+
+        Raises:
+            Exception: 任一节点失败时取消其余节点并重新抛出异常
+        """
+        self._check_no_checkpoint_store()
+        logger.info("=== Starting Async Parallel Workflow Execution (%s levels) ===", len(self.execution_levels))
+        context = WorkflowContext(initial_context)
+        pending: Dict[int, Set[int]] = {i: set(deps) for i, deps in enumerate(self.dependencies)}
+        running: Dict[asyncio.Task, int] = {}
+
+        try:
+            while pending or running:
+                for index in [i for i, deps in pending.items() if not deps]:
+                    del pending[index]
+                    task = asyncio.create_task(aexecute_node(self.nodes[index], context.copy()))
+                    running[task] = index
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = running.pop(task)
+                    node = self.nodes[index]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.error("!!! Async parallel workflow execution failed at node %s !!!\nError: %s", node, e)
+                        raise
+
+                    context = self._merge_result(context, index, result)
+                    if node_listener:
+                        listener_result = node_listener(node, context)
+                        if inspect.isawaitable(listener_result):
+                            await listener_result
+                    for deps in pending.values():
+                        deps.discard(index)
+        finally:
+            for task in running:
+                task.cancel()
+
+        logger.info("=== Async Parallel Workflow Execution Finished Successfully ===")
+        return context.to_dict()
+
+    def __str__(self) -> str:
+        """返回工作流的字符串表示"""
+        return f"ParallelWorkflow(nodes={len(self.nodes)}, levels={len(self.execution_levels)})"
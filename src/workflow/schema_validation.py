@@ -0,0 +1,218 @@
+"""
+JSON Schema验证器缓存。
+
+jsonschema.validate每次调用都会重新检查schema并创建新的验证器。这里每个schema只编译一次：
+先按对象身份查找（不需要序列化，节点反复使用同一个schema对象时只有一次字典查找），
+未命中时再按规范化JSON内容查找，内容相同的不同对象共享验证器。两个缓存都有容量上限，
+超出时淘汰最久未使用的条目。schema在首次使用后不应原地修改，修改后需要调用
+clear_validator_cache()。
+
+只包含“必需字段 + 基本类型（以及数值范围、枚举）”的简单对象schema会被编译成纯Python检查，
+完全不经过jsonschema；其他schema使用jsonschema（可选依赖）编译的验证器。
+两条路径产生的错误信息格式保持一致，例如"'age' is a required property"。
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+# 验证函数：验证失败时抛出异常
+Validator = Callable[[Any], None]
+
+# 简单schema中允许出现的关键字
+_SIMPLE_OBJECT_KEYS = {"type", "properties", "required", "title", "description", "$schema"}
+_SIMPLE_PROPERTY_KEYS = {"type", "minimum", "maximum", "enum", "title", "description"}
+_ANNOTATION_KEYS = {"title", "description", "$schema"}
+
+
+def _is_integer(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# 与jsonschema的类型判断规则一致：布尔值不是数字，1.0是整数
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "number": _is_number,
+    "integer": _is_integer,
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+}
+
+# 缓存的验证器数量上限
+MAX_CACHED_VALIDATORS = 256
+
+_lock = threading.Lock()
+# 按schema对象身份缓存；同时保存schema本身，防止对象被回收后id被复用
+_validators_by_id: "OrderedDict[int, Tuple[Any, Validator]]" = OrderedDict()
+# 按schema规范化JSON内容缓存的验证器，按最近使用顺序排列
+_validators: "OrderedDict[str, Validator]" = OrderedDict()
+
+
+def get_validator(schema: Dict[str, Any]) -> Validator:
+    """
+    获取schema对应的已编译验证函数，首次调用时编译。
+
+    Args:
+        schema (Dict[str, Any]): JSON Schema
+
+    Returns:
+        Callable[[Any], None]: 验证函数，数据不符合schema时抛出异常
+
+    Raises:
+        ImportError: 如果schema需要jsonschema但未安装
+        jsonschema.SchemaError: 如果schema本身不合法
+    """
+    schema_id = id(schema)
+    with _lock:
+        entry = _validators_by_id.get(schema_id)
+        if entry is not None and entry[0] is schema:
+            _validators_by_id.move_to_end(schema_id)
+            return entry[1]
+
+    content_key = json.dumps(schema, sort_keys=True, default=str)
+    with _lock:
+        validator = _validators.get(content_key)
+    if validator is None:
+        validator = _compile(schema)
+
+    with _lock:
+        validator = _validators.setdefault(content_key, validator)
+        _remember(_validators, content_key, validator)
+        _remember(_validators_by_id, schema_id, (schema, validator))
+    return validator
+
+
+def _remember(cache: "OrderedDict[Any, Any]", key: Any, value: Any) -> None:
+    """在持有锁的情况下写入缓存条目，超出容量时淘汰最久未使用的条目"""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > MAX_CACHED_VALIDATORS:
+        cache.popitem(last=False)
+
+
+def validate_json(instance: Any, schema: Dict[str, Any]) -> None:
+    """
+    使用缓存的验证器验证数据。
+
+    Args:
+        instance (Any): 待验证的数据
+        schema (Dict[str, Any]): JSON Schema
+
+    Raises:
+        Exception: 数据不符合schema时抛出（简单schema为ValueError，其他为jsonschema.ValidationError）
+    """
+    get_validator(schema)(instance)
+
+
+def clear_validator_cache() -> None:
+    """清空验证器缓存。"""
+    with _lock:
+        _validators_by_id.clear()
+        _validators.clear()
+
+
+def _compile(schema: Dict[str, Any]) -> Validator:
+    """编译schema：简单schema使用纯Python检查，否则使用jsonschema"""
+    simple = _compile_simple(schema)
+    if simple is not None:
+        return simple
+    return _compile_jsonschema(schema)
+
+
+def _compile_jsonschema(schema: Dict[str, Any]) -> Validator:
+    """使用jsonschema编译验证器，行为与jsonschema.validate相同"""
+    from jsonschema import validators  # 可选依赖
+    from jsonschema.exceptions import best_match
+
+    validator_class = validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    validator = validator_class(schema)
+
+    def validate(instance: Any) -> None:
+        error = best_match(validator.iter_errors(instance))
+        if error is not None:
+            raise error
+
+    return validate
+
+
+def _type_check(type_spec: Any) -> Any:
+    """把type关键字转换为类型检查函数，无法处理时返回None"""
+    names = type_spec if isinstance(type_spec, list) else [type_spec]
+    if not names or not all(isinstance(name, str) and name in _TYPE_CHECKS for name in names):
+        return None
+    checks = [_TYPE_CHECKS[name] for name in names]
+    return lambda value: any(check(value) for check in checks)
+
+
+def _compile_simple(schema: Dict[str, Any]) -> Any:
+    """
+    把简单对象schema编译为纯Python验证函数，不是简单schema时返回None。
+
+    简单schema：type为object，只包含properties和required；每个属性只使用type、
+    minimum、maximum、enum这几个关键字。
+    """
+    if not isinstance(schema, dict) or schema.get("type") != "object":
+        return None
+    if not set(schema) <= _SIMPLE_OBJECT_KEYS:
+        return None
+
+    required = schema.get("required", [])
+    properties = schema.get("properties", {})
+    if not isinstance(required, list) or not isinstance(properties, dict):
+        return None
+
+    property_checks = []
+    for name, property_schema in properties.items():
+        if not isinstance(property_schema, dict) or not set(property_schema) <= _SIMPLE_PROPERTY_KEYS:
+            return None
+        if set(property_schema) <= _ANNOTATION_KEYS:
+            continue
+        type_check = None
+        if "type" in property_schema:
+            type_check = _type_check(property_schema["type"])
+            if type_check is None:
+                return None
+        minimum = property_schema.get("minimum")
+        maximum = property_schema.get("maximum")
+        if (minimum is not None and not _is_number(minimum)) or (maximum is not None and not _is_number(maximum)):
+            return None
+        property_checks.append((name, property_schema.get("type"), type_check,
+                                minimum, maximum, property_schema.get("enum")))
+
+    def validate(instance: Any) -> None:
+        if not isinstance(instance, dict):
+            raise ValueError(f"{instance!r} is not of type 'object'")
+        for name in required:
+            if name not in instance:
+                raise ValueError(f"{name!r} is a required property")
+        for name, type_spec, type_check, minimum, maximum, enum in property_checks:
+            if name not in instance:
+                continue
+            value = instance[name]
+            if type_check is not None and not type_check(value):
+                raise ValueError(f"{value!r} is not of type {_describe_type(type_spec)}")
+            if enum is not None and value not in enum:
+                raise ValueError(f"{value!r} is not one of {enum!r}")
+            if _is_number(value):
+                if minimum is not None and value < minimum:
+                    raise ValueError(f"{value!r} is less than the minimum of {minimum!r}")
+                if maximum is not None and value > maximum:
+                    raise ValueError(f"{value!r} is greater than the maximum of {maximum!r}")
+
+    return validate
+
+
+def _describe_type(type_spec: Any) -> str:
+    """按jsonschema的格式描述期望的类型"""
+    if isinstance(type_spec, list):
+        return ", ".join(repr(name) for name in type_spec)
+    return repr(type_spec)
@@ -0,0 +1,86 @@
+"""
+流式响应缓冲区。
+
+用字符串拼接累积流式片段（full_response += chunk）在长响应上是二次复杂度，
+StreamBuffer把片段保存在列表中，只在需要完整文本时合并一次，并支持字符数上限。
+"""
+from typing import List, Optional
+
+
+class StreamBuffer:
+    """
+    线性时间累积流式片段的缓冲区。
+
+    - append(): 追加片段，超过max_chars的部分被截断
+    - getvalue(): 返回完整文本，合并结果会被缓存
+    - read_new(): 返回上次调用以来新增的文本，开销只与新增部分成正比，
+      供逐片段处理的消费者（如流式回调、JSON扫描器）使用
+    """
+    __slots__ = ("max_chars", "truncated", "_chunks", "_length", "_read_chunks",
+                 "_joined", "_joined_chunks")
+
+    def __init__(self, max_chars: Optional[int] = None):
+        """
+        初始化缓冲区。
+
+        Args:
+            max_chars (int, optional): 最多保留的字符数，None表示不限制
+
+        Raises:
+            ValueError: 如果max_chars小于1
+        """
+        if max_chars is not None and max_chars < 1:
+            raise ValueError("max_chars must be at least 1")
+        self.max_chars = max_chars
+        self.truncated = False  # 是否因为达到上限丢弃过内容
+        self._chunks: List[str] = []
+        self._length = 0
+        self._read_chunks = 0  # read_new()已经读取到的片段下标
+        self._joined = ""      # getvalue()缓存的合并结果
+        self._joined_chunks = 0
+
+    @property
+    def full(self) -> bool:
+        """是否已达到字符数上限"""
+        return self.max_chars is not None and self._length >= self.max_chars
+
+    def append(self, chunk: str) -> str:
+        """
+        追加一个片段。
+
+        Args:
+            chunk (str): 流式片段
+
+        Returns:
+            str: 实际写入的部分（达到上限时被截断，可能为空字符串）
+        """
+        if self.max_chars is not None:
+            remaining = self.max_chars - self._length
+            if len(chunk) > remaining:
+                self.truncated = True
+                chunk = chunk[:max(remaining, 0)]
+        if chunk:
+            self._chunks.append(chunk)
+            self._length += len(chunk)
+        return chunk
+
+    def getvalue(self) -> str:
+        """返回目前为止的完整文本。"""
+        if self._joined_chunks != len(self._chunks):
+            self._joined = self._joined + "".join(self._chunks[self._joined_chunks:])
+            self._joined_chunks = len(self._chunks)
+        return self._joined
+
+    def read_new(self) -> str:
+        """返回上次调用read_new()以来新追加的文本。"""
+        new_chunks = self._chunks[self._read_chunks:]
+        self._read_chunks = len(self._chunks)
+        if len(new_chunks) == 1:
+            return new_chunks[0]
+        return "".join(new_chunks)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        return self.getvalue()
@@ -0,0 +1,158 @@
+"""
+异步工作流执行器的单元测试。
+"""
+import unittest
+import asyncio
+import time
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow.base import BaseNode, WorkflowContext
+from src.workflow.engine import AsyncWorkflow
+from src.workflow.nodes.start_node import StartNode
+from src.workflow.nodes.llm_node import LLMNode
+from src.workflow.nodes.end_node import EndNode
+from src.workflow.nodes.subworkflow_node import SubWorkflowNode
+from src.workflow.nodes.iterative_workflow_node import IterativeWorkflowNode
+
+
+class AsyncMockLLMClient:
+    """带有异步接口的模拟LLM客户端，每次调用等待固定延迟"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke(self, prompt):
+        """同步调用"""
+        self.calls += 1
+        return f"Sync response for: {prompt}"
+
+    async def ainvoke(self, prompt):
+        """异步调用"""
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return f"Async response for: {prompt}"
+
+
+class SyncOnlyLLMClient:
+    """只有同步接口的模拟LLM客户端"""
+
+    def invoke(self, prompt):
+        """同步调用"""
+        return f"Sync response for: {prompt}"
+
+
+class UpperCaseNode(BaseNode):
+    """只实现了同步execute的自定义节点"""
+
+    def execute(self, context: WorkflowContext) -> WorkflowContext:
+        updated_context = context.copy()
+        updated_context["upper"] = context["text"].upper()
+        return updated_context
+
+
+class TestAsyncWorkflow(unittest.TestCase):
+    """测试AsyncWorkflow的功能"""
+
+    def _create_workflow(self, llm_client):
+        """创建一个简单的开始-LLM-结束工作流"""
+        return AsyncWorkflow([
+            StartNode("start", "Start", ["text"]),
+            LLMNode("llm", "LLM", system_prompt_template="Echo: {text}",
+                    output_variable_name="answer", llm_client=llm_client),
+            EndNode("end", "End", ["answer"])
+        ])
+
+    def test_arun_uses_native_async_client(self):
+        """测试客户端提供ainvoke时使用原生异步调用"""
+        workflow = self._create_workflow(AsyncMockLLMClient())
+        result = asyncio.run(workflow.arun({"text": "hi"}))
+        self.assertEqual(result["answer"], "Async response for: Echo: hi")
+
+    def test_arun_falls_back_to_sync_client(self):
+        """测试只有同步接口的客户端在线程池中执行"""
+        workflow = self._create_workflow(SyncOnlyLLMClient())
+        result = asyncio.run(workflow.arun({"text": "hi"}))
+        self.assertEqual(result["answer"], "Sync response for: Echo: hi")
+
+    def test_sync_node_adapter(self):
+        """测试只实现execute的节点通过默认aexecute适配器运行"""
+        workflow = AsyncWorkflow([
+            StartNode("start", "Start", ["text"]),
+            UpperCaseNode("upper", "Upper")
+        ])
+        result = asyncio.run(workflow.arun({"text": "abc"}))
+        self.assertEqual(result["upper"], "ABC")
+
+    def test_async_node_listener(self):
+        """测试协程函数形式的节点监听器"""
+        visited = []
+
+        async def listener(node, context):
+            visited.append(node.node_id)
+
+        workflow = self._create_workflow(AsyncMockLLMClient())
+        asyncio.run(workflow.arun({"text": "hi"}, listener))
+        self.assertEqual(visited, ["start", "llm", "end"])
+
+    def test_sessions_interleave_on_one_loop(self):
+        """测试多个会话在同一个事件循环中并发执行"""
+        client = AsyncMockLLMClient(latency=0.1)
+        workflow = self._create_workflow(client)
+
+        async def run_sessions():
+            return await asyncio.gather(*[workflow.arun({"text": str(i)}) for i in range(20)])
+
+        start_time = time.perf_counter()
+        results = asyncio.run(run_sessions())
+        elapsed = time.perf_counter() - start_time
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results[7]["answer"], "Async response for: Echo: 7")
+        # 串行执行至少需要2秒
+        self.assertLess(elapsed, 1.0)
+
+    def test_subworkflow_and_iteration_async(self):
+        """测试子工作流节点和迭代工作流节点的异步路径"""
+        client = AsyncMockLLMClient()
+        sub_node = SubWorkflowNode(
+            node_id="sub",
+            node_name="Sub",
+            nodes=[
+                StartNode("sub_start", "Sub Start", ["value"]),
+                LLMNode("sub_llm", "Sub LLM", system_prompt_template="Sub: {value}",
+                        output_variable_name="sub_answer", llm_client=client)
+            ],
+            input_mapping={"text": "value"},
+            output_mapping={"sub_answer": "sub_result"}
+        )
+        iterative_node = IterativeWorkflowNode(
+            node_id="iter",
+            node_name="Iter",
+            nodes=[
+                StartNode("iter_start", "Iter Start", ["content"]),
+                LLMNode("iter_llm", "Iter LLM", system_prompt_template="Iter: {content}",
+                        output_variable_name="content_out", llm_client=client)
+            ],
+            condition_function=lambda context: True,
+            max_iterations=2,
+            input_mapping={"text": "content"},
+            iteration_mapping={"content_out": "content"},
+            output_mapping={"content_out": "iter_result"}
+        )
+        workflow = AsyncWorkflow([StartNode("start", "Start", ["text"]), sub_node, iterative_node])
+
+        result = asyncio.run(workflow.arun({"text": "x"}))
+
+        self.assertEqual(result["sub_result"], "Async response for: Sub: x")
+        self.assertEqual(result["iter_result"],
+                         "Async response for: Iter: Async response for: Iter: x")
+        self.assertEqual(result["_iterations_completed"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import unittest
+import sys
+import os
+import asyncio
+import time
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow import silence, reset_logging
+from src.workflow.base import BaseNode
+from src.workflow.batch_runner import BatchStats, RunResult, percentile
+from src.workflow.engine import AsyncWorkflow, Workflow
+from src.workflow.nodes.start_node import StartNode
+from src.workflow.nodes.end_node import EndNode
+
+
+class ScoreNode(BaseNode):
+    """按学生答案计分，答案为空时失败"""
+
+    def execute(self, context):
+        if not context["answer"]:
+            raise ValueError("empty answer")
+        time.sleep(0.01 * (len(context["answer"]) % 3))
+        updated_context = context.copy()
+        updated_context["score"] = len(context["answer"])
+        return updated_context
+
+
+def build_workflow(cls=Workflow):
+    return cls([
+        StartNode("start", "Start", ["answer"]),
+        ScoreNode("score", "Score"),
+        EndNode("end", "End", ["score"]),
+    ])
+
+
+ANSWERS = ["a", "bb", "", "dddd", "eeeee", "ffffff"]
+
+
+class TestBatchRunner(unittest.TestCase):
+    """测试Workflow.run_many"""
+
+    def setUp(self):
+        silence()
+
+    def tearDown(self):
+        reset_logging()
+
+    def check_results(self, results):
+        self.assertEqual(sorted(r.index for r in results), list(range(len(ANSWERS))))
+        for result in results:
+            answer = ANSWERS[result.index]
+            if answer:
+                self.assertTrue(result.ok)
+                self.assertEqual(result.context["score"], len(answer))
+            else:
+                self.assertIsInstance(result.error, ValueError)
+                self.assertIsNone(result.context)
+            self.assertGreaterEqual(result.latency, 0)
+
+    def test_thread_executor(self):
+        """线程池执行，单个会话失败不影响其他会话"""
+        batch = build_workflow().run_many(({"answer": a} for a in ANSWERS), concurrency=3)
+        self.check_results(list(batch))
+        self.assertEqual(batch.stats.completed, 5)
+        self.assertEqual(batch.stats.failed, 1)
+        self.assertGreater(batch.stats.throughput, 0)
+
+    def test_results_in_input_order(self):
+        """results()按输入顺序返回"""
+        results = build_workflow().run_many([{"answer": a} for a in ANSWERS]).results()
+        self.assertEqual([r.index for r in results], list(range(len(ANSWERS))))
+
+    def test_process_executor(self):
+        """进程池执行，返回普通dict"""
+        results = list(build_workflow().run_many([{"answer": a} for a in ANSWERS],
+                                                 concurrency=2, executor="process"))
+        self.check_results(results)
+        self.assertIsInstance(next(r for r in results if r.ok).context, dict)
+
+    def test_process_executor_does_not_fork(self):
+        """进程池与process_pool使用相同的启动方式，不在多线程进程中fork"""
+        batch = build_workflow().run_many([], executor="process")
+        with batch._make_pool() as pool:
+            self.assertNotEqual(pool._mp_context.get_start_method(), "fork")
+
+    def test_async_executor(self):
+        """asyncio执行，同步和异步工作流都可以使用"""
+        for cls in (Workflow, AsyncWorkflow):
+            with self.subTest(workflow=cls.__name__):
+                self.check_results(list(build_workflow(cls).run_many(
+                    [{"answer": a} for a in ANSWERS], concurrency=4, executor="async")))
+
+    def test_async_early_stop_cancels_running_sessions(self):
+        """asyncio模式提前停止时立即取消正在运行的会话，不等待下一个会话完成"""
+        class WaitNode(BaseNode):
+            async def aexecute(self, context):
+                await asyncio.sleep(context["delay"])
+                return context
+
+            def execute(self, context):
+                time.sleep(context["delay"])
+                return context
+
+        workflow = AsyncWorkflow([WaitNode("wait", "Wait")])
+        contexts = [{"delay": 0}] + [{"delay": 5}] * 4
+        batch = iter(workflow.run_many(contexts, concurrency=3, executor="async"))
+        next(batch)
+        started = time.perf_counter()
+        batch.close()
+        self.assertLess(time.perf_counter() - started, 1)
+
+    def test_arun_many(self):
+        """在已有的事件循环中使用arun_many"""
+        workflow = build_workflow(AsyncWorkflow)
+
+        async def main():
+            return [result async for result in workflow.arun_many([{"answer": a} for a in ANSWERS], 2)]
+
+        self.check_results(asyncio.run(main()))
+
+    def test_concurrency_limit(self):
+        """同时运行的会话数不超过concurrency"""
+        running = []
+        peak = []
+
+        class SlowNode(BaseNode):
+            def execute(self, context):
+                running.append(1)
+                peak.append(len(running))
+                time.sleep(0.02)
+                running.pop()
+                return context
+
+        workflow = Workflow([SlowNode("slow", "Slow")])
+        list(workflow.run_many([{}] * 8, concurrency=2))
+        self.assertLessEqual(max(peak), 2)
+
+    def test_early_stop_cancels_pending(self):
+        """提前停止迭代时不再运行尚未开始的会话"""
+        started = []
+
+        class SlowNode(BaseNode):
+            def execute(self, context):
+                started.append(context["index"])
+                time.sleep(0.02)
+                return context
+
+        workflow = Workflow([SlowNode("slow", "Slow")])
+        batch = iter(workflow.run_many([{"index": i} for i in range(20)], concurrency=2))
+        next(batch)
+        batch.close()
+        # 已完成1个、运行中最多2个（其中1个是完成后补充的）
+        self.assertLessEqual(len(started), 3)
+
+    def test_shares_compiled_plan(self):
+        """所有会话共享同一个编译结果"""
+        workflow = build_workflow()
+        list(workflow.run_many([{"answer": "x"}] * 3))
+        plan = workflow.plan
+        list(workflow.run_many([{"answer": "x"}] * 3))
+        self.assertIs(workflow.plan, plan)
+
+    def test_invalid_arguments(self):
+        workflow = build_workflow()
+        with self.assertRaises(ValueError):
+            workflow.run_many([], concurrency=0)
+        with self.assertRaises(ValueError):
+            workflow.run_many([], executor="gpu")
+
+    def test_percentiles(self):
+        """延迟分位数使用线性插值"""
+        self.assertEqual(percentile([], 50), 0.0)
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2.5)
+        self.assertEqual(percentile([5], 99), 5)
+        stats = BatchStats()
+        for latency in (0.1, 0.2, 0.3):
+            stats.record(RunResult(0, {}, None, latency))
+        self.assertAlmostEqual(stats.summary()["p50"], 0.2)
+        self.assertAlmostEqual(stats.summary()["max"], 0.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
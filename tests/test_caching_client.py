@@ -0,0 +1,198 @@
+"""
+带缓存的LLM客户端的单元测试。
+"""
+import unittest
+import asyncio
+import tempfile
+import time
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm.caching_client import CachingLLMClient, LRUCache
+
+
+class CountingClient:
+    """记录调用次数的模拟LLM客户端"""
+
+    def __init__(self, model="mock-model"):
+        self.model = model
+        self.invoke_calls = 0
+        self.stream_calls = 0
+
+    def invoke(self, prompt):
+        self.invoke_calls += 1
+        return f"answer to {prompt}"
+
+    def invoke_stream(self, prompt, system_prompt="You are a helpful assistant."):
+        self.stream_calls += 1
+        for word in ["streamed ", "answer ", "to ", prompt]:
+            yield word
+
+
+class AsyncOnlyClient(CountingClient):
+    """只允许异步调用的模拟LLM客户端，同步调用会失败"""
+
+    def invoke(self, prompt):
+        raise AssertionError("synchronous invoke should not be used")
+
+    async def ainvoke(self, prompt):
+        self.invoke_calls += 1
+        return f"async answer to {prompt}"
+
+    async def astream(self, prompt):
+        self.stream_calls += 1
+        for word in ["async ", "answer ", "to ", prompt]:
+            yield word
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestLRUCache(unittest.TestCase):
+    """测试LRU缓存的淘汰和过期"""
+
+    def test_evicts_least_recently_used(self):
+        """测试超过容量时淘汰最久未使用的条目"""
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl_expiry(self):
+        """测试过期条目不会被返回"""
+        cache = LRUCache(max_size=10, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_arguments(self):
+        """测试无效参数"""
+        with self.assertRaises(ValueError):
+            LRUCache(max_size=0)
+        with self.assertRaises(ValueError):
+            LRUCache(ttl=0)
+
+
+class TestCachingLLMClient(unittest.TestCase):
+    """测试CachingLLMClient的缓存行为"""
+
+    def test_invoke_hits_cache(self):
+        """测试相同提示词只调用一次底层客户端"""
+        inner = CountingClient()
+        client = CachingLLMClient(inner)
+
+        self.assertEqual(client.invoke("what is youth?"), "answer to what is youth?")
+        self.assertEqual(client.invoke("what is youth?"), "answer to what is youth?")
+        client.invoke("another question")
+
+        self.assertEqual(inner.invoke_calls, 2)
+        self.assertEqual(client.stats.hits, 1)
+        self.assertEqual(client.stats.misses, 2)
+        self.assertAlmostEqual(client.stats.hit_rate, 1 / 3)
+
+    def test_key_includes_model_and_system_prompt(self):
+        """测试缓存键区分模型和系统提示词"""
+        client_a = CachingLLMClient(CountingClient(model="a"))
+        client_b = CachingLLMClient(CountingClient(model="b"))
+
+        self.assertNotEqual(client_a.cache_key("q"), client_b.cache_key("q"))
+        self.assertNotEqual(client_a.cache_key("q"), client_a.cache_key("q", system_prompt="Be brief."))
+
+    def test_stream_replays_cached_response(self):
+        """测试流式调用在完整结束后缓存，命中时按片段重放"""
+        inner = CountingClient()
+        client = CachingLLMClient(inner, replay_chunk_size=4)
+
+        first = list(client.invoke_stream("q"))
+        replayed = list(client.invoke_stream("q"))
+
+        self.assertEqual(inner.stream_calls, 1)
+        self.assertEqual("".join(replayed), "".join(first))
+        self.assertTrue(all(len(chunk) <= 4 for chunk in replayed))
+        # 流式调用和普通调用共用同一个缓存键
+        self.assertEqual(client.invoke("q"), "streamed answer to q")
+        self.assertEqual(inner.invoke_calls, 0)
+
+    def test_interrupted_stream_is_not_cached(self):
+        """测试中途放弃的流不会写入缓存"""
+        inner = CountingClient()
+        client = CachingLLMClient(inner)
+
+        stream = client.invoke_stream("q")
+        next(stream)
+        stream.close()
+        list(client.invoke_stream("q"))
+
+        self.assertEqual(inner.stream_calls, 2)
+
+    def test_ainvoke_awaits_wrapped_client(self):
+        """测试异步调用命中缓存时直接返回，未命中时使用被包装客户端的ainvoke"""
+        inner = AsyncOnlyClient()
+        client = CachingLLMClient(inner)
+
+        self.assertEqual(asyncio.run(client.ainvoke("q")), "async answer to q")
+        self.assertEqual(asyncio.run(client.ainvoke("q")), "async answer to q")
+        self.assertEqual(inner.invoke_calls, 1)
+        self.assertEqual(client.stats.hits, 1)
+
+    def test_astream_uses_wrapped_async_stream(self):
+        """测试异步流式调用读取被包装客户端的astream，完整结束后缓存"""
+        inner = AsyncOnlyClient()
+        client = CachingLLMClient(inner, replay_chunk_size=4)
+
+        first = asyncio.run(_collect(client.astream("q")))
+        replayed = asyncio.run(_collect(client.astream("q")))
+
+        self.assertEqual(first, ["async ", "answer ", "to ", "q"])
+        self.assertEqual("".join(replayed), "async answer to q")
+        self.assertEqual(inner.stream_calls, 1)
+        self.assertEqual(asyncio.run(client.ainvoke("q")), "async answer to q")
+        self.assertEqual(inner.invoke_calls, 0)
+
+    def test_disk_tier_survives_new_client(self):
+        """测试磁盘层在新的客户端实例中仍然有效"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "responses.sqlite")
+            first = CachingLLMClient(CountingClient(), disk_path=path)
+            first.invoke("q")
+            first.disk_store.close()
+
+            inner = CountingClient()
+            second = CachingLLMClient(inner, disk_path=path)
+            self.assertEqual(second.invoke("q"), "answer to q")
+            self.assertEqual(second.invoke("q"), "answer to q")
+            second.disk_store.close()
+
+            self.assertEqual(inner.invoke_calls, 0)
+            self.assertEqual(second.stats.disk_hits, 1)
+            self.assertEqual(second.stats.hits, 1)
+
+
+    def test_invalidate_removes_disk_entry(self):
+        """测试invalidate同时删除磁盘层的响应"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            inner = CountingClient()
+            client = CachingLLMClient(inner, disk_path=os.path.join(tmp_dir, "responses.sqlite"))
+            client.invoke("q")
+            client.invoke("other")
+            client.invalidate("q")
+            client.invoke("q")
+            client.invoke("other")
+            client.disk_store.close()
+
+            self.assertEqual(inner.invoke_calls, 3)
+            self.assertEqual(client.stats.disk_hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,283 @@
+import unittest
+import sys
+import os
+import asyncio
+import base64
+import pickle
+import shutil
+import tempfile
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow import silence, reset_logging
+from src.workflow.base import BaseNode
+from src.workflow.checkpoint import (DirectoryCheckpointStore, SQLiteCheckpointStore, compute_delta,
+                                     current_run_id, decode_record, encode_record)
+from src.workflow.context import WorkflowContext
+from src.workflow.engine import AsyncWorkflow, Workflow
+from src.workflow.nodes.start_node import StartNode
+from src.workflow.nodes.end_node import EndNode
+from src.workflow.nodes.iterative_workflow_node import IterativeWorkflowNode
+
+
+class Point:
+    """无法JSON序列化的值"""
+
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+    def __eq__(self, other):
+        return isinstance(other, Point) and (self.x, self.y) == (other.x, other.y)
+
+
+class CountingNode(BaseNode):
+    """把输入变量加一写入输出变量，记录执行次数；fail_on为True时失败"""
+
+    def __init__(self, node_id, source, target, calls, fail_on=None):
+        super().__init__(node_id, node_id)
+        self.source = source
+        self.target = target
+        self.calls = calls
+        self.fail_on = fail_on
+
+    def execute(self, context):
+        self.calls[self.node_id] = self.calls.get(self.node_id, 0) + 1
+        if self.fail_on is not None and self.fail_on(context):
+            raise RuntimeError(f"{self.node_id} failed")
+        updated_context = context.copy()
+        updated_context[self.target] = context[self.source] + 1
+        updated_context["run_id"] = current_run_id()
+        return updated_context
+
+
+class Switch:
+    """测试中控制节点是否失败的开关"""
+
+    def __init__(self):
+        self.on = True
+
+    def __call__(self, context):
+        return self.on
+
+
+class TestCheckpointStores(unittest.TestCase):
+    """测试检查点存储"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def stores(self):
+        sqlite_store = SQLiteCheckpointStore(os.path.join(self.directory, "checkpoints.db"))
+        self.addCleanup(sqlite_store.close)
+        return [DirectoryCheckpointStore(os.path.join(self.directory, "runs")), sqlite_store]
+
+    def test_append_load_delete(self):
+        for store in self.stores():
+            with self.subTest(store=str(store)):
+                store.append("run-1", {"frame": "", "set": {"a": 1}})
+                store.append("run-1", {"frame": "", "set": {"b": "二"}})
+                store.append("run-2", {"frame": "", "set": {}})
+
+                self.assertEqual(store.load("run-1"), [{"frame": "", "set": {"a": 1}},
+                                                       {"frame": "", "set": {"b": "二"}}])
+                self.assertEqual(store.list_runs(), ["run-1", "run-2"])
+                store.delete("run-1")
+                self.assertEqual(store.load("run-1"), [])
+                self.assertEqual(store.list_runs(), ["run-2"])
+
+    def test_invalid_run_id(self):
+        for store in self.stores():
+            with self.subTest(store=str(store)):
+                with self.assertRaises(ValueError):
+                    store.append("../escape", {})
+
+    def test_non_json_values_are_pickled_when_allowed(self):
+        record = {"set": {"point": Point(1, 2), "items": (1, 2)}}
+        decoded = decode_record(encode_record(record, allow_pickle=True), allow_pickle=True)
+        self.assertEqual(decoded["set"]["point"], Point(1, 2))
+        self.assertEqual(decoded["set"]["items"], [1, 2])
+
+    def test_non_json_values_rejected_by_default(self):
+        with self.assertRaises(TypeError):
+            encode_record({"set": {"point": Point(1, 2)}})
+        line = encode_record({"set": {"point": Point(1, 2)}}, allow_pickle=True)
+        with self.assertRaises(ValueError):
+            decode_record(line)
+
+    def test_dicts_colliding_with_tags_are_not_unpickled(self):
+        payload = base64.b64encode(pickle.dumps(Point(1, 2))).decode("ascii")
+        record = {"set": {"llm_json": {"__pickle__": payload},
+                          "escaped": {"__escaped__": ["a", 1]},
+                          "nested": [{"__pickle__": {"__escaped__": payload}}]}}
+        for allow_pickle in (False, True):
+            with self.subTest(allow_pickle=allow_pickle):
+                line = encode_record(record, allow_pickle)
+                self.assertEqual(decode_record(line, allow_pickle), record)
+
+    def test_store_rejects_non_json_values_by_default(self):
+        for store in self.stores():
+            with self.subTest(store=str(store)):
+                with self.assertRaises(TypeError):
+                    store.append("run", {"set": {"point": Point(1, 2)}})
+
+    def test_truncated_last_line_is_ignored(self):
+        store = DirectoryCheckpointStore(self.directory)
+        store.append("run", {"step": 1})
+        with open(os.path.join(self.directory, "run.jsonl"), "a", encoding="utf-8") as f:
+            f.write('{"step": ')
+        self.assertEqual(store.load("run"), [{"step": 1}])
+
+    def test_compute_delta(self):
+        before = WorkflowContext({"keep": [1], "change": 1, "drop": 0, "flag": 1})
+        after = before.copy()
+        after["change"] = 2
+        after["new"] = "x"
+        after["flag"] = True
+        del after["drop"]
+        changed, removed = compute_delta(before, after)
+        self.assertEqual(changed, {"change": 2, "new": "x", "flag": True})
+        self.assertEqual(removed, ["drop"])
+
+
+class TestWorkflowResume(unittest.TestCase):
+    """测试带检查点的运行与恢复"""
+
+    def setUp(self):
+        silence()
+        self.store = SQLiteCheckpointStore()
+        self.calls = {}
+        self.fail = Switch()
+
+    def tearDown(self):
+        self.store.close()
+        reset_logging()
+
+    def build_workflow(self, cls=Workflow):
+        return cls([
+            StartNode("start", "Start", ["value", "essay"]),
+            CountingNode("first", "value", "a", self.calls),
+            CountingNode("second", "a", "b", self.calls),
+            CountingNode("third", "b", "c", self.calls, fail_on=self.fail),
+            EndNode("end", "End", ["c"]),
+        ], checkpoint_store=self.store)
+
+    def test_resume_continues_after_last_completed_node(self):
+        workflow = self.build_workflow()
+        with self.assertRaises(RuntimeError):
+            workflow.run({"value": 1, "essay": "x" * 1000}, run_id="student-1")
+
+        self.fail.on = False
+        result = workflow.resume("student-1")
+
+        self.assertEqual(result["c"], 4)
+        self.assertEqual(result["essay"], "x" * 1000)
+        self.assertEqual(result["run_id"], "student-1")
+        self.assertEqual(self.calls, {"first": 1, "second": 1, "third": 2})
+
+    def test_records_contain_deltas(self):
+        self.fail.on = False
+        workflow = self.build_workflow()
+        workflow.run({"value": 1, "essay": "x" * 1000}, run_id="student-1")
+
+        records = self.store.load("student-1")
+        self.assertEqual(records[0]["event"], "start")
+        self.assertEqual(records[-1]["event"], "finish")
+        steps = {record["node"]: record for record in records[1:-1]}
+        self.assertEqual(steps["second"]["set"], {"b": 3})
+        self.assertEqual(steps["second"]["next"], "third")
+        self.assertIsNone(steps["end"]["next"])
+        # 初始上下文只在开始记录中保存一次
+        self.assertEqual(sum("x" * 1000 in encode_record(record) for record in records), 1)
+
+    def test_resume_finished_run_returns_final_context(self):
+        self.fail.on = False
+        workflow = self.build_workflow()
+        expected = workflow.run({"value": 1, "essay": ""}, run_id="done")
+
+        records = self.store.load("done")
+        self.assertEqual(workflow.resume("done"), expected)
+        self.assertEqual(workflow.resume("done"), expected)
+        self.assertEqual(self.calls["first"], 1)
+        # 恢复已经结束的运行不会追加记录
+        self.assertEqual(self.store.load("done"), records)
+
+    def test_run_id_errors(self):
+        self.fail.on = False
+        workflow = self.build_workflow()
+        workflow.run({"value": 1, "essay": ""}, run_id="taken")
+        with self.assertRaises(ValueError):
+            workflow.run({"value": 1, "essay": ""}, run_id="taken")
+        with self.assertRaises(ValueError):
+            workflow.resume("missing")
+        with self.assertRaises(ValueError):
+            Workflow(workflow.nodes).resume("taken")
+
+    def test_generated_run_id(self):
+        self.fail.on = False
+        result = self.build_workflow().run({"value": 1, "essay": ""})
+        self.assertEqual(self.store.list_runs(), [result["run_id"]])
+
+    def test_iterative_node_resumes_inside_iteration(self):
+        def fail_in_third_iteration(context):
+            return self.fail.on and context["_iteration_count"] == 2
+
+        iterative_node = IterativeWorkflowNode(
+            node_id="refine",
+            node_name="Refine",
+            nodes=[
+                StartNode("iter_start", "Start", ["content"]),
+                CountingNode("draft", "content", "draft", self.calls),
+                CountingNode("review", "draft", "reviewed", self.calls, fail_on=fail_in_third_iteration),
+            ],
+            condition_function=lambda context: True,
+            max_iterations=4,
+            input_mapping={"value": "content"},
+            iteration_mapping={"reviewed": "content"},
+            output_mapping={"reviewed": "final"},
+            result_collection_mode="append",
+            result_variable="history",
+        )
+        workflow = Workflow([
+            StartNode("start", "Start", ["value"]),
+            iterative_node,
+            EndNode("end", "End", ["final", "history"]),
+        ], checkpoint_store=self.store)
+
+        with self.assertRaises(RuntimeError):
+            workflow.run({"value": 0}, run_id="essay")
+        self.assertEqual(self.calls, {"draft": 3, "review": 3})
+
+        self.fail.on = False
+        result = workflow.resume("essay")
+
+        self.assertEqual(result["final"], 8)
+        self.assertEqual(result["_iterations_completed"], 4)
+        # 前两轮直接重放，第三轮只重新执行失败的review
+        self.assertEqual(self.calls, {"draft": 4, "review": 5})
+
+    def test_async_resume(self):
+        workflow = self.build_workflow(AsyncWorkflow)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(workflow.arun({"value": 1, "essay": ""}, run_id="async-run"))
+
+        self.fail.on = False
+        result = asyncio.run(workflow.aresume("async-run"))
+
+        self.assertEqual(result["c"], 4)
+        self.assertEqual(self.calls, {"first": 1, "second": 1, "third": 2})
+
+    def test_sync_resume_of_async_run(self):
+        workflow = self.build_workflow(AsyncWorkflow)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(workflow.arun({"value": 1, "essay": ""}, run_id="mixed"))
+
+        self.fail.on = False
+        self.assertEqual(workflow.resume("mixed")["c"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,243 @@
+"""
+合并并发相同请求的LLM客户端的单元测试。
+"""
+import unittest
+import asyncio
+import threading
+import time
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm.coalescing_client import CoalescingLLMClient
+
+
+class SlowClient:
+    """响应较慢、记录调用次数的模拟LLM客户端"""
+
+    def __init__(self, delay=0.1, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.invoke_calls = 0
+        self.stream_calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.invoke_calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("provider unavailable")
+        return f"answer to {prompt}"
+
+    def invoke_stream(self, prompt):
+        with self._lock:
+            self.stream_calls += 1
+        for word in ["quiz ", "about ", prompt]:
+            time.sleep(self.delay / 3)
+            yield word
+
+
+class LongStreamClient:
+    """逐个产生大量片段、记录上游流是否被关闭的模拟LLM客户端"""
+
+    def __init__(self):
+        self.produced = 0
+        self.closed = threading.Event()
+
+    def invoke(self, prompt):
+        return prompt
+
+    def invoke_stream(self, prompt):
+        try:
+            for index in range(100):
+                time.sleep(0.005)
+                self.produced += 1
+                yield f"{index} "
+        finally:
+            self.closed.set()
+
+    async def astream(self, prompt):
+        try:
+            for index in range(100):
+                await asyncio.sleep(0.005)
+                self.produced += 1
+                yield f"{index} "
+        finally:
+            self.closed.set()
+
+
+class TestCoalescingLLMClient(unittest.TestCase):
+    """测试并发相同请求只产生一次底层调用"""
+
+    def _run_threads(self, target, count):
+        results = [None] * count
+
+        def worker(index):
+            results[index] = target()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_threads_share_one_call(self):
+        """测试多个线程的相同请求共享一次调用"""
+        inner = SlowClient()
+        client = CoalescingLLMClient(inner)
+
+        results = self._run_threads(lambda: client.invoke("quiz"), 8)
+
+        self.assertEqual(results, ["answer to quiz"] * 8)
+        self.assertEqual(inner.invoke_calls, 1)
+        self.assertEqual(client.coalesced_calls, 7)
+
+    def test_sequential_calls_are_not_coalesced(self):
+        """测试调用完成后相同请求会重新调用LLM"""
+        inner = SlowClient(delay=0)
+        client = CoalescingLLMClient(inner)
+        client.invoke("quiz")
+        client.invoke("quiz")
+        self.assertEqual(inner.invoke_calls, 2)
+
+    def test_errors_are_shared(self):
+        """测试底层异常传递给所有等待者"""
+        client = CoalescingLLMClient(SlowClient(fail=True))
+
+        def call():
+            try:
+                client.invoke("quiz")
+            except ConnectionError as e:
+                return e
+
+        errors = self._run_threads(call, 4)
+        self.assertTrue(all(isinstance(e, ConnectionError) for e in errors))
+
+    def test_async_tasks_share_one_call(self):
+        """测试asyncio任务与同一请求合并"""
+        inner = SlowClient()
+        client = CoalescingLLMClient(inner)
+
+        async def main():
+            return await asyncio.gather(*(client.ainvoke("quiz") for _ in range(5)))
+
+        self.assertEqual(asyncio.run(main()), ["answer to quiz"] * 5)
+        self.assertEqual(inner.invoke_calls, 1)
+
+    def test_cancelled_follower_does_not_break_leader(self):
+        """测试取消一个等待者不影响调用者和其他等待者"""
+        inner = SlowClient()
+        client = CoalescingLLMClient(inner)
+
+        async def main():
+            leader = asyncio.create_task(client.ainvoke("quiz"))
+            await asyncio.sleep(0.01)
+            follower = asyncio.create_task(client.ainvoke("quiz"))
+            other = asyncio.create_task(client.ainvoke("quiz"))
+            await asyncio.sleep(0.01)
+            follower.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await follower
+            return await leader, await other
+
+        self.assertEqual(asyncio.run(main()), ("answer to quiz", "answer to quiz"))
+        self.assertEqual(inner.invoke_calls, 1)
+
+    def test_cancelled_leader_does_not_break_followers(self):
+        """测试取消发起调用的任务不影响等待同一结果的其他调用者"""
+        inner = SlowClient()
+        client = CoalescingLLMClient(inner)
+
+        async def main():
+            leader = asyncio.create_task(client.ainvoke("quiz"))
+            await asyncio.sleep(0.01)
+            follower = asyncio.create_task(client.ainvoke("quiz"))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        self.assertEqual(asyncio.run(main()), "answer to quiz")
+        self.assertEqual(inner.invoke_calls, 1)
+
+    def test_cancelled_sole_caller_releases_key(self):
+        """测试唯一的调用者被取消后释放请求键，之后的相同请求重新调用LLM"""
+        inner = SlowClient()
+        client = CoalescingLLMClient(inner)
+
+        async def main():
+            leader = asyncio.create_task(client.ainvoke("quiz"))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await client.ainvoke("quiz")
+
+        self.assertEqual(asyncio.run(main()), "answer to quiz")
+        self.assertEqual(inner.invoke_calls, 2)
+
+    def test_stream_fans_out_to_all_subscribers(self):
+        """测试流式片段广播给所有订阅者"""
+        inner = SlowClient()
+        client = CoalescingLLMClient(inner)
+
+        results = self._run_threads(lambda: list(client.invoke_stream("math")), 5)
+
+        self.assertEqual(results, [["quiz ", "about ", "math"]] * 5)
+        self.assertEqual(inner.stream_calls, 1)
+
+    def test_stream_stops_when_all_subscribers_leave(self):
+        """测试所有订阅者提前停止后，上游流被关闭而不是读到结束"""
+        inner = LongStreamClient()
+        client = CoalescingLLMClient(inner)
+
+        stream = client.invoke_stream("math")
+        self.assertEqual(next(stream), "0 ")
+        stream.close()
+
+        self.assertTrue(inner.closed.wait(1))
+        self.assertLess(inner.produced, 100)
+        # 键已释放，之后的相同请求会发起新的流
+        self.assertEqual(next(client.invoke_stream("math")), "0 ")
+
+    def test_async_stream_stops_when_all_subscribers_leave(self):
+        """测试异步订阅者全部停止后，异步上游流被关闭"""
+        inner = LongStreamClient()
+        client = CoalescingLLMClient(inner)
+
+        async def main():
+            first = client.astream("math")
+            second = client.astream("math")
+            self.assertEqual(await first.__anext__(), "0 ")
+            self.assertEqual(await second.__anext__(), "0 ")
+            await first.aclose()
+            self.assertFalse(inner.closed.is_set())
+            await second.aclose()
+            await asyncio.sleep(0.05)
+
+        asyncio.run(main())
+        self.assertTrue(inner.closed.is_set())
+        self.assertLess(inner.produced, 100)
+
+    def test_async_stream_subscribers(self):
+        """测试异步订阅者收到完整的流"""
+        inner = SlowClient()
+        client = CoalescingLLMClient(inner)
+
+        async def collect():
+            return [chunk async for chunk in client.astream("math")]
+
+        async def main():
+            return await asyncio.gather(*(collect() for _ in range(3)))
+
+        self.assertEqual(asyncio.run(main()), [["quiz ", "about ", "math"]] * 3)
+        self.assertEqual(inner.stream_calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -155,5 +155,289 @@ class TestConditionalBranchNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             no_default_node.execute({"user_query": "test"})
 
+    def test_prompt_prefix_is_stable(self):
+        """提示词中分类定义部分预先生成，只有输入问题会变化"""
+        from src.workflow.nodes.conditional_branch_node import CLASSIFICATION_PROMPT_TEMPLATE
+        expected = CLASSIFICATION_PROMPT_TEMPLATE.format(
+            class_definitions=self.branch_node._generate_class_definitions_text(),
+            input_text="什么是{x}?"
+        )
+        self.assertEqual(self.branch_node._format_classification_prompt("什么是{x}?"), expected)
+
+        first = self.branch_node._format_classification_prompt("问题一")
+        second = self.branch_node._format_classification_prompt("另一个问题")
+        prefix = first.split("问题一")[0]
+        self.assertTrue(second.startswith(prefix))
+        self.assertIn("Educational", prefix)
+
+    def test_json_extractor_reused(self):
+        """JSON提取器在构造时创建，多次分类复用同一个实例"""
+        extractor = self.branch_node._json_extractor
+        self.branch_node.execute({"user_query": "数学怎么学"})
+        self.branch_node.execute({"user_query": "今天天气"})
+        self.assertIs(self.branch_node._json_extractor, extractor)
+
+    def test_default_classification_not_shared(self):
+        """无法解析时返回的默认分类结果互不影响"""
+        first = self.branch_node._extract_classification("no json here")
+        first["class_name"] = "changed"
+        second = self.branch_node._extract_classification("no json here")
+        self.assertEqual(second["class_name"], "General")
+
+    def test_set_classes_rebuilds_prompt(self):
+        """更新分类定义后提示词和分类映射同步更新"""
+        self.branch_node.set_classes(self.classes + [
+            ClassDefinition(name="Sports", description="体育相关", next_node_id="sports_handler")
+        ])
+        self.assertIn("3. Sports: 体育相关", self.branch_node._format_classification_prompt("x"))
+        self.assertEqual(self.branch_node._get_next_node_id("Sports"), "sports_handler")
+        with self.assertRaises(ValueError):
+            self.branch_node.set_classes([])
+
+    def test_local_classifier_fast_path(self):
+        """本地分类器置信度足够时不调用LLM"""
+        calls = []
+        def counting_invoke(prompt):
+            calls.append(prompt)
+            return """{"class_name": "General", "confidence": 0.70, "reason": "LLM"}"""
+        self.fake_llm.invoke = counting_invoke
+
+        node = ConditionalBranchNode(
+            node_id="local_branch",
+            node_name="Local Branch Node",
+            classes=self.classes,
+            input_variable_name="user_query",
+            llm_client=self.fake_llm,
+            default_class=self.default_class,
+            local_threshold=0.6
+        )
+        result = node.execute({"user_query": "晚饭吃什么?"})
+        self.assertEqual(result["next_node_id"], "daily_handler")
+        self.assertEqual(result["classification_result"]["source"], "local")
+        self.assertEqual(calls, [])
+
+        # 相似度不足时回退到LLM
+        result = node.execute({"user_query": "随便聊聊"})
+        self.assertEqual(result["next_node_id"], "general_handler")
+        self.assertEqual(len(calls), 1)
+
+        self.assertEqual(node.stats.local_hits, 1)
+        self.assertEqual(node.stats.llm_items, 1)
+        self.assertEqual(node.stats.llm_calls, 1)
+        self.assertAlmostEqual(node.stats.fast_path_rate, 0.5)
+
+    def test_local_classifier_disabled_by_default(self):
+        """默认不启用本地分类器，所有分类都调用LLM"""
+        self.assertIsNone(self.branch_node.local_classifier)
+        self.branch_node.execute({"user_query": "晚饭吃什么?"})
+        self.assertEqual(self.branch_node.stats.llm_calls, 1)
+        self.assertEqual(self.branch_node.stats.fast_path_rate, 0.0)
+
+    def _batch_invoke(self, prompts):
+        """模拟能处理批量提示词的LLM"""
+        import json
+        import re
+        single_invoke = self.fake_llm.invoke
+
+        def invoke(prompt):
+            prompts.append(prompt)
+            if "JSON数组" not in prompt:
+                return single_invoke(prompt)
+            results = []
+            for index, text in re.findall(r'^\[(\d+)\] (".*")$', prompt, re.M):
+                text = json.loads(text)
+                class_name = "Educational" if "数学" in text else "Daily" if "天气" in text else "General"
+                results.append({"index": int(index), "class_name": class_name, "confidence": 0.9})
+            return "结果如下：" + json.dumps(results, ensure_ascii=False)
+        return invoke
+
+    def test_classify_batch(self):
+        """批量分类按batch_size打包提示词，并按编号分发结果"""
+        prompts = []
+        self.branch_node.llm_client.invoke = self._batch_invoke(prompts)
+        self.branch_node.batch_size = 2
+        results = self.branch_node.classify_batch(["数学题", "天气如何", "随便", "学数学"])
+        self.assertEqual([r["class_name"] for r in results], ["Educational", "Daily", "General", "Educational"])
+        self.assertEqual(len(prompts), 2)
+        self.assertEqual(self.branch_node.stats.batch_calls, 2)
+
+    def test_batch_counts_llm_calls_per_prompt(self):
+        """批量分类时llm_calls按实际发送的提示词计数，而不是按输入数量"""
+        prompts = []
+        self.branch_node.llm_client.invoke = self._batch_invoke(prompts)
+        self.branch_node.batch_size = 3
+        self.branch_node.classify_batch(["数学题", "天气如何", "随便", "学数学", "天气"])
+
+        stats = self.branch_node.stats
+        self.assertEqual(len(prompts), 2)
+        self.assertEqual(stats.llm_calls, 2)
+        self.assertEqual(stats.batch_calls, 2)
+        self.assertEqual(stats.llm_items, 5)
+        self.assertEqual(stats.requests, 5)
+
+        import asyncio
+        from types import SimpleNamespace
+        self.branch_node.llm_client = SimpleNamespace(invoke=self._batch_invoke(prompts))
+        asyncio.run(self.branch_node.aclassify_batch(["数学", "天气?", "你好"]))
+        self.assertEqual(len(prompts), 3)
+        self.assertEqual(stats.llm_calls, 3)
+        self.assertEqual(stats.llm_items, 8)
+
+    def test_classify_batch_missing_items_fall_back(self):
+        """批量响应中缺失的输入单独调用LLM分类"""
+        prompts = []
+        single_invoke = self.fake_llm.invoke
+        def partial_invoke(prompt):
+            prompts.append(prompt)
+            if "JSON数组" in prompt:
+                return '[{"index": 0, "class_name": "Daily", "confidence": 0.9}, {"index": 7, "class_name": "Daily"}]'
+            return single_invoke(prompt)
+        self.branch_node.llm_client.invoke = partial_invoke
+
+        results = self.branch_node.classify_batch(["今天天气", "学习数学"])
+        self.assertEqual(results[0]["class_name"], "Daily")
+        self.assertEqual(results[1]["class_name"], "Educational")
+        self.assertEqual(len(prompts), 2)
+
+    def test_classify_batch_without_default_raises(self):
+        """没有默认分类时，未知分类导致批量分类失败"""
+        node = ConditionalBranchNode(
+            node_id="no_default",
+            node_name="No Default Node",
+            classes=self.classes,
+            input_variable_name="user_query",
+            llm_client=self.fake_llm
+        )
+        node.llm_client.invoke = lambda prompt: '[{"index": 0, "class_name": "Unknown"}]'
+        with self.assertRaises(ValueError):
+            node.classify_batch(["test"])
+
+    def test_aclassify_batch(self):
+        """异步批量分类"""
+        import asyncio
+        from types import SimpleNamespace
+        prompts = []
+        # 只提供同步invoke的客户端，异步调用在线程池中执行
+        self.branch_node.llm_client = SimpleNamespace(invoke=self._batch_invoke(prompts))
+        results = asyncio.run(self.branch_node.aclassify_batch(["数学题", "天气"]))
+        self.assertEqual([r["class_name"] for r in results], ["Educational", "Daily"])
+        self.assertEqual(len(prompts), 1)
+
+    def test_concurrent_sessions_micro_batched(self):
+        """设置batch_window后，并发执行的会话合并为一次批量分类"""
+        import asyncio
+        from types import SimpleNamespace
+        prompts = []
+        node = ConditionalBranchNode(
+            node_id="batched_branch",
+            node_name="Batched Branch Node",
+            classes=self.classes,
+            input_variable_name="user_query",
+            llm_client=SimpleNamespace(invoke=self._batch_invoke(prompts)),
+            default_class=self.default_class,
+            batch_window=0.05
+        )
+
+        async def main():
+            return await asyncio.gather(*(
+                node.aexecute({"user_query": query}) for query in ["数学", "天气", "你好"]
+            ))
+
+        results = asyncio.run(main())
+        self.assertEqual([r["next_node_id"] for r in results],
+                         ["educational_handler", "daily_handler", "general_handler"])
+        self.assertEqual(len(prompts), 1)
+
+        # 同步执行也通过微批处理器
+        result = node.execute({"user_query": "天气"})
+        self.assertEqual(result["next_node_id"], "daily_handler")
+        self.assertEqual(node.stats.batch_calls, 2)
+
+    def _cached_node(self, calls, **kwargs):
+        def counting_invoke(prompt):
+            calls.append(prompt)
+            return """{"class_name": "Daily", "confidence": 0.9, "reason": "缓存测试"}"""
+        self.fake_llm.invoke = counting_invoke
+        return ConditionalBranchNode(
+            node_id="cached_branch",
+            node_name="Cached Branch Node",
+            classes=self.classes,
+            input_variable_name="user_query",
+            llm_client=self.fake_llm,
+            default_class=self.default_class,
+            cache_size=16,
+            **kwargs
+        )
+
+    def test_classification_cache(self):
+        """规范化后相同的输入复用分类结果"""
+        from src.workflow.nodes.conditional_branch_node import normalize_input
+        self.assertEqual(normalize_input("  Ｙes \n"), "yes")
+        self.assertNotEqual(normalize_input("1+1"), normalize_input("1-1"))
+
+        calls = []
+        node = self._cached_node(calls)
+        first = node.execute({"user_query": "Yes"})
+        second = node.execute({"user_query": "  yes "})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second["classification_result"], first["classification_result"])
+        self.assertEqual(node.stats.cache_hits, 1)
+
+        # 返回的是副本，修改不会影响缓存
+        second["classification_result"]["class_name"] = "changed"
+        self.assertEqual(node.execute({"user_query": "yes"})["classification_result"]["class_name"], "Daily")
+
+    def test_classification_cache_invalidated_when_classes_change(self):
+        """分类定义变化后不再使用旧的缓存结果"""
+        calls = []
+        node = self._cached_node(calls)
+        node.execute({"user_query": "不知道"})
+        node.set_classes(list(reversed(self.classes)))
+        node.execute({"user_query": "不知道"})
+        self.assertEqual(len(calls), 2)
+
+    def test_classification_cache_ttl(self):
+        """缓存结果过期后重新调用LLM"""
+        from unittest import mock
+        calls = []
+        node = self._cached_node(calls, cache_ttl=10)
+        with mock.patch("time.monotonic", return_value=100.0):
+            node.execute({"user_query": "不知道"})
+        with mock.patch("time.monotonic", return_value=105.0):
+            node.execute({"user_query": "不知道"})
+        with mock.patch("time.monotonic", return_value=111.0):
+            node.execute({"user_query": "不知道"})
+        self.assertEqual(len(calls), 2)
+
+    def test_failed_extraction_not_cached(self):
+        """无法解析的响应不会被缓存"""
+        calls = []
+        node = self._cached_node(calls)
+        node.llm_client.invoke = lambda prompt: calls.append(prompt) or "not json"
+        node.execute({"user_query": "不知道"})
+        node.execute({"user_query": "不知道"})
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(node.stats.cache_hits, 0)
+
+    def test_unknown_class_not_cached(self):
+        """不属于已配置分类的结果不会被缓存"""
+        calls = []
+        node = self._cached_node(calls)
+        node.llm_client.invoke = lambda prompt: calls.append(prompt) or '{"class_name": "Sports", "confidence": 0.9}'
+        first = node.execute({"user_query": "足球"})
+        node.execute({"user_query": "足球"})
+        self.assertEqual(first["next_node_id"], self.default_class.next_node_id)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(node.stats.cache_hits, 0)
+
+    def test_batch_uses_cache(self):
+        """批量分类读取并写入同一个缓存"""
+        calls = []
+        node = self._cached_node(calls)
+        node.execute({"user_query": "不知道"})
+        results = node.classify_batch(["不知道", "不知道 "])
+        self.assertEqual([r["class_name"] for r in results], ["Daily", "Daily"])
+        self.assertEqual(len(calls), 1)
+
 if __name__ == "__main__":
     unittest.main()
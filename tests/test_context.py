@@ -0,0 +1,115 @@
+"""
+写时复制工作流上下文的单元测试。
+"""
+import unittest
+import pickle
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow.context import WorkflowContext, _MAX_LAYERS
+from src.workflow.engine import Workflow
+from src.workflow.nodes.start_node import StartNode
+from src.workflow.nodes.end_node import EndNode
+
+
+class TestWorkflowContext(unittest.TestCase):
+    """测试WorkflowContext的字典语义和复制行为"""
+
+    def test_dict_interface(self):
+        """测试与字典相同的基本读写接口"""
+        context = WorkflowContext({"a": 1}, b=2)
+        context["c"] = 3
+
+        self.assertEqual(context["a"], 1)
+        self.assertEqual(context.get("b"), 2)
+        self.assertIsNone(context.get("missing"))
+        self.assertIn("c", context)
+        self.assertEqual(len(context), 3)
+        self.assertEqual(sorted(context), ["a", "b", "c"])
+        self.assertEqual(context, {"a": 1, "b": 2, "c": 3})
+        self.assertEqual(repr(context), "{'a': 1, 'b': 2, 'c': 3}")
+        self.assertEqual(context.pop("a"), 1)
+        self.assertNotIn("a", context)
+        with self.assertRaises(KeyError):
+            context["a"]
+
+    def test_copy_is_independent(self):
+        """测试副本和原上下文的修改互不影响"""
+        original = WorkflowContext({"shared": "value", "keep": 1})
+        clone = original.copy()
+
+        clone["shared"] = "changed"
+        clone["new"] = True
+        del clone["keep"]
+        original["other"] = "original only"
+
+        self.assertEqual(original, {"shared": "value", "keep": 1, "other": "original only"})
+        self.assertEqual(clone, {"shared": "changed", "new": True})
+
+    def test_copy_shares_frozen_layers(self):
+        """测试复制不会复制已有的变量"""
+        original = WorkflowContext({"big": list(range(1000))})
+        clone = original.copy()
+
+        self.assertIs(clone._layers, original._layers)
+        self.assertEqual(clone._local, {})
+        self.assertIs(clone["big"], original["big"])
+
+    def test_delete_then_reassign(self):
+        """测试删除冻结层中的变量后重新赋值"""
+        context = WorkflowContext({"key": 1}).copy()
+        del context["key"]
+        self.assertNotIn("key", context)
+        self.assertEqual(len(context), 0)
+
+        context["key"] = 2
+        self.assertEqual(context["key"], 2)
+        with self.assertRaises(KeyError):
+            del context["missing"]
+
+    def test_layer_depth_is_bounded(self):
+        """测试长链复制后层数有上界"""
+        context = WorkflowContext()
+        for i in range(100):
+            context = context.copy()
+            context[f"var_{i}"] = i
+
+        self.assertLessEqual(len(context._layers), _MAX_LAYERS)
+        self.assertEqual(context["var_0"], 0)
+        self.assertEqual(context["var_99"], 99)
+        self.assertEqual(len(context), 100)
+
+    def test_pickle_and_to_dict(self):
+        """测试序列化和转换为普通字典"""
+        context = WorkflowContext({"a": 1}).copy()
+        context["b"] = 2
+
+        restored = pickle.loads(pickle.dumps(context))
+        self.assertIsInstance(restored, WorkflowContext)
+        self.assertEqual(restored, {"a": 1, "b": 2})
+
+        plain = context.to_dict()
+        self.assertIs(type(plain), dict)
+        plain["c"] = 3
+        self.assertNotIn("c", context)
+
+    def test_workflow_does_not_mutate_initial_context(self):
+        """测试工作流运行不会修改传入的初始上下文"""
+        workflow = Workflow([
+            StartNode("start", "Start", ["input_data"], next_node_id="end"),
+            EndNode("end", "End", ["input_data"])
+        ])
+        initial_context = {"input_data": "hello"}
+        result = workflow.run(initial_context)
+
+        # 公开的run返回普通字典，而不是内部使用的WorkflowContext
+        self.assertIs(type(result), dict)
+        self.assertEqual(result, {"input_data": "hello"})
+        self.assertEqual(initial_context, {"input_data": "hello"})
+
+
+if __name__ == "__main__":
+    unittest.main()
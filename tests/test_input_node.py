@@ -2,10 +2,18 @@ import unittest
 from unittest.mock import patch
 import os
 import sys
+import asyncio
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from src.workflow import silence, reset_logging
+from src.workflow.base import BaseNode
+from src.workflow.checkpoint import SQLiteCheckpointStore, WorkflowSuspended
+from src.workflow.engine import AsyncWorkflow, Workflow
 from src.workflow.nodes.input_node import InputNode
+from src.workflow.nodes.start_node import StartNode
+from src.workflow.nodes.end_node import EndNode
+from src.workflow.nodes.subworkflow_node import SubWorkflowNode
 
 class TestInputNode(unittest.TestCase):
     """测试InputNode的功能"""
@@ -127,5 +135,145 @@ class TestInputNode(unittest.TestCase):
         self.assertEqual(result["content"], "有效输入")
         self.assertEqual(mock_input.call_count, 2)
 
+
+class GradeNode(BaseNode):
+    """根据答案打分，记录执行次数"""
+    
+    def __init__(self, node_id, calls):
+        super().__init__(node_id, node_id)
+        self.calls = calls
+    
+    def execute(self, context):
+        self.calls.append(self.node_id)
+        updated_context = context.copy()
+        updated_context[self.node_id + "_score"] = len(str(context.get("answer", "")))
+        return updated_context
+
+
+class TestInputNodeSuspend(unittest.TestCase):
+    """测试InputNode暂停工作流等待提交输入"""
+    
+    def setUp(self):
+        silence()
+        self.store = SQLiteCheckpointStore()
+        self.calls = []
+    
+    def tearDown(self):
+        self.store.close()
+        reset_logging()
+    
+    def build_workflow(self, cls=Workflow):
+        return cls([
+            StartNode("start", "Start", ["question"]),
+            GradeNode("warmup", self.calls),
+            InputNode("ask", "Ask", "请回答:", "answer", validation_func=lambda x: x.isdigit(), suspend=True),
+            GradeNode("grade", self.calls),
+            InputNode("ask_again", "Ask Again", "请解释:", "explanation", suspend=True),
+            EndNode("end", "End", ["answer", "explanation", "grade_score"]),
+        ], checkpoint_store=self.store)
+    
+    @patch('builtins.input')
+    def test_suspend_and_submit(self, mock_input):
+        """测试暂停、提交输入、再次暂停和完成"""
+        workflow = self.build_workflow()
+        
+        with self.assertRaises(WorkflowSuspended) as suspended:
+            workflow.run({"question": "1+1=?"}, run_id="lesson-1")
+        handle = suspended.exception
+        self.assertEqual((handle.run_id, handle.node_id, handle.prompt_text), ("lesson-1", "ask", "请回答:"))
+        self.assertIsNone(handle.invalid_input)
+        
+        with self.assertRaises(WorkflowSuspended) as suspended:
+            workflow.submit_input("lesson-1", "42")
+        self.assertEqual(suspended.exception.node_id, "ask_again")
+        
+        result = workflow.submit_input("lesson-1", "因为...")
+        self.assertEqual(result["answer"], "42")
+        self.assertEqual(result["explanation"], "因为...")
+        self.assertEqual(result["grade_score"], 2)
+        # 暂停前完成的节点不会重复执行，也不会调用input()
+        self.assertEqual(self.calls, ["warmup", "grade"])
+        mock_input.assert_not_called()
+    
+    def test_invalid_submission_suspends_again(self):
+        """测试提交未通过验证的输入时再次暂停"""
+        workflow = self.build_workflow()
+        with self.assertRaises(WorkflowSuspended):
+            workflow.run({"question": "1+1=?"}, run_id="lesson-1")
+        
+        with self.assertRaises(WorkflowSuspended) as suspended:
+            workflow.submit_input("lesson-1", "two")
+        self.assertEqual(suspended.exception.node_id, "ask")
+        self.assertEqual(suspended.exception.invalid_input, "two")
+        
+        with self.assertRaises(WorkflowSuspended) as suspended:
+            workflow.submit_input("lesson-1", "2")
+        self.assertEqual(suspended.exception.node_id, "ask_again")
+    
+    def test_submit_to_run_not_waiting(self):
+        """测试向没有等待输入的运行提交时报错"""
+        workflow = self.build_workflow()
+        with self.assertRaises(ValueError):
+            workflow.submit_input("missing", "1")
+        
+        with self.assertRaises(WorkflowSuspended):
+            workflow.run({"question": "1+1=?"}, run_id="lesson-1")
+        with self.assertRaises(WorkflowSuspended):
+            workflow.submit_input("lesson-1", "1")
+        workflow.submit_input("lesson-1", "done")
+        with self.assertRaises(ValueError):
+            workflow.submit_input("lesson-1", "again")
+    
+    def test_suspend_requires_checkpoint_store(self):
+        """测试没有检查点存储时不能暂停"""
+        workflow = Workflow([InputNode("ask", "Ask", "请回答:", "answer", suspend=True)])
+        with self.assertRaises(RuntimeError):
+            workflow.run({})
+    
+    def test_suspend_inside_subworkflow(self):
+        """测试在子工作流内部暂停和继续"""
+        sub_workflow = SubWorkflowNode(
+            node_id="quiz",
+            node_name="Quiz",
+            nodes=[
+                StartNode("quiz_start", "Start", ["question"]),
+                GradeNode("prepare", self.calls),
+                InputNode("quiz_ask", "Ask", "请回答:", "answer", suspend=True),
+                GradeNode("check", self.calls),
+            ],
+            input_mapping={"question": "question"},
+            output_mapping={"answer": "answer", "check_score": "score"},
+        )
+        workflow = Workflow([
+            StartNode("start", "Start", ["question"]),
+            sub_workflow,
+            EndNode("end", "End", ["answer", "score"]),
+        ], checkpoint_store=self.store)
+        
+        with self.assertRaises(WorkflowSuspended) as suspended:
+            workflow.run({"question": "1+1=?"}, run_id="lesson-2")
+        self.assertEqual(suspended.exception.node_id, "quiz_ask")
+        
+        result = workflow.submit_input("lesson-2", "two")
+        self.assertEqual(result["answer"], "two")
+        self.assertEqual(result["score"], 3)
+        self.assertEqual(self.calls, ["prepare", "check"])
+    
+    def test_async_suspend_and_submit(self):
+        """测试异步工作流的暂停和继续"""
+        workflow = self.build_workflow(AsyncWorkflow)
+        
+        async def session():
+            with self.assertRaises(WorkflowSuspended):
+                await workflow.arun({"question": "1+1=?"}, run_id="lesson-3")
+            with self.assertRaises(WorkflowSuspended):
+                await workflow.asubmit_input("lesson-3", "2")
+            return await workflow.asubmit_input("lesson-3", "因为...")
+        
+        result = asyncio.run(session())
+        self.assertEqual(result["grade_score"], 1)
+        self.assertEqual(self.calls, ["warmup", "grade"])
+
+
 if __name__ == '__main__':
     unittest.main()
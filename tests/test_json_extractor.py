@@ -95,5 +95,51 @@ class TestJSONExtractorNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             default_extractor.execute(missing_var_context)
 
+    def test_braces_inside_strings(self):
+        """测试字符串中的括号和转义引号不影响匹配"""
+        extractor = JSONExtractorNode("json_test", "JSON Extractor", "llm_output", "parsed_json")
+        text = '评分如下：\n```json\n{"rule": "包含 } 和 \\" 的说明", "score": 3}\n```'
+        result = extractor.execute({"llm_output": text})
+        self.assertEqual(result["parsed_json"], {"rule": "包含 } 和 \" 的说明", "score": 3})
+
+    def test_tries_next_candidate(self):
+        """测试第一个候选无效或不符合schema时继续尝试后面的候选"""
+        extractor = JSONExtractorNode("json_test", "JSON Extractor", "llm_output", "parsed_json")
+        result = extractor.execute({"llm_output": '格式为{problem}，结果：{"problem": "1+1"}'})
+        self.assertEqual(result["parsed_json"], {"problem": "1+1"})
+
+        try:
+            import jsonschema  # noqa: F401
+        except ImportError:
+            return
+        schema_extractor = JSONExtractorNode(
+            "schema_test", "Schema JSON Extractor", "llm_output", "parsed_json",
+            schema={"type": "object", "required": ["score"]}
+        )
+        result = schema_extractor.execute({"llm_output": '示例：{"example": true}，实际：{"score": 5}'})
+        self.assertEqual(result["parsed_json"], {"score": 5})
+
+    def test_error_messages(self):
+        """测试不同失败原因的错误信息"""
+        extractor = JSONExtractorNode("json_test", "JSON Extractor", "llm_output", "parsed_json")
+        cases = {
+            "no braces at all": "No JSON object found",
+            '{"answer": "truncated': "No complete JSON object found",
+            "{not json}": "Invalid JSON format",
+        }
+        for text, message in cases.items():
+            with self.assertRaises(ValueError) as context:
+                extractor.extract(text)
+            self.assertIn(message, str(context.exception))
+
+    def test_allow_arrays(self):
+        """测试数组提取选项"""
+        extractor = JSONExtractorNode("json_test", "JSON Extractor", "llm_output", "parsed_json")
+        array_extractor = JSONExtractorNode("json_test", "JSON Extractor", "llm_output", "parsed_json",
+                                            allow_arrays=True)
+        text = '选项：["A", "B"]，详情：{"choice": "A"}'
+        self.assertEqual(extractor.extract(text), {"choice": "A"})
+        self.assertEqual(array_extractor.extract(text), ["A", "B"])
+
 if __name__ == "__main__":
     unittest.main()
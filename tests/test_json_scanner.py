@@ -0,0 +1,136 @@
+"""
+JSON扫描器的单元测试。
+"""
+import unittest
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow.json_scanner import IncrementalJSONScanner, iter_json_values
+from src.workflow.nodes.llm_node import LLMNode
+from src.workflow.nodes.json_extractor_node import JSONExtractorNode
+from src.workflow.log import silence, reset_logging
+
+
+def feed_in_chunks(scanner, text, size):
+    for start in range(0, len(text), size):
+        if scanner.feed(text[start:start + size]):
+            return True
+    return scanner.found
+
+
+class TestIncrementalJSONScanner(unittest.TestCase):
+    """测试增量扫描器在任意分块下的结果"""
+
+    TEXT = ('好的，下面是题目 {not json}：\n```json\n'
+            '{"problem": "括号}和\\"引号{", "answer": {"score_points": [{"value": "2", "rule": "r"}]}}\n'
+            '```\n补充说明 {"ignored": true}')
+
+    def test_any_chunking(self):
+        """测试字符串中的括号、转义引号和分块边界"""
+        expected = {"problem": "括号}和\"引号{", "answer": {"score_points": [{"value": "2", "rule": "r"}]}}
+        for size in (1, 2, 3, 7, len(self.TEXT)):
+            scanner = IncrementalJSONScanner()
+            self.assertTrue(feed_in_chunks(scanner, self.TEXT, size), size)
+            self.assertEqual(scanner.value, expected)
+
+    def test_escape_at_chunk_boundary(self):
+        """测试转义符恰好位于片段末尾"""
+        scanner = IncrementalJSONScanner()
+        scanner.feed('{"a": "x\\')
+        scanner.feed('"}"}')
+        self.assertTrue(scanner.found)
+        self.assertEqual(scanner.value, {"a": 'x"}'})
+
+    def test_incomplete_and_arrays(self):
+        """测试不完整的JSON和数组选项"""
+        scanner = IncrementalJSONScanner()
+        self.assertFalse(scanner.feed('[1, 2] {"a": [1, 2'))
+        self.assertFalse(scanner.found)
+
+        scanner = IncrementalJSONScanner(allow_arrays=True)
+        self.assertTrue(scanner.feed('[1, 2] {"a": 1}'))
+        self.assertEqual(scanner.value, [1, 2])
+
+
+class TestIterJSONValues(unittest.TestCase):
+    """测试完整文本中的候选迭代"""
+
+    def test_iterates_top_level_values(self):
+        """测试依次返回所有顶层值，跳过无效候选和嵌套对象"""
+        text = '{bad} {"a": {"nested": 1}} text [1, 2] {"b": "}"}'
+        self.assertEqual([value for value, _, _ in iter_json_values(text)],
+                         [{"a": {"nested": 1}}, {"b": "}"}])
+        self.assertEqual([value for value, _, _ in iter_json_values(text, allow_arrays=True)],
+                         [{"a": {"nested": 1}}, [1, 2], {"b": "}"}])
+
+    def test_positions(self):
+        """测试返回的起止位置"""
+        text = 'x {"a": 1} y'
+        value, start, end = next(iter_json_values(text))
+        self.assertEqual(text[start:end], '{"a": 1}')
+
+
+class JSONStreamClient:
+    """先输出JSON、再输出很长尾部内容的模拟流式客户端"""
+
+    def __init__(self):
+        self.produced = 0
+
+    def invoke(self, prompt):
+        return 'Result: {"score": 8}'
+
+    def invoke_stream(self, prompt):
+        for chunk in ['Result: {"sco', 're": 8', '}', ' and a long explanation'] + ['...'] * 100:
+            self.produced += 1
+            yield chunk
+
+
+class TestLLMNodeStreamingExtraction(unittest.TestCase):
+    """测试LLMNode在流式输出中提取JSON"""
+
+    def setUp(self):
+        silence()
+
+    def tearDown(self):
+        reset_logging()
+
+    def _node(self, client, stream=True, **kwargs):
+        extractor = JSONExtractorNode("extract", "Extract", "mark", "mark_extracted", **kwargs)
+        return LLMNode("llm", "LLM", "Grade {answer}", "mark", client,
+                       stream=stream, json_extractor=extractor)
+
+    def test_stream_stops_when_object_closes(self):
+        """测试JSON闭合后立即结束流式读取"""
+        client = JSONStreamClient()
+        node = self._node(client)
+        result = node.execute({"answer": "a"})
+
+        self.assertEqual(result["mark_extracted"], {"score": 8})
+        self.assertEqual(result["mark"], 'Result: {"score": 8}')
+        self.assertEqual(client.produced, 3)
+        self.assertEqual(node.get_output_variables(), ["mark", "mark_extracted"])
+
+    def test_non_stream_extraction(self):
+        """测试非流式调用对完整响应提取JSON"""
+        result = self._node(JSONStreamClient(), stream=False).execute({"answer": "a"})
+        self.assertEqual(result["mark_extracted"], {"score": 8})
+
+    def test_default_value_on_failure(self):
+        """测试提取失败时使用提取器的默认值"""
+        class PlainClient:
+            def invoke(self, prompt):
+                return "no json here"
+
+        node = self._node(PlainClient(), stream=False, default_value={"score": 0}, raise_on_error=False)
+        self.assertEqual(node.execute({"answer": "a"})["mark_extracted"], {"score": 0})
+
+        node = self._node(PlainClient(), stream=False)
+        with self.assertRaises(ValueError):
+            node.execute({"answer": "a"})
+
+
+if __name__ == "__main__":
+    unittest.main()
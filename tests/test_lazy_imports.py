@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import json
+import subprocess
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def loaded_modules(code: str) -> list:
+    """在新进程中执行代码，返回加载过的重量级依赖"""
+    probe = code + (
+        "\nimport json, sys\n"
+        "print(json.dumps([m for m in ('openai', 'httpx', 'httpx2', 'pydantic', 'jsonschema') "
+        "if m in sys.modules]))"
+    )
+    output = subprocess.run([sys.executable, "-c", probe], cwd=PROJECT_ROOT,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class TestLazyImports(unittest.TestCase):
+    """测试src.llm包的延迟导入"""
+
+    def test_package_import_does_not_load_sdk(self):
+        """导入src.workflow和src.llm不会加载openai等依赖"""
+        self.assertEqual(loaded_modules("import src.workflow, src.llm"), [])
+
+    def test_offline_workflow_does_not_load_sdk(self):
+        """使用FakeLLMClient、重试策略和JSON提取的工作流不会加载openai"""
+        code = (
+            "from src.llm import FakeLLMClient, RetryPolicy\n"
+            "from src.workflow.nodes.llm_node import LLMNode\n"
+            "from src.workflow.nodes.conditional_branch_node import ConditionalBranchNode, ClassDefinition\n"
+            "from src.workflow import silence\n"
+            "silence()\n"
+            "node = LLMNode('n', 'n', 'hi {q}', 'out', FakeLLMClient(), retry_policy=RetryPolicy())\n"
+            "node.execute({'q': 'x'})\n"
+            "ConditionalBranchNode('b', 'b', [ClassDefinition('A', 'a', 'x')], 'q', FakeLLMClient(),\n"
+            "                      default_class=ClassDefinition('B', 'b', 'y')).execute({'q': 'x'})\n"
+        )
+        self.assertNotIn("openai", loaded_modules(code))
+
+    def test_provider_clients_loaded_on_access(self):
+        """首次访问时导入提供商客户端"""
+        try:
+            import openai  # noqa: F401
+        except ImportError:
+            self.skipTest("openai package not installed")
+        import src.llm
+        from src.llm.openai_client import OpenAIClient
+        from src.llm.deepseek_client import DeepSeekClient
+        self.assertIs(src.llm.OpenAIClient, OpenAIClient)
+        self.assertIs(src.llm.DeepSeekClient, DeepSeekClient)
+        self.assertIn("OpenAIClient", dir(src.llm))
+
+    def test_unknown_attribute(self):
+        import src.llm
+        with self.assertRaises(AttributeError):
+            src.llm.NoSuchClient
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
 import unittest
+import asyncio
+import time
 import sys
 import os
 
@@ -6,7 +8,9 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.llm.fake_client import FakeLLMClient
-from src.llm.base_client import BaseLLMClient
+from src.llm.base_client import BaseLLMClient, has_native_async
+from src.llm.http_pool import (HTTPPoolConfig, get_shared_http_client, close_shared_http_clients,
+                               aclose_shared_http_clients)
 
 class TestFakeLLMClient(unittest.TestCase):
     """测试FakeLLMClient的功能"""
@@ -34,6 +38,175 @@ class TestFakeLLMClient(unittest.TestCase):
         response = client.invoke("This is a generic prompt")
         self.assertTrue(response.startswith("LLM Simulation: Processed prompt"))
 
+class LegacyStreamingClient(BaseLLMClient):
+    """只实现同步接口的旧式客户端"""
+
+    def invoke(self, prompt):
+        return f"echo {prompt}"
+
+    def invoke_stream(self, prompt):
+        yield "echo "
+        yield prompt
+
+
+class EndlessStreamingClient(BaseLLMClient):
+    """不断产生片段的旧式流式客户端，记录同步流是否被关闭"""
+
+    def __init__(self):
+        self.closed = False
+
+    def invoke(self, prompt):
+        return prompt
+
+    def invoke_stream(self, prompt):
+        try:
+            while True:
+                time.sleep(0.001)
+                yield "chunk "
+        finally:
+            self.closed = True
+
+
+class TestAsyncClientInterface(unittest.TestCase):
+    """测试ainvoke/astream接口"""
+
+    def test_fallback_for_legacy_client(self):
+        """测试旧式客户端通过线程池获得异步接口"""
+        client = LegacyStreamingClient()
+
+        async def main():
+            response = await client.ainvoke("hi")
+            chunks = [chunk async for chunk in client.astream("hi")]
+            return response, chunks
+
+        response, chunks = asyncio.run(main())
+        self.assertEqual(response, "echo hi")
+        self.assertEqual(chunks, ["echo ", "hi"])
+
+    def test_fallback_stream_closed_on_early_stop(self):
+        """测试异步消费者提前停止或被取消时关闭同步流"""
+        client = EndlessStreamingClient()
+
+        async def stop_early():
+            stream = client.astream("hi")
+            await stream.__anext__()
+            await stream.aclose()
+
+        asyncio.run(stop_early())
+        self.assertTrue(client.closed)
+
+        client = EndlessStreamingClient()
+
+        async def cancel():
+            async def consume():
+                async for _ in client.astream("hi"):
+                    pass
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel())
+        self.assertTrue(client.closed)
+
+    def test_has_native_async(self):
+        """测试只有覆盖了默认实现的异步方法才算原生异步接口"""
+        self.assertFalse(has_native_async(LegacyStreamingClient(), 'ainvoke'))
+        self.assertFalse(has_native_async(LegacyStreamingClient(), 'astream'))
+        self.assertTrue(has_native_async(FakeLLMClient(), 'ainvoke'))
+        self.assertTrue(has_native_async(FakeLLMClient(), 'astream'))
+
+        class DuckClient:
+            def invoke(self, prompt):
+                return prompt
+
+        self.assertFalse(has_native_async(DuckClient(), 'ainvoke'))
+
+    def test_fake_client_async(self):
+        """测试FakeLLMClient的异步调用与同步调用结果一致"""
+        client = FakeLLMClient()
+        prompt = "you need to better user's query. here's your input: what is youth?"
+
+        async def main():
+            response = await client.ainvoke(prompt)
+            chunks = [chunk async for chunk in client.astream(prompt)]
+            return response, chunks
+
+        response, chunks = asyncio.run(main())
+        self.assertEqual(response, client.invoke(prompt))
+        self.assertEqual("".join(chunks), response)
+        self.assertGreater(len(chunks), 1)
+
+    def test_fake_client_latency_is_concurrent(self):
+        """测试异步模拟延迟可以并发重叠"""
+        client = FakeLLMClient(latency=0.1)
+
+        async def main():
+            return await asyncio.gather(*(client.ainvoke("prompt") for _ in range(20)))
+
+        start = time.perf_counter()
+        responses = asyncio.run(main())
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(responses), 20)
+        self.assertLess(elapsed, 1.0)
+
+    def test_fake_client_rejects_negative_latency(self):
+        """测试负数延迟"""
+        with self.assertRaises(ValueError):
+            FakeLLMClient(latency=-1)
+
+
+class TestSharedHTTPPool(unittest.TestCase):
+    """测试基于OpenAI SDK的客户端共享HTTP连接池"""
+
+    def setUp(self):
+        try:
+            import openai  # noqa: F401
+        except ImportError:
+            self.skipTest("未安装openai")
+
+    def tearDown(self):
+        close_shared_http_clients()
+
+    def test_clients_share_connection_pool(self):
+        """测试相同配置的客户端复用同一个HTTP客户端"""
+        from src.llm.openai_client import OpenAIClient
+        from src.llm.deepseek_client import DeepSeekClient
+
+        openai_client = OpenAIClient("test-key")
+        deepseek_client = DeepSeekClient("test-key")
+        self.assertIs(openai_client.client._client, deepseek_client.client._client)
+        self.assertIs(openai_client.client._client, get_shared_http_client())
+
+    def test_async_clients_share_connection_pool(self):
+        """测试异步SDK客户端在同一事件循环中复用连接池"""
+        from src.llm.openai_client import OpenAIClient
+        from src.llm.deepseek_client import DeepSeekClient
+
+        async def main():
+            openai_async = OpenAIClient("test-key")._get_async_client()
+            deepseek_async = DeepSeekClient("test-key")._get_async_client()
+            await aclose_shared_http_clients()
+            return openai_async, deepseek_async
+
+        openai_async, deepseek_async = asyncio.run(main())
+        self.assertIs(openai_async._client, deepseek_async._client)
+        self.assertIn("deepseek", str(deepseek_async.base_url))
+
+    def test_distinct_config_uses_separate_pool(self):
+        """测试不同配置使用独立的连接池，关闭后重新创建"""
+        config = HTTPPoolConfig(max_connections=5, read_timeout=30.0)
+        pooled = get_shared_http_client(config)
+        self.assertIsNot(pooled, get_shared_http_client())
+        self.assertIs(pooled, get_shared_http_client(HTTPPoolConfig(max_connections=5, read_timeout=30.0)))
+
+        close_shared_http_clients()
+        self.assertTrue(pooled.is_closed)
+        self.assertIsNot(get_shared_http_client(config), pooled)
+
+
 # OpenAIClient的测试需要API密钥，仅做结构示例
 # class TestOpenAIClient(unittest.TestCase):
 #     """测试OpenAIClient的功能"""
@@ -89,6 +89,23 @@ class TestLLMNode(unittest.TestCase):
             node._format_prompt({})
         self.assertIn("Required variable 'input_text' not found", str(context.exception))
     
+    def test_format_prompt_with_subscript(self):
+        """测试模板中的下标访问和转义括号"""
+        node = LLMNode(
+            node_id="subscript_test",
+            node_name="Subscript Test",
+            system_prompt_template='题目：{quiz_info_extracted[problem]}，格式：{{"answer": "..."}}',
+            output_variable_name="result",
+            llm_client=self.fake_llm
+        )
+        self.assertEqual(node.input_variable_names, ["quiz_info_extracted"])
+        formatted = node._format_prompt({"quiz_info_extracted": {"problem": "1+1=?"}, "other": 1})
+        self.assertEqual(formatted, '题目：1+1=?，格式：{"answer": "..."}')
+        
+        with self.assertRaises(ValueError) as context:
+            node._format_prompt({"quiz_info_extracted": {}})
+        self.assertIn("Missing key", str(context.exception))
+    
     def test_execute_with_valid_context(self):
         """测试使用有效上下文执行LLMNode"""
         # 创建上下文
@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow.local_classifier import LocalClassifier, char_ngrams, normalize_text
+from src.workflow.nodes.conditional_branch_node import ClassDefinition
+
+CLASSES = [
+    ClassDefinition("Educational", "教育相关的提问或陈述", "educational_handler",
+                    ["什么是微积分?", "如何学好英语?"]),
+    ClassDefinition("Daily", "日常生活对话", "daily_handler", ["今天天气真好", "晚饭吃什么?"]),
+]
+
+
+class TestLocalClassifier(unittest.TestCase):
+    """测试字符n-gram TF-IDF本地分类器"""
+
+    def setUp(self):
+        self.classifier = LocalClassifier.from_classes(CLASSES, threshold=0.5)
+
+    def test_normalize_and_ngrams(self):
+        """标点和大小写不影响n-gram"""
+        self.assertEqual(normalize_text("Hello,  World!"), "hello world")
+        grams = char_ngrams("ab", (1, 2))
+        self.assertEqual(grams, {"a": 1, "b": 1, " a": 1, "ab": 1, "b ": 1})
+        self.assertEqual(char_ngrams("?!"), {})
+
+    def test_exact_example_scores_one(self):
+        """与示例完全相同的输入相似度为1"""
+        prediction = self.classifier.predict("晚饭吃什么?")
+        self.assertEqual(prediction.class_name, "Daily")
+        self.assertAlmostEqual(prediction.confidence, 1.0)
+
+    def test_similar_input(self):
+        """相近的输入被分到对应分类"""
+        self.assertEqual(self.classifier.classify("如何学好数学?").class_name, "Educational")
+        self.assertEqual(self.classifier.classify("今天天气怎么样").class_name, "Daily")
+
+    def test_unrelated_input_not_classified(self):
+        """没有共同n-gram或相似度过低时不给出结果"""
+        self.assertIsNone(self.classifier.classify("..."))
+        self.assertIsNone(self.classifier.classify("qqq"))
+        self.assertEqual(self.classifier.scores("qqq"), {"Educational": 0.0, "Daily": 0.0})
+
+    def test_margin_required(self):
+        """两个分类相似度接近时不给出结果"""
+        classifier = LocalClassifier([("a", "apple pie"), ("b", "apple tart")], threshold=0.1, min_margin=0.5)
+        self.assertIsNone(classifier.classify("apple"))
+
+    def test_invalid_arguments(self):
+        """参数检查"""
+        with self.assertRaises(ValueError):
+            LocalClassifier([("a", "text")], threshold=0)
+        with self.assertRaises(ValueError):
+            LocalClassifier([("a", "text")], min_margin=-1)
+        with self.assertRaises(ValueError):
+            LocalClassifier([("a", "...")])
+
+
+if __name__ == "__main__":
+    unittest.main()
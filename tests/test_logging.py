@@ -0,0 +1,96 @@
+"""
+工作流日志层的单元测试。
+"""
+import unittest
+import io
+import logging
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow import log
+from src.workflow.engine import Workflow
+from src.workflow.nodes.start_node import StartNode
+from src.workflow.nodes.end_node import EndNode
+
+
+class ReprCounter:
+    """记录__repr__被调用次数的上下文值"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __repr__(self):
+        self.count += 1
+        return "<ReprCounter>"
+
+
+class TestWorkflowLogging(unittest.TestCase):
+    """测试工作流日志的级别控制和惰性格式化"""
+
+    def setUp(self):
+        """将日志输出重定向到内存缓冲区"""
+        self.stream = io.StringIO()
+
+    def tearDown(self):
+        """恢复默认日志配置"""
+        log.reset_logging()
+
+    def _run_workflow(self, value):
+        workflow = Workflow([
+            StartNode("start", "Start", ["value"]),
+            EndNode("end", "End", ["value"])
+        ])
+        return workflow.run({"value": value})
+
+    def test_context_not_formatted_by_default(self):
+        """测试默认INFO级别下不会格式化上下文"""
+        log.configure_logging(logging.INFO, stream=self.stream)
+        value = ReprCounter()
+        self._run_workflow(value)
+
+        self.assertEqual(value.count, 0)
+        self.assertIn("--- Executing StartNode(id='start', name='Start') ---", self.stream.getvalue())
+        self.assertNotIn("Input Context", self.stream.getvalue())
+
+    def test_debug_level_dumps_context(self):
+        """测试DEBUG级别输出完整上下文"""
+        log.configure_logging("DEBUG", stream=self.stream)
+        value = ReprCounter()
+        self._run_workflow(value)
+
+        self.assertGreater(value.count, 0)
+        self.assertIn("Input Context: {'value': <ReprCounter>}", self.stream.getvalue())
+
+    def test_silent_mode(self):
+        """测试静默模式下没有任何输出"""
+        log.configure_logging(stream=self.stream)
+        log.silence()
+        value = ReprCounter()
+        self._run_workflow(value)
+
+        self.assertEqual(value.count, 0)
+        self.assertEqual(self.stream.getvalue(), "")
+
+    def test_library_default_leaves_output_to_host(self):
+        """测试未调用configure_logging时不向标准输出写入，也不阻止日志传播"""
+        log.reset_logging()
+        package_logger = logging.getLogger(log.LOGGER_NAME)
+
+        self.assertTrue(package_logger.propagate)
+        self.assertTrue(all(isinstance(handler, logging.NullHandler) for handler in package_logger.handlers))
+
+        with self.assertLogs(log.LOGGER_NAME, level="INFO") as captured:
+            self._run_workflow(1)
+        self.assertTrue(any("Starting Workflow Execution" in line for line in captured.output))
+
+    def test_unknown_level(self):
+        """测试未知的日志级别名称"""
+        with self.assertRaises(ValueError):
+            log.set_log_level("LOUD")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow.micro_batch import AsyncMicroBatcher, MicroBatcher
+
+
+class TestMicroBatcher(unittest.TestCase):
+    """测试同步微批处理器"""
+
+    def setUp(self):
+        self.batches = []
+
+    def double(self, items):
+        self.batches.append(list(items))
+        return [item * 2 if item >= 0 else ValueError(f"negative: {item}") for item in items]
+
+    def run_threads(self, batcher, items):
+        results = {}
+
+        def worker(item):
+            try:
+                results[item] = batcher.submit(item)
+            except Exception as e:
+                results[item] = e
+
+        threads = [threading.Thread(target=worker, args=(item,)) for item in items]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_batched(self):
+        """时间窗口内的并发请求合并为一批"""
+        batcher = MicroBatcher(self.double, window=0.2, max_size=100)
+        results = self.run_threads(batcher, range(8))
+        self.assertEqual(results, {i: i * 2 for i in range(8)})
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(sorted(self.batches[0]), list(range(8)))
+
+    def test_max_size_splits_batches(self):
+        """达到max_size后立即执行，剩余请求进入下一批"""
+        batcher = MicroBatcher(self.double, window=0.2, max_size=3)
+        results = self.run_threads(batcher, range(7))
+        self.assertEqual(results, {i: i * 2 for i in range(7)})
+        self.assertTrue(all(len(batch) <= 3 for batch in self.batches))
+        self.assertEqual(sum(len(batch) for batch in self.batches), 7)
+
+    def test_item_error_isolated(self):
+        """某个请求的结果是异常时，只影响该请求"""
+        batcher = MicroBatcher(self.double, window=0.1)
+        results = self.run_threads(batcher, [1, -1, 2])
+        self.assertEqual(results[1], 2)
+        self.assertEqual(results[2], 4)
+        self.assertIsInstance(results[-1], ValueError)
+
+    def test_batch_error_propagates(self):
+        """批量函数本身失败时所有请求都收到异常"""
+        def fail(items):
+            raise RuntimeError("boom")
+        batcher = MicroBatcher(fail, window=0)
+        with self.assertRaises(RuntimeError):
+            batcher.submit(1)
+
+    def test_result_count_checked(self):
+        """批量函数返回的结果数量必须与请求数量一致"""
+        batcher = MicroBatcher(lambda items: [], window=0)
+        with self.assertRaises(RuntimeError):
+            batcher.submit(1)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            MicroBatcher(self.double, window=-1)
+        with self.assertRaises(ValueError):
+            MicroBatcher(self.double, max_size=0)
+
+
+class TestAsyncMicroBatcher(unittest.TestCase):
+    """测试异步微批处理器"""
+
+    def setUp(self):
+        self.batches = []
+
+    async def double(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(0)
+        return [item * 2 if item >= 0 else ValueError(f"negative: {item}") for item in items]
+
+    def test_gathered_calls_batched(self):
+        """同时等待的协程合并为一批，达到max_size时分批"""
+        batcher = AsyncMicroBatcher(self.double, window=0.05, max_size=4)
+
+        async def main():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+        self.assertEqual(asyncio.run(main()), [i * 2 for i in range(10)])
+        self.assertEqual([len(batch) for batch in self.batches], [4, 4, 2])
+
+    def test_item_error_isolated(self):
+        """某个请求的结果是异常时，只影响该请求"""
+        batcher = AsyncMicroBatcher(self.double, window=0.01)
+
+        async def main():
+            return await asyncio.gather(batcher.submit(1), batcher.submit(-1), return_exceptions=True)
+
+        ok, error = asyncio.run(main())
+        self.assertEqual(ok, 2)
+        self.assertIsInstance(error, ValueError)
+
+    def test_cancelled_caller_does_not_cancel_batch(self):
+        """取消一个调用方不影响同批次的其他请求"""
+        batcher = AsyncMicroBatcher(self.double, window=0.05)
+
+        async def main():
+            first = asyncio.ensure_future(batcher.submit(1))
+            second = asyncio.ensure_future(batcher.submit(2))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), 4)
+
+    def test_separate_event_loops(self):
+        """不同事件循环中的请求不会合并"""
+        batcher = AsyncMicroBatcher(self.double, window=0)
+        self.assertEqual(asyncio.run(batcher.submit(1)), 2)
+        self.assertEqual(asyncio.run(batcher.submit(2)), 4)
+        self.assertEqual(len(self.batches), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+并行工作流调度器的单元测试。
+"""
+import unittest
+import asyncio
+import time
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow.base import BaseNode, WorkflowContext
+from src.workflow.checkpoint import SQLiteCheckpointStore
+from src.workflow.scheduler import ParallelWorkflow
+from src.workflow.nodes.start_node import StartNode
+from src.workflow.nodes.llm_node import LLMNode
+from src.workflow.nodes.end_node import EndNode
+from src.workflow.nodes.conditional_branch_node import ConditionalBranchNode, ClassDefinition
+
+
+class SlowLLMClient:
+    """每次调用都等待固定时间的模拟LLM客户端"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke(self, prompt):
+        """同步调用"""
+        time.sleep(self.latency)
+        return f"Response to: {prompt}"
+
+    async def ainvoke(self, prompt):
+        """异步调用"""
+        await asyncio.sleep(self.latency)
+        return f"Response to: {prompt}"
+
+
+class CounterNode(BaseNode):
+    """未声明输入输出变量的自定义节点"""
+
+    def execute(self, context: WorkflowContext) -> WorkflowContext:
+        updated_context = context.copy()
+        updated_context["counter"] = context.get("counter", 0) + 1
+        return updated_context
+
+
+class TestParallelWorkflow(unittest.TestCase):
+    """测试ParallelWorkflow的功能"""
+
+    def _create_nodes(self, client):
+        """创建一个测验生成器和提示生成器都只读取keypoint的工作流"""
+        return [
+            StartNode("start", "Start", ["keypoint"], next_node_id="quiz_generator"),
+            LLMNode("quiz_generator", "Quiz", system_prompt_template="Quiz: {keypoint}",
+                    output_variable_name="quiz", llm_client=client),
+            LLMNode("hint_generator", "Hint", system_prompt_template="Hint: {keypoint}",
+                    output_variable_name="hint", llm_client=client),
+            LLMNode("summary", "Summary", system_prompt_template="Summary: {quiz} / {hint}",
+                    output_variable_name="summary", llm_client=client),
+            EndNode("end", "End", ["summary"])
+        ]
+
+    def test_dependency_levels(self):
+        """测试根据输入输出变量推断的执行层级"""
+        workflow = ParallelWorkflow(self._create_nodes(SlowLLMClient(0)))
+        self.assertEqual(workflow.execution_levels, [
+            ["start"],
+            ["quiz_generator", "hint_generator"],
+            ["summary"],
+            ["end"]
+        ])
+
+    def test_undeclared_node_is_barrier(self):
+        """测试未声明输入输出的节点与前后节点串行"""
+        client = SlowLLMClient(0)
+        workflow = ParallelWorkflow([
+            StartNode("start", "Start", ["keypoint"]),
+            LLMNode("a", "A", system_prompt_template="A: {keypoint}",
+                    output_variable_name="a", llm_client=client),
+            CounterNode("counter", "Counter"),
+            LLMNode("b", "B", system_prompt_template="B: {keypoint}",
+                    output_variable_name="b", llm_client=client)
+        ])
+        self.assertEqual(workflow.execution_levels, [["start"], ["a"], ["counter"], ["b"]])
+        result = workflow.run({"keypoint": "x"})
+        self.assertEqual(result["counter"], 1)
+        self.assertEqual(result["b"], "Response to: B: x")
+
+    def test_run_executes_independent_nodes_concurrently(self):
+        """测试独立节点在线程池中并发执行"""
+        workflow = ParallelWorkflow(self._create_nodes(SlowLLMClient(0.2)))
+
+        start_time = time.perf_counter()
+        result = workflow.run({"keypoint": "勾股定理"})
+        elapsed = time.perf_counter() - start_time
+
+        self.assertEqual(result["summary"],
+                         "Response to: Summary: Response to: Quiz: 勾股定理 / Response to: Hint: 勾股定理")
+        self.assertNotIn("next_node_id", result)
+        # 串行执行需要0.6秒，关键路径只有0.4秒
+        self.assertLess(elapsed, 0.55)
+
+    def test_arun_executes_independent_nodes_concurrently(self):
+        """测试独立节点在事件循环中并发执行"""
+        workflow = ParallelWorkflow(self._create_nodes(SlowLLMClient(0.2)))
+
+        start_time = time.perf_counter()
+        result = asyncio.run(workflow.arun({"keypoint": "勾股定理"}))
+        elapsed = time.perf_counter() - start_time
+
+        self.assertIn("summary", result)
+        self.assertLess(elapsed, 0.55)
+
+    def test_node_failure_is_raised(self):
+        """测试节点失败时异常被重新抛出"""
+        workflow = ParallelWorkflow(self._create_nodes(SlowLLMClient(0)))
+        with self.assertRaises(ValueError):
+            workflow.run({})
+
+    def test_checkpoint_store_rejected(self):
+        """测试并行工作流拒绝检查点存储，并接受与Workflow.run一致的run_id参数"""
+        store = SQLiteCheckpointStore()
+        self.addCleanup(store.close)
+        with self.assertRaises(ValueError):
+            ParallelWorkflow(self._create_nodes(SlowLLMClient(0)), checkpoint_store=store)
+
+        workflow = ParallelWorkflow(self._create_nodes(SlowLLMClient(0)))
+        self.assertIn("summary", workflow.run({"keypoint": "x"}, run_id="run-1"))
+        self.assertIn("summary", asyncio.run(workflow.arun({"keypoint": "x"}, run_id="run-1")))
+
+        workflow.checkpoint_store = store
+        with self.assertRaises(ValueError):
+            workflow.run({"keypoint": "x"})
+        with self.assertRaises(ValueError):
+            asyncio.run(workflow.arun({"keypoint": "x"}))
+        self.assertEqual(store.list_runs(), [])
+
+    def test_branching_rejected(self):
+        """测试包含分支的工作流被拒绝"""
+        client = SlowLLMClient(0)
+        branch = ConditionalBranchNode(
+            node_id="branch",
+            node_name="Branch",
+            classes=[ClassDefinition("A", "A", "end")],
+            input_variable_name="keypoint",
+            llm_client=client
+        )
+        with self.assertRaises(ValueError):
+            ParallelWorkflow([StartNode("start", "Start", ["keypoint"]), branch, EndNode("end", "End", [])])
+
+        with self.assertRaises(ValueError):
+            ParallelWorkflow([
+                StartNode("start", "Start", ["keypoint"], next_node_id="end"),
+                LLMNode("skipped", "Skipped", system_prompt_template="{keypoint}",
+                        output_variable_name="x", llm_client=client),
+                EndNode("end", "End", [])
+            ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow import silence, reset_logging
+from src.workflow.base import BaseNode, WorkflowContext
+from src.workflow.engine import AsyncWorkflow, Workflow
+from src.workflow.scheduler import ParallelWorkflow
+from src.workflow.process_pool import (configure_process_pool, default_mp_context, get_process_pool,
+                                       shutdown_process_pool, warm_up_process_pool, execute_node,
+                                       _run_in_worker, _select_inputs)
+from src.workflow.nodes.start_node import StartNode
+from src.workflow.nodes.end_node import EndNode
+
+
+class WordCountNode(BaseNode):
+    """统计答案中的词数，并记录工作进程的pid和收到的变量"""
+    execution = "process"
+
+    def get_input_variables(self):
+        return ["answer"]
+
+    def get_output_variables(self):
+        return ["word_count", "worker_pid", "received"]
+
+    def execute(self, context):
+        if context["answer"] is None:
+            raise ValueError("missing answer")
+        updated_context = context.copy()
+        updated_context["word_count"] = len(context["answer"].split())
+        updated_context["worker_pid"] = os.getpid()
+        updated_context["received"] = sorted(context.keys())
+        updated_context["scratch"] = "not declared"
+        return updated_context
+
+
+class RouteNode(BaseNode):
+    """未声明输入输出的进程节点，根据词数选择下一个节点"""
+    execution = "process"
+
+    def execute(self, context):
+        updated_context = context.copy()
+        updated_context["next_node_id"] = "long" if context["word_count"] > 3 else "short"
+        updated_context["routed"] = True
+        return updated_context
+
+
+class MarkNode(BaseNode):
+
+    def execute(self, context):
+        updated_context = context.copy()
+        updated_context["length"] = self.node_id
+        updated_context["next_node_id"] = "end"
+        return updated_context
+
+
+class InvalidModeNode(BaseNode):
+    execution = "gpu"
+
+    def execute(self, context):
+        return context
+
+
+class TestProcessPool(unittest.TestCase):
+    """测试进程池节点的执行"""
+
+    @classmethod
+    def setUpClass(cls):
+        silence()
+        configure_process_pool(max_workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_process_pool()
+        configure_process_pool()
+        reset_logging()
+
+    def test_runs_in_worker_process(self):
+        context = WorkflowContext({"answer": "one two three", "essay": "x" * 1000})
+        result = execute_node(WordCountNode("count", "Count"), context)
+
+        self.assertEqual(result["word_count"], 3)
+        self.assertNotEqual(result["worker_pid"], os.getpid())
+        self.assertIsInstance(result, WorkflowContext)
+        # 原上下文不被修改，未声明的变量保持不变
+        self.assertNotIn("word_count", context)
+        self.assertEqual(result["essay"], "x" * 1000)
+
+    def test_default_start_method_is_not_fork(self):
+        self.assertIn(default_mp_context().get_start_method(), ("forkserver", "spawn"))
+
+    def test_warm_up_starts_workers(self):
+        warm_up_process_pool()
+        pids = {get_process_pool().submit(os.getpid).result() for _ in range(8)}
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_only_declared_variables_are_transferred(self):
+        context = WorkflowContext({"answer": "a b", "essay": "x" * 1000})
+        result = execute_node(WordCountNode("count", "Count"), context)
+
+        self.assertEqual(result["received"], ["answer"])
+        self.assertNotIn("scratch", result)
+
+    def test_undeclared_node_sends_whole_context(self):
+        node = RouteNode("route", "Route")
+        inputs = _select_inputs(node, WorkflowContext({"word_count": 5, "other": 1}))
+        self.assertEqual(inputs, {"word_count": 5, "other": 1})
+
+        updates, removed = _run_in_worker(node, inputs)
+        self.assertEqual(updates, {"next_node_id": "long", "routed": True})
+        self.assertEqual(removed, [])
+
+    def test_errors_propagate(self):
+        with self.assertRaises(ValueError):
+            execute_node(WordCountNode("count", "Count"), WorkflowContext({"answer": None}))
+
+    def test_workflow_branches_on_process_node(self):
+        workflow = Workflow([
+            StartNode("start", "Start", ["answer"]),
+            WordCountNode("count", "Count"),
+            RouteNode("route", "Route"),
+            MarkNode("short", "Short"),
+            MarkNode("long", "Long"),
+            EndNode("end", "End", ["length"]),
+        ])
+
+        self.assertEqual(workflow.run({"answer": "a b c d e"})["length"], "long")
+        self.assertEqual(workflow.run({"answer": "a b"})["length"], "short")
+
+    def test_async_workflow(self):
+        workflow = AsyncWorkflow([
+            StartNode("start", "Start", ["answer"]),
+            WordCountNode("count", "Count"),
+            EndNode("end", "End", ["word_count"]),
+        ])
+
+        result = asyncio.run(workflow.arun({"answer": "one two"}))
+        self.assertEqual(result["word_count"], 2)
+
+    def test_parallel_workflow(self):
+        workflow = ParallelWorkflow([
+            StartNode("start", "Start", ["answer"]),
+            WordCountNode("count", "Count"),
+            EndNode("end", "End", ["word_count"]),
+        ])
+
+        result = workflow.run({"answer": "one two three four"})
+        self.assertEqual(result["word_count"], 4)
+
+    def test_invalid_execution_mode(self):
+        with self.assertRaises(ValueError):
+            Workflow([InvalidModeNode("bad", "Bad")]).compile()
+        with self.assertRaises(ValueError):
+            execute_node(InvalidModeNode("bad", "Bad"), WorkflowContext())
+
+
+if __name__ == "__main__":
+    unittest.main()
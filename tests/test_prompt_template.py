@@ -0,0 +1,69 @@
+"""
+预编译提示词模板的单元测试。
+"""
+import unittest
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow.prompt_template import PromptTemplate
+from src.workflow.context import WorkflowContext
+
+
+class TestPromptTemplate(unittest.TestCase):
+    """测试PromptTemplate与str.format的一致性"""
+
+    def assertSameAsFormat(self, template, **values):
+        compiled = PromptTemplate(template)
+        self.assertTrue(compiled.compiled)
+        self.assertEqual(compiled.render(values), template.format(**values))
+
+    def test_matches_str_format(self):
+        """测试常见写法的渲染结果与str.format相同"""
+        self.assertSameAsFormat("Process this: {input_text}", input_text="Hello")
+        self.assertSameAsFormat("题目：{quiz_info_extracted[problem]}", quiz_info_extracted={"problem": "1+1=?"})
+        self.assertSameAsFormat('示例：{{"class": "A"}}，输入：{query}', query="q")
+        self.assertSameAsFormat("{score:.2f} {score!r} {items[0]}", score=0.5, items=[1, 2])
+        self.assertSameAsFormat("{value.real}", value=3)
+        self.assertSameAsFormat("{quiz[items][0].real} {quiz[a b]}", quiz={"items": [2], "a b": "c"})
+
+    def test_invalid_field_names(self):
+        """测试不合法的字段名与str.format抛出相同的错误"""
+        for template in ("{a.}", "{a[x}", "{a[x]y}", "{a[]}"):
+            with self.subTest(template=template):
+                compiled = PromptTemplate(template)
+                self.assertFalse(compiled.compiled)
+                with self.assertRaises(ValueError):
+                    compiled.render({"a": {"x": 1}})
+
+    def test_variables_in_order(self):
+        """测试按出现顺序记录变量名（去重）"""
+        template = PromptTemplate("{b} {a[key]} {b}")
+        self.assertEqual(template.variables, ["b", "a"])
+
+    def test_allowed_and_missing_variables(self):
+        """测试缺失变量和不允许读取的变量抛出KeyError"""
+        template = PromptTemplate("{a} {b}")
+        context = WorkflowContext({"a": 1, "b": 2})
+        self.assertEqual(template.render(context, allowed={"a", "b"}), "1 2")
+        with self.assertRaises(KeyError):
+            template.render(context, allowed={"a"})
+        with self.assertRaises(KeyError):
+            template.render({"a": 1})
+
+    def test_fallback_to_str_format(self):
+        """测试无法预编译的写法退回到str.format"""
+        nested = PromptTemplate("{value:{width}}")
+        self.assertFalse(nested.compiled)
+        self.assertEqual(nested.render({"value": 1, "width": 3}), "  1")
+
+        invalid = PromptTemplate("unbalanced } brace")
+        self.assertFalse(invalid.compiled)
+        with self.assertRaises(ValueError):
+            invalid.render({})
+
+
+if __name__ == "__main__":
+    unittest.main()
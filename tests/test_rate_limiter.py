@@ -0,0 +1,164 @@
+"""
+LLM客户端限流器的单元测试。
+"""
+import unittest
+import asyncio
+import threading
+import time
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm.rate_limiter import RateLimiter, RateLimitedLLMClient, TokenBucket
+from src.llm.fake_client import FakeLLMClient
+
+
+class TestTokenBucket(unittest.TestCase):
+    """测试令牌桶的预留和补充"""
+
+    def test_reserve_returns_wait_time(self):
+        """测试令牌不足时返回需要等待的时间"""
+        bucket = TokenBucket(rate=10, capacity=2)
+        now = time.monotonic()
+        self.assertEqual(bucket.reserve(1, now), 0.0)
+        self.assertEqual(bucket.reserve(1, now), 0.0)
+        self.assertAlmostEqual(bucket.reserve(1, now), 0.1)
+        # 后来的调用者排在之前的预留之后
+        self.assertAlmostEqual(bucket.reserve(1, now), 0.2)
+        # 时间流逝后补充令牌
+        self.assertEqual(bucket.reserve(1, now + 1.0), 0.0)
+
+    def test_invalid_arguments(self):
+        """测试无效参数"""
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0, capacity=1)
+        with self.assertRaises(ValueError):
+            RateLimiter(max_in_flight=0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """测试限流器的速率、并发和顺序"""
+
+    def test_requests_per_second(self):
+        """测试请求速率被限制"""
+        limiter = RateLimiter(requests_per_second=20, burst=1)
+        start = time.monotonic()
+        for _ in range(5):
+            with limiter.limit():
+                pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.assertEqual(limiter.stats().admitted, 5)
+
+    def test_tokens_per_minute(self):
+        """测试token数限制"""
+        limiter = RateLimiter(tokens_per_minute=600)  # 每秒10个token
+        with limiter.limit(tokens=600):
+            pass
+        start = time.monotonic()
+        with limiter.limit(tokens=2):
+            pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_max_in_flight_and_fifo_order(self):
+        """测试并发上限和FIFO放行顺序"""
+        limiter = RateLimiter(max_in_flight=1)
+        order = []
+        active = []
+        max_active = []
+
+        limiter.acquire()
+
+        def worker(index):
+            with limiter.limit():
+                active.append(index)
+                max_active.append(len(active))
+                order.append(index)
+                time.sleep(0.01)
+                active.remove(index)
+
+        threads = []
+        for i in range(4):
+            thread = threading.Thread(target=worker, args=(i,))
+            thread.start()
+            threads.append(thread)
+            # 确保线程按顺序进入队列
+            while limiter.stats().queue_depth < i + 1:
+                time.sleep(0.001)
+
+        self.assertEqual(limiter.stats().max_queue_depth, 4)
+        limiter.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, [0, 1, 2, 3])
+        self.assertEqual(max(max_active), 1)
+        self.assertEqual(limiter.stats().in_flight, 0)
+        self.assertEqual(limiter.stats().queue_depth, 0)
+
+    def test_async_and_cancellation(self):
+        """测试异步调用者的并发限制，取消的等待者不会占用名额"""
+        limiter = RateLimiter(max_in_flight=2)
+        peak = 0
+        running = 0
+
+        async def task():
+            nonlocal peak, running
+            async with limiter.alimit():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        async def main():
+            await limiter.aacquire()
+            await limiter.aacquire()
+            cancelled = asyncio.create_task(limiter.aacquire())
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await cancelled
+            limiter.release()
+            limiter.release()
+            await asyncio.gather(*(task() for _ in range(6)))
+
+        asyncio.run(main())
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.stats().in_flight, 0)
+
+
+class TestRateLimitedLLMClient(unittest.TestCase):
+    """测试限流客户端包装器"""
+
+    def test_wraps_sync_and_async_calls(self):
+        """测试同步和异步调用结果不变，并发受限"""
+        limiter = RateLimiter(max_in_flight=3)
+        client = RateLimitedLLMClient(FakeLLMClient(latency=0.05), limiter)
+
+        self.assertEqual(client.invoke("hello"), FakeLLMClient().invoke("hello"))
+
+        async def main():
+            return await asyncio.gather(*(client.ainvoke("hello") for _ in range(6)))
+
+        start = time.monotonic()
+        responses = asyncio.run(main())
+        self.assertEqual(len(set(responses)), 1)
+        # 6个请求、并发3、每个50ms，至少需要两轮
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual(limiter.stats().admitted, 7)
+
+    def test_stream_holds_slot(self):
+        """测试流式调用期间占用名额"""
+        limiter = RateLimiter(max_in_flight=1)
+        client = RateLimitedLLMClient(FakeLLMClient(), limiter)
+
+        stream = client.invoke_stream("hello")
+        next(stream)
+        self.assertEqual(limiter.stats().in_flight, 1)
+        list(stream)
+        self.assertEqual(limiter.stats().in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
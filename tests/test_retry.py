@@ -0,0 +1,179 @@
+"""
+LLM调用重试策略的单元测试。
+"""
+import unittest
+import asyncio
+import sys
+import os
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm.retry import RetryPolicy, RetryingLLMClient, StreamInterruptedError
+from src.workflow.nodes.llm_node import LLMNode
+from src.workflow.log import silence, reset_logging
+
+# 测试中不需要真正等待
+FAST = dict(initial_backoff=0.001, max_backoff=0.002, jitter=0)
+
+
+class FlakyClient:
+    """前几次调用失败的模拟LLM客户端"""
+
+    def __init__(self, failures, error=ConnectionError, fail_mid_stream=False):
+        self.failures = failures
+        self.error = error
+        self.fail_mid_stream = fail_mid_stream
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error("temporary failure")
+        return f"answer to {prompt}"
+
+    def invoke_stream(self, prompt):
+        self.calls += 1
+        if self.calls <= self.failures and not self.fail_mid_stream:
+            raise self.error("connect failed")
+        yield "partial "
+        if self.calls <= self.failures:
+            raise self.error("connection reset")
+        yield "answer"
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """测试重试策略的退避和停止条件"""
+
+    def setUp(self):
+        silence()
+
+    def tearDown(self):
+        reset_logging()
+
+    def test_backoff_grows_and_is_capped(self):
+        """测试指数退避和上限"""
+        policy = RetryPolicy(initial_backoff=1, multiplier=2, max_backoff=5, jitter=0)
+        self.assertEqual([policy.backoff(n) for n in range(1, 5)], [1, 2, 4, 5])
+
+    def test_jitter_range(self):
+        """测试抖动在指定比例范围内"""
+        policy = RetryPolicy(initial_backoff=1, jitter=0.5)
+        for _ in range(50):
+            self.assertTrue(0.5 <= policy.backoff(1) <= 1.0)
+
+    def test_stops_after_max_attempts(self):
+        """测试达到最大次数后抛出最后一次的异常"""
+        policy = RetryPolicy(max_attempts=3, **FAST)
+        client = FlakyClient(failures=5)
+        retries = []
+        with self.assertRaises(ConnectionError):
+            policy.call(client.invoke, "q", on_retry=lambda attempt, e, delay: retries.append(attempt))
+        self.assertEqual(client.calls, 3)
+        self.assertEqual(retries, [1, 2])
+
+    def test_non_retryable_error(self):
+        """测试不可重试的异常立即抛出"""
+        policy = RetryPolicy(**FAST)
+        client = FlakyClient(failures=1, error=ValueError)
+        with self.assertRaises(ValueError):
+            policy.call(client.invoke, "q")
+        self.assertEqual(client.calls, 1)
+
+    def test_deadline_budget(self):
+        """测试总时间预算不足时不再重试"""
+        policy = RetryPolicy(max_attempts=10, initial_backoff=1, jitter=0, deadline=0.5)
+        client = FlakyClient(failures=1)
+        with self.assertRaises(ConnectionError):
+            policy.call(client.invoke, "q")
+        self.assertEqual(client.calls, 1)
+
+    def test_invalid_arguments(self):
+        """测试无效参数"""
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_attempts=0)
+        with self.assertRaises(ValueError):
+            RetryPolicy(jitter=2)
+
+
+class TestRetryingLLMClient(unittest.TestCase):
+    """测试重试客户端包装器"""
+
+    def setUp(self):
+        silence()
+
+    def tearDown(self):
+        reset_logging()
+
+    def test_invoke_recovers(self):
+        """测试暂时性错误后重试成功并记录统计"""
+        client = RetryingLLMClient(FlakyClient(failures=2), RetryPolicy(**FAST))
+        self.assertEqual(client.invoke("q"), "answer to q")
+        self.assertEqual(client.stats.calls, 1)
+        self.assertEqual(client.stats.retries, 2)
+        self.assertEqual(client.stats.failures, 0)
+
+    def test_ainvoke_recovers_with_sync_client(self):
+        """测试包装只有同步接口的客户端时异步调用也会重试"""
+        client = RetryingLLMClient(FlakyClient(failures=1), RetryPolicy(**FAST))
+        self.assertEqual(asyncio.run(client.ainvoke("q")), "answer to q")
+        self.assertEqual(client.stats.retries, 1)
+
+    def test_stream_retries_before_first_chunk(self):
+        """测试连接阶段失败的流式调用会重试"""
+        client = RetryingLLMClient(FlakyClient(failures=1), RetryPolicy(**FAST))
+        self.assertEqual(list(client.invoke_stream("q")), ["partial ", "answer"])
+        self.assertEqual(client.stats.retries, 1)
+
+    def test_stream_not_retried_after_output(self):
+        """测试已输出片段后中断的流不会重试"""
+        inner = FlakyClient(failures=1, fail_mid_stream=True)
+        client = RetryingLLMClient(inner, RetryPolicy(**FAST))
+        chunks = []
+        with self.assertRaises(StreamInterruptedError):
+            for chunk in client.invoke_stream("q"):
+                chunks.append(chunk)
+        self.assertEqual(chunks, ["partial "])
+        self.assertEqual(inner.calls, 1)
+        self.assertEqual(client.stats.failures, 1)
+
+
+class TestLLMNodeRetry(unittest.TestCase):
+    """测试LLMNode的retry_policy参数"""
+
+    def setUp(self):
+        silence()
+
+    def tearDown(self):
+        reset_logging()
+
+    def _node(self, client, **kwargs):
+        return LLMNode("llm", "LLM", "Answer: {question}", "answer", client, **kwargs)
+
+    def test_node_retries(self):
+        """测试节点按策略重试，同步和异步执行都生效"""
+        node = self._node(FlakyClient(failures=2), retry_policy=RetryPolicy(**FAST))
+        self.assertEqual(node.execute({"question": "q"})["answer"], "answer to Answer: q")
+        self.assertEqual(node.retry_stats.retries, 2)
+
+        node = self._node(FlakyClient(failures=1), retry_policy=RetryPolicy(**FAST))
+        result = asyncio.run(node.aexecute({"question": "q"}))
+        self.assertEqual(result["answer"], "answer to Answer: q")
+
+    def test_node_without_policy_fails(self):
+        """测试未配置重试策略时保持原有行为"""
+        node = self._node(FlakyClient(failures=1))
+        self.assertIsNone(node.retry_stats)
+        with self.assertRaises(RuntimeError):
+            node.execute({"question": "q"})
+
+    def test_exhausted_retries_raise_runtime_error(self):
+        """测试重试耗尽后节点抛出RuntimeError"""
+        node = self._node(FlakyClient(failures=5), retry_policy=RetryPolicy(max_attempts=2, **FAST))
+        with self.assertRaises(RuntimeError):
+            node.execute({"question": "q"})
+        self.assertEqual(node.retry_stats.failures, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
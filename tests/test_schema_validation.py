@@ -0,0 +1,148 @@
+import unittest
+import json
+import sys
+import os
+from unittest import mock
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow import schema_validation
+from src.workflow.schema_validation import clear_validator_cache, get_validator, validate_json
+from src.workflow.nodes.conditional_branch_node import CLASSIFICATION_SCHEMA
+from src.workflow.nodes.json_extractor_node import JSONExtractorNode
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+SIMPLE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "age": {"type": "integer", "minimum": 0},
+        "level": {"enum": ["low", "high"]},
+    },
+    "required": ["name"],
+}
+
+
+class TestSchemaValidation(unittest.TestCase):
+    """测试JSON Schema验证器缓存"""
+
+    def setUp(self):
+        clear_validator_cache()
+
+    def test_validator_cached_by_content(self):
+        """同一个schema和内容相同的schema共享验证器"""
+        validator = get_validator(SIMPLE_SCHEMA)
+        self.assertIs(get_validator(SIMPLE_SCHEMA), validator)
+        self.assertIs(get_validator(dict(SIMPLE_SCHEMA)), validator)
+
+    def test_identity_hit_skips_serialization(self):
+        """同一个schema对象再次使用时不重新序列化"""
+        get_validator(SIMPLE_SCHEMA)
+        with mock.patch.object(schema_validation.json, 'dumps', wraps=json.dumps) as dumps:
+            for _ in range(5):
+                validate_json({"name": "Alice"}, SIMPLE_SCHEMA)
+        self.assertEqual(dumps.call_count, 0)
+
+    def test_mutated_schema_after_clear(self):
+        """原地修改schema并清空缓存后重新编译"""
+        schema = {"type": "object", "properties": {"name": {"type": "string"}}, "required": []}
+        get_validator(schema)({})
+        schema["required"].append("name")
+        clear_validator_cache()
+        with self.assertRaises(Exception):
+            get_validator(schema)({})
+
+    def test_cache_size_bounded(self):
+        """缓存超过上限时淘汰最久未使用的验证器"""
+        with mock.patch.object(schema_validation, 'MAX_CACHED_VALIDATORS', 2):
+            first = get_validator({"type": "object", "title": "first"})
+            get_validator({"type": "object", "title": "second"})
+            get_validator({"type": "object", "title": "third"})
+            self.assertEqual(len(schema_validation._validators), 2)
+            self.assertEqual(len(schema_validation._validators_by_id), 2)
+            self.assertIsNot(get_validator({"type": "object", "title": "first"}), first)
+
+    def test_schema_compiled_once(self):
+        """重复验证不会重新编译schema"""
+        with mock.patch.object(schema_validation, '_compile', wraps=schema_validation._compile) as compile_schema:
+            for _ in range(5):
+                validate_json({"name": "Alice"}, SIMPLE_SCHEMA)
+        self.assertEqual(compile_schema.call_count, 1)
+
+    def test_simple_schema_skips_jsonschema(self):
+        """简单schema使用纯Python检查，不调用jsonschema"""
+        with mock.patch.object(schema_validation, '_compile_jsonschema') as compile_jsonschema:
+            validate_json({"name": "Alice", "age": 3, "level": "low"}, SIMPLE_SCHEMA)
+            validate_json({"class_index": 0, "class_name": "a", "confidence": 0.5, "reasoning": ""},
+                          CLASSIFICATION_SCHEMA)
+        compile_jsonschema.assert_not_called()
+
+    def test_simple_schema_errors(self):
+        """简单schema的错误信息与jsonschema一致"""
+        cases = [
+            ({"age": 3}, "'name' is a required property"),
+            ({"name": 5}, "5 is not of type 'string'"),
+            ({"name": "Alice", "age": True}, "True is not of type 'integer'"),
+            ({"name": "Alice", "age": -1}, "-1 is less than the minimum of 0"),
+            ({"name": "Alice", "level": "mid"}, "'mid' is not one of ['low', 'high']"),
+            ([], "[] is not of type 'object'"),
+        ]
+        for instance, message in cases:
+            with self.subTest(instance=instance):
+                with self.assertRaises(ValueError) as ctx:
+                    validate_json(instance, SIMPLE_SCHEMA)
+                self.assertEqual(str(ctx.exception), message)
+                if jsonschema is not None:
+                    with self.assertRaises(jsonschema.ValidationError) as js_ctx:
+                        jsonschema.validate(instance, SIMPLE_SCHEMA)
+                    self.assertEqual(js_ctx.exception.message, message)
+
+    def test_integer_accepts_integral_float(self):
+        """与jsonschema相同，1.0被视为整数"""
+        validate_json({"name": "Alice", "age": 1.0}, SIMPLE_SCHEMA)
+
+    def test_complex_schema_uses_jsonschema(self):
+        """包含其他关键字的schema使用jsonschema验证"""
+        if jsonschema is None:
+            self.skipTest("jsonschema package not installed")
+        schema = {
+            "type": "object",
+            "properties": {"tags": {"type": "array", "items": {"type": "string"}}},
+        }
+        validate_json({"tags": ["a"]}, schema)
+        with self.assertRaises(jsonschema.ValidationError):
+            validate_json({"tags": [1]}, schema)
+
+    def test_invalid_schema_not_cached(self):
+        """不合法的schema每次都报错"""
+        if jsonschema is None:
+            self.skipTest("jsonschema package not installed")
+        schema = {"type": "object", "minProperties": "many"}
+        for _ in range(2):
+            with self.assertRaises(jsonschema.SchemaError):
+                validate_json({}, schema)
+
+    def test_extractor_uses_cached_validator(self):
+        """JSONExtractorNode的验证错误信息保持原有格式"""
+        extractor = JSONExtractorNode(
+            node_id="json_test",
+            node_name="JSON Extractor",
+            input_variable_name="llm_output",
+            output_variable_name="parsed_json",
+            schema=SIMPLE_SCHEMA,
+            raise_on_error=True
+        )
+        result = extractor.execute({"llm_output": '{"name": "Alice", "age": 3}'})
+        self.assertEqual(result["parsed_json"]["age"], 3)
+        with self.assertRaises(ValueError) as ctx:
+            extractor.execute({"llm_output": '{"age": 3}'})
+        self.assertIn("JSON validation failed: 'name' is a required property", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
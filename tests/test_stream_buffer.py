@@ -0,0 +1,134 @@
+"""
+流式响应缓冲区的单元测试。
+"""
+import unittest
+import asyncio
+import sys
+import os
+from unittest import mock
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflow.stream_buffer import StreamBuffer
+from src.workflow.nodes.llm_node import LLMNode
+from src.workflow.log import silence, reset_logging
+
+
+class EndlessStreamClient:
+    """不断产生片段的模拟流式客户端，记录读取的片段数"""
+
+    def __init__(self):
+        self.produced = 0
+        self.closed = False
+
+    def invoke(self, prompt):
+        return "x" * 100
+
+    def invoke_stream(self, prompt):
+        try:
+            while True:
+                self.produced += 1
+                yield "abc"
+        finally:
+            self.closed = True
+
+    async def astream(self, prompt):
+        while True:
+            self.produced += 1
+            yield "abc"
+
+
+class TestStreamBuffer(unittest.TestCase):
+    """测试StreamBuffer的累积、增量读取和上限"""
+
+    def test_accumulate(self):
+        """测试完整文本的累积和合并缓存"""
+        buffer = StreamBuffer()
+        buffer.append("Hello")
+        buffer.append(", ")
+        self.assertEqual(buffer.getvalue(), "Hello, ")
+        buffer.append("world")
+        self.assertEqual(buffer.getvalue(), "Hello, world")
+        buffer.append("!")
+        self.assertEqual(buffer.getvalue(), "Hello, world!")
+        self.assertEqual(len(buffer), 13)
+
+    def test_read_new(self):
+        """测试增量读取只返回上次读取之后追加的文本"""
+        buffer = StreamBuffer(max_chars=12)
+        buffer.append("Hello")
+        buffer.append(", ")
+        self.assertEqual(buffer.read_new(), "Hello, ")
+        self.assertEqual(buffer.read_new(), "")
+        buffer.append("world!!")
+        self.assertEqual(buffer.read_new(), "world")
+        self.assertEqual(buffer.getvalue(), "Hello, world")
+
+    def test_max_chars(self):
+        """测试超过上限的内容被截断"""
+        buffer = StreamBuffer(max_chars=5)
+        self.assertEqual(buffer.append("abc"), "abc")
+        self.assertFalse(buffer.full)
+        self.assertEqual(buffer.append("defg"), "de")
+        self.assertTrue(buffer.full)
+        self.assertTrue(buffer.truncated)
+        self.assertEqual(buffer.append("h"), "")
+        self.assertEqual(buffer.getvalue(), "abcde")
+
+        with self.assertRaises(ValueError):
+            StreamBuffer(max_chars=0)
+
+
+class TestLLMNodeResponseLimit(unittest.TestCase):
+    """测试LLMNode的max_response_chars参数"""
+
+    def setUp(self):
+        silence()
+        self.chunks = []
+
+    def tearDown(self):
+        reset_logging()
+
+    def _node(self, client, stream=True):
+        return LLMNode("llm", "LLM", "Explain {topic}", "answer", client,
+                       stream=stream, stream_callback=self.chunks.append, max_response_chars=10)
+
+    def test_stream_stops_at_limit(self):
+        """测试流式响应达到上限后停止读取并关闭上游流"""
+        client = EndlessStreamClient()
+        result = self._node(client).execute({"topic": "youth"})
+
+        self.assertEqual(result["answer"], "abcabcabca")
+        self.assertEqual(self.chunks, ["abc", "abc", "abc", "a"])
+        self.assertEqual(client.produced, 4)
+        self.assertTrue(client.closed)
+
+    def test_stream_reads_incrementally(self):
+        """测试流式回调使用增量读取，读取过程中不合并完整文本"""
+        client = EndlessStreamClient()
+        with mock.patch.object(StreamBuffer, 'getvalue', autospec=True,
+                               side_effect=StreamBuffer.getvalue) as getvalue, \
+                mock.patch.object(StreamBuffer, 'read_new', autospec=True,
+                                  side_effect=StreamBuffer.read_new) as read_new:
+            result = self._node(client).execute({"topic": "youth"})
+
+        self.assertEqual(result["answer"], "abcabcabca")
+        self.assertEqual(read_new.call_count, 4)
+        self.assertEqual(getvalue.call_count, 1)
+
+    def test_async_stream_stops_at_limit(self):
+        """测试异步流式响应达到上限后停止读取"""
+        client = EndlessStreamClient()
+        result = asyncio.run(self._node(client).aexecute({"topic": "youth"}))
+        self.assertEqual(result["answer"], "abcabcabca")
+        self.assertEqual(client.produced, 4)
+
+    def test_non_stream_response_truncated(self):
+        """测试非流式响应同样受上限约束"""
+        result = self._node(EndlessStreamClient(), stream=False).execute({"topic": "youth"})
+        self.assertEqual(result["answer"], "x" * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
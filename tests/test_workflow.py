@@ -75,5 +75,70 @@ class TestWorkflow(unittest.TestCase):
         # 验证异常消息
         self.assertIn("Expected initial variable 'input_data' not found", str(context.exception))
 
+    def test_compile_validates_static_edges(self):
+        """编译时检查静态跳转目标，运行前即报错"""
+        start_node = StartNode("start", "Start Node", ["input_data"], next_node_id="missing")
+        end_node = EndNode("end", "End Node", ["input_data"])
+        workflow = Workflow([start_node, end_node])
+        with self.assertRaises(ValueError) as context:
+            workflow.compile()
+        self.assertIn("'missing'", str(context.exception))
+        with self.assertRaises(ValueError):
+            workflow.run({"input_data": 1})
+
+    def test_compile_validates_branch_targets(self):
+        """条件分支的所有分类目标都会被检查"""
+        from src.llm.fake_client import FakeLLMClient
+        from src.workflow.nodes.conditional_branch_node import ConditionalBranchNode, ClassDefinition
+        branch = ConditionalBranchNode(
+            "branch", "Branch", [ClassDefinition("A", "a", "end"), ClassDefinition("B", "b", "nowhere")],
+            "input_data", FakeLLMClient(), default_class=ClassDefinition("C", "c", "gone")
+        )
+        workflow = Workflow([StartNode("start", "Start Node", ["input_data"]), branch,
+                             EndNode("end", "End Node", ["input_data"])])
+        with self.assertRaises(ValueError) as context:
+            workflow.compile()
+        self.assertIn("'nowhere'", str(context.exception))
+        self.assertIn("'gone'", str(context.exception))
+
+    def test_compile_rejects_duplicate_ids(self):
+        """节点ID重复时编译失败"""
+        workflow = Workflow([StartNode("start", "Start Node", ["input_data"]),
+                             EndNode("start", "End Node", ["input_data"])])
+        with self.assertRaises(ValueError):
+            workflow.compile()
+
+    def test_compiled_plan_reused(self):
+        """编译结果在多次运行间复用，跳转关系为整数下标"""
+        start_node = StartNode("start", "Start Node", ["input_data"], next_node_id="end")
+        middle_node = EndNode("middle", "Middle Node", ["input_data"])
+        end_node = EndNode("end", "End Node", ["input_data"])
+        workflow = Workflow([start_node, middle_node, end_node])
+
+        visited = []
+        listener = lambda node, context: visited.append(node.node_id)
+        workflow.run({"input_data": 1}, node_listener=listener)
+        plan = workflow.plan
+        workflow.run({"input_data": 2}, node_listener=listener)
+        self.assertIs(workflow.plan, plan)
+        self.assertEqual(plan.static_next, (2, None, None))
+        self.assertEqual(plan.sequential_next, (1, 2, None))
+        self.assertEqual(visited, ["start", "end", "start", "end"])
+
+    def test_invalid_dynamic_target(self):
+        """选择器返回不存在的节点ID时在运行时报错"""
+        from src.workflow.base import BaseNode
+
+        class SelectorNode(BaseNode):
+            next_node_selector = staticmethod(lambda context: "nowhere")
+
+            def execute(self, context):
+                return context
+
+        workflow = Workflow([StartNode("start", "Start Node", ["input_data"]), SelectorNode("select", "Select")])
+        with self.assertRaises(ValueError) as context:
+            workflow.run({"input_data": 1})
+        self.assertIn("referenced invalid next node ID: 'nowhere'", str(context.exception))
+
 if __name__ == "__main__":
     unittest.main()